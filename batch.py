@@ -0,0 +1,171 @@
+"""
+Batch mode: build one story pack per match event file in a single process
+tree.
+
+Weights and reference data are loaded once by the parent and handed to each
+pool worker when it starts, so workers pay the import and setup cost once
+rather than once per match.
+"""
+
+import glob
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from ingest import NDJSON_SUFFIXES
+from instrument import recording, span
+from output import write_pack
+from ranking import compile_profile
+from reference import ReferenceData
+from workers import run_in_pool
+
+INPUT_SUFFIXES = (".json",) + NDJSON_SUFFIXES
+
+
+class BatchResult(NamedTuple):
+    """Outcome of building the pack for one input file."""
+
+    input_path: str
+    output_path: Optional[str]
+    seconds: float
+    pages: int
+    error: Optional[str] = None
+
+
+# Compiled weights, caches and validator of this worker process.
+_worker: Dict[str, Any] = {}
+
+
+def resolve_inputs(pattern: str) -> List[str]:
+    """
+    Expands a directory (all .json/.ndjson/.jsonl files in it) or a glob
+    pattern into a sorted list of match event files.
+    """
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name)
+            for name in os.listdir(pattern)
+            if name.endswith(INPUT_SUFFIXES)
+        )
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def _init_worker(
+    weights_data: Dict[str, Any], refs: ReferenceData, options: Dict[str, Any]
+) -> None:
+    from cache import CaptionCache
+    from matcher import AssetMatcher
+
+    # Compiled once per worker and shared by every pack it builds.
+    _worker["profile"] = compile_profile(weights_data)
+    _worker["refs"] = refs
+    if options["stub_llm"]:
+        from llm import ClientProvider, StubClient, set_provider
+
+        # Each worker process has its own provider.
+        set_provider(ClientProvider(client=StubClient()))
+    _worker["options"] = options
+    # Stub answers must never land under the keys real model calls use.
+    no_cache = options["no_cache"] or options["stub_llm"]
+    _worker["cache"] = None if no_cache else CaptionCache()
+    _worker["store"] = None
+    if options["event_store"]:
+        from store import EventStore
+
+        _worker["store"] = EventStore()
+    _worker["matcher"] = (
+        AssetMatcher.from_reference(refs) if options["asset_matcher"] == "local" else None
+    )
+    _worker["validator"] = None
+    if options["strict"]:
+        from validation import get_validator
+
+        # Compiled once per worker and reused for every pack it builds.
+        _worker["validator"] = get_validator(trusted=options["fast_validate"])
+
+
+def _build_one(input_path: str) -> BatchResult:
+    from main import createStoryPack
+
+    options = _worker["options"]
+    start = time.perf_counter()
+    try:
+        with recording() if options["profile"] else nullcontext():
+            story = createStoryPack(
+                caption_workers=options["workers"],
+                rate_limit=options["rate_limit"],
+                cache=_worker["cache"],
+                matcher=_worker["matcher"],
+                input_path=input_path,
+                stream=options["stream"],
+                weights_data=_worker["profile"],
+                refs=_worker["refs"],
+                batched_captions=options["batched_captions"],
+                event_store=_worker["store"],
+                near_duplicates=options["near_duplicates"],
+            )
+            if _worker["validator"] is not None:
+                with span("validate"):
+                    _worker["validator"].validate(story.model_dump(exclude_none=True))
+
+            stem = os.path.splitext(os.path.basename(input_path))[0]
+            with span("write"):
+                output_path = write_pack(
+                    os.path.join(options["output_dir"], f"{stem}.json"),
+                    story,
+                    compact=options["compact"],
+                    use_gzip=options["gzip"],
+                )
+    except (Exception, SystemExit) as e:
+        # createStoryPack reports bad input with exit(1); keep the batch going.
+        return BatchResult(input_path, None, time.perf_counter() - start, 0, repr(e))
+
+    return BatchResult(
+        input_path, output_path, time.perf_counter() - start, len(story.pages)
+    )
+
+
+def run_batch(
+    input_paths: List[str],
+    weights_data: Dict[str, Any],
+    refs: ReferenceData,
+    options: Dict[str, Any],
+    jobs: Optional[int] = None,
+) -> List[BatchResult]:
+    """
+    Builds and writes a pack for every input file over `jobs` processes (see
+    `workers.run_in_pool`). Results come back in input order.
+
+    `options` carries the per-pack CLI settings: workers, rate_limit,
+    no_cache, asset_matcher, stream, strict, fast_validate, compact, gzip,
+    profile (stage timings in each pack's metrics), batched_captions,
+    stub_llm, event_store, near_duplicates and output_dir.
+    """
+    os.makedirs(options["output_dir"], exist_ok=True)
+    init_args = (weights_data, refs, options)
+
+    results = run_in_pool(_build_one, input_paths, _init_worker, init_args, jobs)
+
+    if not (options["no_cache"] or options["stub_llm"]):
+        from cache import CaptionCache
+
+        # Once for the whole batch, after every worker has written its entries.
+        CaptionCache().prune()
+    return results
+
+
+def print_summary(results: List[BatchResult], wall_seconds: float) -> None:
+    """Prints a per-file timing table followed by batch totals."""
+    width = max([len(r.input_path) for r in results] + [5])
+    print(f"{'input':<{width}}  {'seconds':>8}  {'pages':>5}  result")
+    for r in results:
+        outcome = r.output_path if r.error is None else f"FAILED {r.error}"
+        print(f"{r.input_path:<{width}}  {r.seconds:>8.3f}  {r.pages:>5}  {outcome}")
+
+    failed = sum(r.error is not None for r in results)
+    busy = sum(r.seconds for r in results)
+    print(
+        f"{len(results)} files, {failed} failed, "
+        f"{busy:.3f}s of pack building in {wall_seconds:.3f}s wall time"
+    )
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the story pack pipeline.
+
+Run from the repository root, e.g. `python -m benchmarks.asset_matcher`.
+"""
@@ -0,0 +1,109 @@
+"""
+Compares the offline BM25 asset matcher with LLM asset picks.
+
+Latency is measured for the local matcher over every event in the match file.
+Agreement is measured against LLM picks: by default those recorded in a
+reference pack (`--reference`), or fresh ones with `--live` (needs
+GEMINI_API_KEY; responses go through the on-disk cache).
+
+    python -m benchmarks.asset_matcher [--reference out/story_pack.json] [--live]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from matcher import AssetMatcher
+from reference import get_reference_data
+
+INPUT_DATA = "data/match_events.json"
+REFERENCE_PACK = "out/story_pack.json"
+ASSET_RE = re.compile(r"assets/[\w.-]+\.(?:jpg|png)")
+
+
+def _normalise(pick: Optional[str]) -> Optional[str]:
+    # LLM replies sometimes wrap the filename in prose or markdown.
+    match = ASSET_RE.search(pick or "")
+    return match.group(0) if match else None
+
+
+def _recorded_picks(path: str, messages: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Maps event ids to the asset picked for them in a previously built pack."""
+    with open(path) as f:
+        pack = json.load(f)
+
+    picks = {}
+    for page in pack["pages"]:
+        if page["type"] != "highlight":
+            continue
+        for msg in messages:
+            first_sentence = msg.get("comment", "").split(".")[0]
+            if int(msg.get("minute", 0)) == page["minute"] and page[
+                "headline"
+            ].endswith(f"-- {first_sentence}"):
+                picks[msg["id"]] = _normalise(page.get("image"))
+    return picks
+
+
+def _live_picks(messages: List[Dict[str, Any]], refs) -> Dict[str, str]:
+    from cache import CaptionCache
+    from generate import _generate, asset_prompt, describe_event
+    from llm import get_provider
+
+    provider, cache = get_provider(), CaptionCache()
+    picks = {}
+    for msg in messages:
+        start = time.perf_counter()
+        pick = _generate(provider, asset_prompt(describe_event(msg, refs), refs), cache=cache)
+        print(f"  llm {msg['id']}: {time.perf_counter() - start:.3f}s")
+        picks[msg["id"]] = _normalise(pick)
+    return picks
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--input", default=INPUT_DATA)
+    parser.add_argument("--reference", default=REFERENCE_PACK)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.input) as f:
+        messages = json.load(f)["messages"][0]["message"]
+    refs = get_reference_data()
+
+    start = time.perf_counter()
+    matcher = AssetMatcher.from_reference(refs)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        local = {msg["id"]: matcher.match_event(msg, refs) for msg in messages}
+        timings.append((time.perf_counter() - start) / len(messages))
+
+    print(f"index build: {build_ms:.2f} ms over {len(refs.assets)} assets")
+    print(
+        f"local match: {statistics.median(timings) * 1e6:.1f} us/event "
+        f"(median of {args.repeat} passes over {len(messages)} events)"
+    )
+
+    if args.live:
+        candidates = [m for m in messages if m.get("playerRef1")]
+        llm = _live_picks(candidates, refs)
+    else:
+        llm = _recorded_picks(args.reference, messages)
+
+    compared = [(event_id, pick) for event_id, pick in llm.items() if pick]
+    agree = sum(local[event_id] == pick for event_id, pick in compared)
+    print(f"agreement with LLM picks: {agree}/{len(compared)}")
+    for event_id, pick in compared:
+        marker = "=" if local[event_id] == pick else "!"
+        print(f"  {marker} {event_id}: local={local[event_id]} llm={pick}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compares raw feed dicts with normalized `events.Event` records.
+
+For synthetic feeds of increasing size, reports:
+  - memory: tracemalloc size of the parsed message list vs the same events
+    as records (the dicts released)
+  - dicts: select_top_events over the dicts plus the headline fragments of
+    the selection, as getStoryData used to do per pack
+  - records: select_top_records over records normalized once
+  - normalize: the one-off cost of building the records
+
+    python -m benchmarks.events [--events 10000 100000 500000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+
+from benchmarks.synthetic import generate_match
+from events import normalize_events
+from ranking import select_top_events, select_top_records
+
+WEIGHTS_FILE = "weights.example.json"
+
+
+def make_feed(count: int, seed: int = 0) -> str:
+    """Returns a JSON array of `count` synthetic feed messages."""
+    return json.dumps(generate_match(count, seed)["messages"][0]["message"])
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(WEIGHTS_FILE) as f:
+        weights_data = json.load(f)
+
+    def dict_path(messages):
+        top = select_top_events(messages, weights_data)
+        return [msg.get("comment", "").split(".")[0] for msg in top]
+
+    def record_path(records):
+        top = select_top_records(records, weights_data)
+        return [event.headline_fragment for event in top]
+
+    print(
+        f"{'events':>7}  {'dict MB':>8}  {'record MB':>9}  {'dicts ms':>8}  "
+        f"{'records ms':>10}  {'normalize ms':>12}"
+    )
+    for count in args.events:
+        feed = make_feed(count)
+        messages, dict_bytes = _measure(lambda: json.loads(feed))
+        records, record_bytes = _measure(
+            lambda: list(normalize_events(json.loads(feed)))
+        )
+        assert dict_path(messages) == record_path(records)
+
+        dicts = min(timeit.repeat(lambda: dict_path(messages), number=1, repeat=args.repeat))
+        recs = min(timeit.repeat(lambda: record_path(records), number=1, repeat=args.repeat))
+        normalize = min(
+            timeit.repeat(lambda: list(normalize_events(messages)), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{count:>7}  {dict_bytes / 2**20:>8.1f}  {record_bytes / 2**20:>9.1f}  "
+            f"{dicts * 1000:>8.2f}  {recs * 1000:>10.2f}  {normalize * 1000:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Times each stage of the story pack pipeline on synthetic matches.
+
+For every size, a seeded synthetic match (benchmarks.synthetic) is written to
+a temporary directory and each stage is timed on its own, with
+`generate_caption` stubbed so no LLM is involved:
+
+  - ingest: loadMatchEvents + list of messages (JSON layout)
+  - ingest_stream: the same file through the incremental parser
+  - ingest_store: the same file from a warm compiled event store (needs NumPy)
+  - end_to_end_store: createStoryPack through that store
+  - score: iter_scored_events over every message
+  - select: select_top_events
+  - caption_stub: captionEvents with the stub (pipeline overhead only)
+  - build: buildPages (page model construction)
+  - assemble: assembleStoryPack (built pages are not validated again)
+  - assemble_validated: the same pack through the StoryPack constructor,
+    which validates every page again (the path assemble used to take)
+  - load_pack: StoryPack.model_validate of a dumped pack (external input)
+  - validate / validate_trusted: validate_pack, full and --fast-validate
+  - output: serialize_pack + write_pack
+  - end_to_end: createStoryPack for one file
+and, with --matches, end_to_end_batch: createStoryPack over that many files.
+
+Results are written as JSON (--output) so runs can be compared with
+--compare:
+
+    python -m benchmarks.pipeline [--messages 100 1000 10000 50000] [--matches 20]
+        [--max-pages N] [--repeat 5] [--output out/bench.json] [--compare old.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from benchmarks.synthetic import generate_files
+from events import to_event
+from ingest import stream_match_events
+from main import (
+    WEIGHTS_FILE,
+    assembleStoryPack,
+    buildPages,
+    captionEvents,
+    createStoryPack,
+    loadMatchEvents,
+)
+from models import StoryPack
+from output import serialize_pack, write_pack
+from ranking import compile_profile, iter_scored_events, select_top_events
+from store import EventStore
+from validation import validate_pack
+
+STUB_CAPTION = ("assets/placeholder.png", "A stubbed caption of a couple of sentences.")
+
+
+def _stub_caption(msg, *args, **kwargs):
+    return STUB_CAPTION
+
+
+def _time(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    # Page building prints per event; keep that out of the measurement output.
+    with contextlib.redirect_stdout(io.StringIO()):
+        times = timeit.repeat(func, number=1, repeat=repeat)
+    return {"min": min(times), "median": statistics.median(times)}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_suite(
+    sizes: List[int],
+    matches: int,
+    weights_data: Dict[str, Any],
+    repeat: int,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Returns one result row per (stage, messages)."""
+    profile = compile_profile(weights_data)
+    results = []
+
+    def record(stage: str, count: int, timing: Dict[str, float]) -> None:
+        results.append(
+            {
+                "stage": stage,
+                "messages": count,
+                "seconds_min": round(timing["min"], 6),
+                "seconds_median": round(timing["median"], 6),
+                "us_per_message": round(timing["min"] / max(count, 1) * 1e6, 3),
+            }
+        )
+        print(f"{stage:<18} {count:>7}  {timing['min'] * 1000:>10.3f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp, patch(
+        "main.generate_caption", _stub_caption
+    ):
+        for count in sizes:
+            path = generate_files(tmp, count, 1, seed)[0]
+            match_info, messages = loadMatchEvents(path)
+            messages = list(messages)
+
+            record("ingest", count, _time(lambda: list(loadMatchEvents(path)[1]), repeat))
+            record(
+                "ingest_stream",
+                count,
+                _time(lambda: list(stream_match_events(path)[1]), repeat),
+            )
+            try:
+                store = EventStore(os.path.join(tmp, "store"))
+            except ImportError:
+                store = None
+            if store is not None:
+                loadMatchEvents(path, store=store)  # compile outside the timing
+                record(
+                    "ingest_store",
+                    count,
+                    _time(lambda: loadMatchEvents(path, store=store), repeat),
+                )
+            record("score", count, _time(lambda: list(iter_scored_events(messages, profile)), repeat))
+            record("select", count, _time(lambda: select_top_events(messages, profile), repeat))
+
+            top = [to_event(msg) for msg in select_top_events(messages, profile)]
+            record("caption_stub", count, _time(lambda: captionEvents(top), repeat))
+            captions = captionEvents(top)
+            record("build", count, _time(lambda: buildPages(match_info, top, captions, profile), repeat))
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                pages, metrics = buildPages(match_info, top, captions, profile)
+            record(
+                "assemble",
+                count,
+                _time(lambda: assembleStoryPack(match_info, pages, metrics, source=path), repeat),
+            )
+            story = assembleStoryPack(match_info, pages, metrics, source=path)
+            fields = story.model_dump(exclude={"pages"})
+            record(
+                "assemble_validated",
+                count,
+                _time(lambda: StoryPack(pages=pages, **fields), repeat),
+            )
+            dumped = story.model_dump(exclude_none=True)
+            record("load_pack", count, _time(lambda: StoryPack.model_validate(dumped), repeat))
+            validate_pack(story)  # compile the validators outside the timing
+            validate_pack(story, trusted=True)
+            record("validate", count, _time(lambda: validate_pack(story), repeat))
+            record("validate_trusted", count, _time(lambda: validate_pack(story, trusted=True), repeat))
+
+            out_path = os.path.join(tmp, "story.json")
+            record(
+                "output",
+                count,
+                _time(lambda: write_pack(out_path, story, data=serialize_pack(story)), repeat),
+            )
+            record(
+                "end_to_end",
+                count,
+                _time(
+                    lambda: createStoryPack(input_path=path, weights_data=profile),
+                    repeat,
+                ),
+            )
+
+            if store is not None:
+                record(
+                    "end_to_end_store",
+                    count,
+                    _time(
+                        lambda: createStoryPack(
+                            input_path=path, weights_data=profile, event_store=store
+                        ),
+                        repeat,
+                    ),
+                )
+
+            if matches > 1:
+                paths = generate_files(os.path.join(tmp, "batch"), count, matches, seed)
+
+                def batch():
+                    for p in paths:
+                        createStoryPack(input_path=p, weights_data=profile)
+
+                record("end_to_end_batch", count * matches, _time(batch, max(1, repeat // 2)))
+
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Prints each stage's time relative to a previous results file."""
+    with open(baseline_path) as f:
+        baseline = {
+            (r["stage"], r["messages"]): r for r in json.load(f)["results"]
+        }
+    print(f"\n{'stage':<18} {'messages':>8}  {'before ms':>10} {'after ms':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r["stage"], r["messages"]))
+        if old is None:
+            continue
+        ratio = r["seconds_min"] / old["seconds_min"] if old["seconds_min"] else float("inf")
+        flag = "  <-- slower" if ratio > 1.2 else ""
+        print(
+            f"{r['stage']:<18} {r['messages']:>8}  {old['seconds_min'] * 1000:>10.3f} "
+            f"{r['seconds_min'] * 1000:>10.3f} {ratio:>6.2f}x{flag}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--max-pages", type=int, default=None,
+                        help="override max_pages to stress page building")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write results as JSON here")
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare with")
+    args = parser.parse_args()
+
+    with open(WEIGHTS_FILE) as f:
+        weights_data = json.load(f)
+    if args.max_pages is not None:
+        weights_data["max_pages"] = args.max_pages
+
+    start = time.perf_counter()
+    results = run_suite(args.messages, args.matches, weights_data, args.repeat, args.seed)
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "max_pages": weights_data["max_pages"],
+            "wall_seconds": round(time.perf_counter() - start, 3),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
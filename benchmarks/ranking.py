@@ -0,0 +1,62 @@
+"""
+Compares the pure Python and NumPy event ranking engines.
+
+For synthetic event sets of increasing size, reports time per weights
+configuration for:
+  - python: ranking.select_top_events over the message dicts
+  - numpy: ranking.select_top_indices over prebuilt EventColumns
+and, once per set, the cost of building the columns.
+
+    python -m benchmarks.ranking [--events 10000 100000 1000000] [--repeat 5]
+"""
+
+import argparse
+import json
+import timeit
+
+from benchmarks.synthetic import generate_match
+from ranking import (
+    EventColumns,
+    select_top_events,
+    select_top_indices,
+)
+
+WEIGHTS_FILE = "weights.example.json"
+
+
+def make_messages(count: int, seed: int = 0) -> list:
+    return generate_match(count, seed)["messages"][0]["message"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(WEIGHTS_FILE) as f:
+        weights_data = json.load(f)
+
+    print(f"{'events':>8}  {'columns ms':>10}  {'python ms':>9}  {'numpy ms':>8}  {'speedup':>7}")
+    for count in args.events:
+        messages = make_messages(count)
+        build = min(timeit.repeat(lambda: EventColumns(messages), number=1, repeat=args.repeat))
+        columns = EventColumns(messages)
+
+        expected = select_top_events(messages, weights_data)
+        assert [columns.messages[i] for i in select_top_indices(columns, weights_data)] == expected
+
+        python = min(
+            timeit.repeat(lambda: select_top_events(messages, weights_data), number=1, repeat=args.repeat)
+        )
+        vectorized = min(
+            timeit.repeat(lambda: select_top_indices(columns, weights_data), number=1, repeat=args.repeat)
+        )
+        print(
+            f"{count:>8}  {build * 1000:>10.2f}  {python * 1000:>9.2f}  "
+            f"{vectorized * 1000:>8.2f}  {python / vectorized:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
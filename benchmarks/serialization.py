@@ -0,0 +1,63 @@
+"""
+Compares StoryPack serialization throughput for large packs.
+
+  - legacy: model_dump + model_dump_json(indent=2) for printing + json.dump
+    (indent=2) to file, as main.py used to do
+  - indented / compact: a single model_dump_json via output.write_pack
+  - compact+gzip: the same, gzip-compressed
+
+    python -m benchmarks.serialization [--pages 1000 5000 20000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import timeit
+
+from benchmarks.validation import make_pack
+from models import StoryPack
+from output import write_pack
+
+
+def _legacy(story: StoryPack, path: str) -> None:
+    story_pack = story.model_dump(exclude_none=True)
+    story.model_dump_json(indent=2)
+    with open(path, "w") as out:
+        json.dump(story_pack, out, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "story.json")
+        cases = {
+            "legacy": lambda story: _legacy(story, path),
+            "indented": lambda story: write_pack(path, story),
+            "compact": lambda story: write_pack(path, story, compact=True),
+            "compact+gzip": lambda story: write_pack(path, story, compact=True, use_gzip=True),
+        }
+
+        print(f"{'pages':>6}  {'mode':<13} {'ms/pack':>9} {'MB/s':>8} {'bytes':>11}")
+        for pages in args.pages:
+            story = StoryPack.model_validate(make_pack(pages))
+            for name, write in cases.items():
+                seconds = min(timeit.repeat(lambda: write(story), number=1, repeat=args.repeat))
+                written = path + ".gz" if name.endswith("gzip") else path
+                size = os.path.getsize(written)
+                # Throughput is relative to the indented JSON size
+                # so modes are comparable.
+                if name == "legacy":
+                    baseline = size
+                print(
+                    f"{pages:>6}  {name:<13} {seconds * 1000:>9.2f} "
+                    f"{baseline / seconds / 1e6:>8.1f} {size:>11}"
+                )
+
+
+if __name__ == "__main__":
+    main()
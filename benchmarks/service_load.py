@@ -0,0 +1,164 @@
+"""
+Load generator for the story service (`main.py --serve`).
+
+Sends synthetic match documents (benchmarks.synthetic) to POST /packs from
+`--concurrency` client threads, each on its own keep-alive connection, and
+reports per-pack latency percentiles and throughput. Without --url or
+--socket a service is started in-process on a free port, with the offline
+stub model unless --live-llm is given:
+
+    python -m benchmarks.service_load [--messages 1000] [--matches 8]
+        [--requests 200] [--concurrency 8] [--url http://127.0.0.1:8080 | --socket PATH]
+        [--output out/service-load.json]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from benchmarks.synthetic import generate_match
+from service import UnixHTTPConnection, percentile
+
+Connect = Callable[[], http.client.HTTPConnection]
+
+
+def connector(url: Optional[str] = None, socket_path: Optional[str] = None) -> Connect:
+    """Returns a factory of connections to the service at `url` or `socket_path`."""
+    if socket_path:
+        return lambda: UnixHTTPConnection(socket_path)
+    parts = urlsplit(url or "http://127.0.0.1:8080")
+    return lambda: http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+
+
+def run_load(
+    connect: Connect,
+    bodies: List[bytes],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """
+    Sends `requests` packs round-robin over `bodies` from `concurrency`
+    threads and returns the client-side latency and throughput summary.
+    """
+    latencies: List[float] = []
+    errors: List[int] = []
+    next_request = iter(range(requests))
+    lock = threading.Lock()
+
+    def client() -> None:
+        conn = connect()
+        try:
+            while True:
+                with lock:
+                    i = next(next_request, None)
+                if i is None:
+                    return
+                body = bodies[i % len(bodies)]
+                start = time.perf_counter()
+                conn.request(
+                    "POST", "/packs", body, {"Content-Type": "application/json"}
+                )
+                response = conn.getresponse()
+                response.read()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if response.status != 200:
+                        errors.append(response.status)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def fetch_stats(connect: Connect) -> Dict[str, Any]:
+    """Returns the service's own /stats."""
+    conn = connect()
+    try:
+        conn.request("GET", "/stats")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--matches", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", default=None, help="a running service to load")
+    parser.add_argument("--socket", default=None, help="a running service's Unix socket")
+    parser.add_argument("--live-llm", action="store_true",
+                        help="in-process service only: use Gemini instead of the stub model")
+    parser.add_argument("--output", default=None, help="write the summary as JSON here")
+    args = parser.parse_args()
+
+    bodies = [
+        json.dumps(generate_match(args.messages, args.seed, n)).encode("utf-8")
+        for n in range(args.matches)
+    ]
+
+    server = None
+    if args.url or args.socket:
+        connect = connector(args.url, args.socket)
+    else:
+        from llm import ClientProvider, StubClient, set_provider
+        from main import loadWeights
+        from service import StoryService, make_server
+
+        if not args.live_llm:
+            set_provider(ClientProvider(client=StubClient()))
+        server = make_server(StoryService(loadWeights()), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        connect = connector("http://%s:%d" % server.server_address[:2])
+
+    try:
+        summary = run_load(connect, bodies, args.requests, args.concurrency)
+        summary["messages"] = args.messages
+        summary["service"] = fetch_stats(connect)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    print(
+        f"{summary['requests']} packs ({summary['errors']} errors) of "
+        f"{args.messages} messages at concurrency {args.concurrency}: "
+        f"{summary['throughput_rps']:.1f} packs/s, p50 {summary['p50_ms']:.1f} ms, "
+        f"p99 {summary['p99_ms']:.1f} ms"
+    )
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Seeded synthetic match event generator.
+
+Produces match files in the layout of `data/match_events.json` (see
+`data/events_schema.md`): event types drawn with the frequencies of the sample
+match, players and teams taken from the squad files so references resolve,
+and messages newest first like the real feed. The same seed always produces
+the same files.
+
+    python -m benchmarks.synthetic --messages 100 1000 --matches 3 --out-dir bench-data [--ndjson]
+"""
+
+import argparse
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+from reference import ReferenceData, get_reference_data
+
+# Event type frequencies of the sample match.
+TYPE_FREQUENCIES = {
+    "free kick lost": 17,
+    "free kick won": 17,
+    "corner": 15,
+    "substitution": 10,
+    "miss": 8,
+    "attempt blocked": 6,
+    "attempt saved": 4,
+    "yellow card": 4,
+    "goal": 3,
+    "offside": 3,
+    "added time": 2,
+    "post": 2,
+    "penalty goal": 1,
+    "penalty won": 1,
+    "penalty lost": 1,
+    "red card": 1,
+}
+
+COMMENTS = {
+    "goal": "Goal! {team_a} {a}, {team_b} {b}. {player} ({team}) right footed shot from the centre of the box.",
+    "penalty goal": "Goal! {team_a} {a}, {team_b} {b}. {player} ({team}) converts the penalty with a right footed shot.",
+    "penalty won": "{team} win a penalty. {player} draws a foul in the penalty area.",
+    "penalty lost": "Penalty conceded by {player} ({team}) after a foul in the penalty area.",
+    "attempt saved": "Attempt saved. {player} ({team}) right footed shot from outside the box is saved.",
+    "attempt blocked": "Attempt blocked. {player} ({team}) left footed shot from the centre of the box is blocked.",
+    "miss": "Attempt missed. {player} ({team}) header from the centre of the box misses to the left.",
+    "post": "{player} ({team}) hits the left post with a right footed shot from outside the box.",
+    "yellow card": "{player} ({team}) is shown the yellow card for a bad foul.",
+    "red card": "{player} ({team}) is shown the red card.",
+    "substitution": "Substitution, {team}. {player} replaces {other}.",
+    "corner": "Corner, {team}. Conceded by {other}.",
+    "offside": "Offside, {team}. {player} is caught offside.",
+    "free kick won": "{player} ({team}) wins a free kick in the defensive half.",
+    "free kick lost": "Foul by {player} ({team}).",
+    "added time": "Fourth official has announced {n} minutes of added time.",
+}
+
+
+def _squads(refs: ReferenceData) -> Dict[str, List[str]]:
+    squads: Dict[str, List[str]] = {team: [] for team in refs.teams}
+    for player, team in refs.player_team.items():
+        squads[team].append(player)
+    return squads
+
+
+def generate_match(
+    messages: int,
+    seed: int = 0,
+    match_index: int = 0,
+    refs: Optional[ReferenceData] = None,
+) -> Dict[str, Any]:
+    """
+    Returns a match document with `messages` events. Events are spread over
+    two periods of play; larger counts simply pack more events per minute.
+    """
+    if refs is None:
+        refs = get_reference_data()
+    rng = random.Random(f"{seed}:{match_index}")
+    squads = _squads(refs)
+    team_ids = sorted(squads)
+    home, away = team_ids[match_index % 2], team_ids[(match_index + 1) % 2]
+    names = {team: refs.team_name(team) for team in team_ids}
+
+    types = list(TYPE_FREQUENCIES)
+    weights = list(TYPE_FREQUENCIES.values())
+    score = {home: 0, away: 0}
+    events = []
+    for i in range(messages):
+        # Chronological position of this event in a 95 minute match.
+        minute = min(95, i * 96 // max(messages, 1))
+        period = 1 if minute < 46 else 2
+        msg_type = rng.choices(types, weights)[0]
+        team = rng.choice((home, away))
+        other_team = away if team == home else home
+        player = rng.choice(squads[team])
+        other = rng.choice(squads[other_team])
+        if msg_type in ("goal", "penalty goal"):
+            score[team] += 1
+
+        comment = COMMENTS[msg_type].format(
+            team_a=names[home],
+            team_b=names[away],
+            a=score[home],
+            b=score[away],
+            player=refs.player_name(player),
+            other=refs.player_name(other),
+            team=names[team],
+            n=rng.randint(1, 6),
+        )
+        second = rng.randint(0, 59)
+        event = {
+            "id": str(3000000000 + match_index * 10_000_000 + i),
+            "comment": comment,
+            "timestamp": f"2025-11-09T{16 + minute // 60:02d}:{minute % 60:02d}:{second:02d}Z",
+            "lastModified": f"2025-11-09T{16 + minute // 60:02d}:{minute % 60:02d}:{second:02d}Z",
+            "minute": str(minute),
+            "period": str(period),
+            "second": str(second),
+            "time": f"{minute + 1}'",
+            "type": msg_type,
+            "playerRef1": player,
+            "teamRef1": team,
+        }
+        if msg_type == "substitution":
+            event["playerRef2"] = rng.choice(squads[team])
+        elif msg_type == "corner":
+            event["teamRef2"] = other_team
+        events.append(event)
+
+    events.reverse()  # the feed lists the newest message first
+    match_id = f"synthetic-{seed}-{match_index}"
+    return {
+        "matchInfo": {
+            "id": match_id,
+            "date": "2025-11-09Z",
+            "time": "16:00:00Z",
+            "description": f"{names[home]} vs {names[away]}",
+            "contestant": [
+                {"id": home, "name": names[home], "position": "home"},
+                {"id": away, "name": names[away], "position": "away"},
+            ],
+        },
+        "messages": [{"language": "en", "message": events}],
+    }
+
+
+def write_match(path: str, match: Dict[str, Any]) -> str:
+    """Writes a match as JSON, or as NDJSON for .ndjson/.jsonl paths."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        if path.endswith((".ndjson", ".jsonl")):
+            f.write(json.dumps({"matchInfo": match["matchInfo"]}) + "\n")
+            for msg in match["messages"][0]["message"]:
+                f.write(json.dumps(msg) + "\n")
+        else:
+            json.dump(match, f)
+    return path
+
+
+def generate_files(
+    out_dir: str,
+    messages: int,
+    matches: int = 1,
+    seed: int = 0,
+    ndjson: bool = False,
+) -> List[str]:
+    """Writes `matches` match files of `messages` events and returns their paths."""
+    suffix = ".ndjson" if ndjson else ".json"
+    return [
+        write_match(
+            os.path.join(out_dir, f"match-{messages}-{n:04d}{suffix}"),
+            generate_match(messages, seed, n),
+        )
+        for n in range(matches)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, nargs="+", default=[100])
+    parser.add_argument("--matches", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="bench-data")
+    parser.add_argument("--ndjson", action="store_true")
+    args = parser.parse_args()
+
+    for count in args.messages:
+        paths = generate_files(args.out_dir, count, args.matches, args.seed, args.ndjson)
+        print(f"{len(paths)} files of {count} messages in {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
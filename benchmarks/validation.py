@@ -0,0 +1,74 @@
+"""
+Compares time spent in pydantic model checks with jsonschema checks.
+
+For packs of increasing size, reports per-pack time for:
+  - pydantic: StoryPack.model_validate on the pack dict
+  - schema (fresh): building a Draft202012Validator and validating, as every
+    --strict run used to
+  - schema (cached): the process-wide compiled validator
+  - schema (trusted): the reduced schema used with --fast-validate
+
+    python -m benchmarks.validation [--pages 10 100 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import timeit
+
+from jsonschema import Draft202012Validator
+
+from models import StoryPack
+from validation import SCHEMA_DEFINITION, get_validator
+
+
+def make_pack(pages: int) -> dict:
+    """Returns a valid pack dict with one cover and `pages` highlight pages."""
+    return {
+        "pack_id": "bench",
+        "title": "Benchmark pack",
+        "source": "data/match_events.json",
+        "created_at": "2025-11-09T16:00:00+00:00",
+        "metrics": {"goals": 0, "highlights": pages},
+        "pages": [{"type": "cover", "headline": "Cover", "image": "assets/placeholder.png"}]
+        + [
+            {
+                "type": "highlight",
+                "minute": i % 90,
+                "headline": f"{i % 90}' CHANCE! -- Attempt {i}",
+                "caption": "A caption of a couple of sentences. " * 3,
+                "image": "assets/placeholder.png",
+            }
+            for i in range(pages)
+        ],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(SCHEMA_DEFINITION) as f:
+        schema = json.load(f)
+    cached, trusted = get_validator(), get_validator(trusted=True)
+
+    cases = {
+        "pydantic": lambda pack: StoryPack.model_validate(pack),
+        "schema (fresh)": lambda pack: Draft202012Validator(schema).validate(pack),
+        "schema (cached)": lambda pack: cached.validate(pack),
+        "schema (trusted)": lambda pack: trusted.validate(pack),
+    }
+
+    print(f"{'pages':>6}  " + "  ".join(f"{name:>17}" for name in cases))
+    for pages in args.pages:
+        pack = make_pack(pages)
+        row = []
+        for check in cases.values():
+            seconds = min(timeit.repeat(lambda: check(pack), number=1, repeat=args.repeat))
+            row.append(f"{seconds * 1000:>14.3f} ms")
+        print(f"{pages:>6}  " + "  ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+
+Entries are keyed by a SHA-256 of everything that determines a response (model
+name, system prompt and request contents), so reruns over unchanged events,
+squads and assets are answered from disk without any API calls.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from instrument import count
+
+CACHE_DIR = ".cache/llm"
+CACHE_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+# Minimum seconds between prunes by long-running modes (service, live).
+PRUNE_INTERVAL = 300.0
+
+
+class CaptionCache:
+    """
+    On-disk cache of model responses, one JSON file per entry.
+
+    Attributes:
+        directory (str): Root folder for cache entries.
+        max_age (Optional[float]): Entries older than this many seconds are ignored and pruned.
+        max_bytes (Optional[int]): Oldest entries are pruned once the cache grows past this size.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that required a model call.
+    """
+
+    def __init__(
+        self,
+        directory: str = CACHE_DIR,
+        max_age: Optional[float] = CACHE_MAX_AGE,
+        max_bytes: Optional[int] = CACHE_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._last_prune = float("-inf")
+
+    @staticmethod
+    def key(model: str, system_prompt: str, contents: str) -> str:
+        """Returns the content hash identifying a single model request."""
+        payload = json.dumps(
+            {"model": model, "system": system_prompt, "contents": contents},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _is_fresh(self, path: str) -> bool:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return False
+        return self.max_age is None or time.time() - mtime <= self.max_age
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response text for `key`, or None on a miss."""
+        path = self._path(key)
+        text = None
+        if self._is_fresh(path):
+            try:
+                with open(path) as f:
+                    text = json.load(f)["text"]
+                os.utime(path)
+            except (OSError, ValueError, KeyError):
+                text = None
+
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        count("cache_misses" if text is None else "cache_hits")
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Stores `text` under `key`, replacing the entry atomically."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"text": text}, f)
+        os.replace(tmp_path, path)
+
+    def prune(self) -> int:
+        """
+        Removes expired entries, then the least recently used ones until the
+        cache fits in `max_bytes`. Returns the number of entries removed.
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        removed = 0
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, path in sorted(entries):
+            expired = self.max_age is not None and now - mtime > self.max_age
+            oversized = self.max_bytes is not None and total > self.max_bytes
+            if not (expired or oversized):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def maybe_prune(self, interval: float = PRUNE_INTERVAL) -> int:
+        """
+        Prunes unless this cache was pruned less than `interval` seconds ago;
+        the first call always prunes. Returns the number of entries removed.
+        """
+        now = time.monotonic()
+        # One caller at a time claims the prune; the others skip it.
+        with self._lock:
+            if now - self._last_prune < interval:
+                return 0
+            self._last_prune = now
+        return self.prune()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit/miss counters in the shape used by StoryPack.metrics."""
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
@@ -17,6 +17,24 @@ def build_parser():
         action="store_true"
     )
 
+    parser.add_argument(
+        "--fast-validate",
+        help="with --strict, only run the schema checks the pydantic models do not already enforce",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--input",
+        "-i",
+        help="Match events file, .json or .ndjson (default: data/match_events.json)",
+        default="data/match_events.json"
+    )
+    parser.add_argument(
+        "--stream",
+        help="parse match events incrementally instead of loading the whole file (always on for .ndjson)",
+        action="store_true"
+    )
+
     parser.add_argument(
         "--output",
         "-o",
@@ -24,6 +42,178 @@ def build_parser():
         default="out/story.json"
     )
 
+    parser.add_argument(
+        "--compact",
+        help="write JSON without indentation",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--gzip",
+        help="gzip the output pack (appends .gz to the output path)",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--shard-size",
+        help="write --output as a manifest (cover and page index) plus page shards of this many pages, "
+        "for large packs (single runs only); the preview loads shards on demand",
+        metavar="PAGES",
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        "--near-duplicates",
+        help="events repeating another's type, period, minute, second, player and team are dropped; "
+        "this decides events that differ only in comment: drop them too, or keep them (default: drop)",
+        choices=["drop", "keep"],
+        default="drop"
+    )
+    parser.add_argument(
+        "--event-store",
+        help="read match files through a compiled columnar copy under .cache/events, rebuilt only when the file changes (needs numpy)",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--watch",
+        help="keep running and rewrite --output as new events are appended to --input "
+             "(NDJSON input is tailed; a JSON document is re-parsed in full on every change)",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--interval",
+        help="seconds between input checks in --watch mode (default: 0.5)",
+        type=float,
+        default=0.5
+    )
+
+    parser.add_argument(
+        "--serve",
+        help="run the story service: build packs for match documents POSTed to /packs, keeping state warm between requests",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--host",
+        help="address for --serve to listen on (default: 127.0.0.1)",
+        default="127.0.0.1"
+    )
+    parser.add_argument(
+        "--port",
+        help="port for --serve to listen on (default: 8080)",
+        type=int,
+        default=8080
+    )
+    parser.add_argument(
+        "--socket",
+        help="listen on this Unix socket instead of --host/--port",
+        metavar="PATH",
+        default=None
+    )
+
+    parser.add_argument(
+        "--batch",
+        help="build one pack per match event file in this directory or glob pattern",
+        metavar="PATH_OR_GLOB",
+        default=None
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Output directory for --batch packs (default: out)",
+        default="out"
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        help="worker processes for --batch, --sweep and --evaluate (default: one per CPU)",
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        "--sweep",
+        help="rank --input under every weights configuration in this sweep spec and report the selections, without captions",
+        metavar="SPEC",
+        default=None
+    )
+    parser.add_argument(
+        "--samples",
+        help="with --sweep, evaluate this many random configurations from the grid instead of all of them",
+        type=int,
+        default=None
+    )
+    parser.add_argument(
+        "--seed",
+        help="random seed for --samples (default: 0)",
+        type=int,
+        default=0
+    )
+    parser.add_argument(
+        "--sweep-report",
+        help="write the full --sweep report as JSON to this path",
+        default=None
+    )
+
+    parser.add_argument(
+        "--evaluate",
+        help="check the highlight captions of the packs in this directory or glob pattern against their source events "
+        "(minute, players and teams) and report per-pack accuracy",
+        metavar="PATH_OR_GLOB",
+        default=None
+    )
+    parser.add_argument(
+        "--evaluate-report",
+        help="write the full --evaluate report as JSON to this path",
+        default=None
+    )
+
+    parser.add_argument(
+        "--workers",
+        "-w",
+        help="concurrent LLM requests for captions and assets (default: 1, sequential)",
+        type=int,
+        default=1
+    )
+    parser.add_argument(
+        "--rate-limit",
+        help="maximum LLM requests per second across all workers (default: unlimited)",
+        type=float,
+        default=None
+    )
+    parser.add_argument(
+        "--asset-matcher",
+        help="pick images with the LLM, or with the offline BM25 index falling back to the LLM (default: llm)",
+        choices=["llm", "local"],
+        default="llm"
+    )
+    parser.add_argument(
+        "--batched-captions",
+        help="caption all selected events with one structured LLM request, falling back to per-event requests for any it leaves out",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--stub-llm",
+        help="use an offline stub model with canned answers instead of Gemini (for testing); implies --no-cache",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="always call the LLM, bypassing the on-disk response cache",
+        action="store_true"
+    )
+
+    parser.add_argument(
+        "--profile",
+        help="print a per-stage timing breakdown and add the stage timings to the pack metrics",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--profile-dump",
+        help="also write cProfile statistics for the run to this file (view with python -m pstats)",
+        metavar="PATH",
+        default=None
+    )
+
     return parser
 
 def get_args():
@@ -0,0 +1,177 @@
+"""
+Duplicate event removal.
+
+Overlapping feeds and re-sent messages repeat events, which would otherwise
+become duplicate pages. An event is identified by its (type, period, minute,
+second, playerRef1, teamRef1) and the first occurrence in input order is
+kept. Events that share an identity but not their comment (a commentary line
+that was corrected or reworded) are near-duplicates: they are dropped as well
+under the "drop" rule and kept under "keep", which only drops exact repeats.
+
+The index is a dict keyed by identity, so filtering is linear. With a
+`window`, only the most recent identities are remembered, which bounds memory
+in streaming and live mode (duplicates arrive close together in a feed).
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from events import Event
+from ranking import int_or_zero
+
+NEAR_DUPLICATE_RULES = ("drop", "keep")
+# Identities remembered in streaming and live mode.
+DEFAULT_WINDOW = 65536
+
+
+def event_identity(msg: Any) -> Tuple[Any, ...]:
+    """Returns the normalized identity of a feed message or `Event`."""
+    if isinstance(msg, Event):
+        return (msg.type, msg.period, msg.minute, msg.second, msg.playerRef1, msg.teamRef1)
+    get = msg.get
+    try:
+        return (
+            get("type", ""),
+            int(get("period", 0)),
+            int(get("minute", 0)),
+            int(get("second", 0)),
+            get("playerRef1"),
+            get("teamRef1"),
+        )
+    except (TypeError, ValueError):
+        return (
+            get("type", ""),
+            int_or_zero(get("period", 0)),
+            int_or_zero(get("minute", 0)),
+            int_or_zero(get("second", 0)),
+            get("playerRef1"),
+            get("teamRef1"),
+        )
+
+
+class Deduplicator:
+    """
+    Drops repeated events from a message stream.
+
+    Attributes:
+        near_duplicates (str): "drop" or "keep" (see module docstring).
+        window (Optional[int]): Number of identities remembered; None for all.
+        duplicates (int): Exact repeats dropped so far.
+        near_duplicates_dropped (int): Near-duplicates dropped so far.
+    """
+
+    def __init__(self, near_duplicates: str = "drop", window: Optional[int] = None) -> None:
+        if near_duplicates not in NEAR_DUPLICATE_RULES:
+            raise ValueError(f"Unknown near-duplicate rule: {near_duplicates!r}")
+        self.near_duplicates = near_duplicates
+        self.window = window
+        self.duplicates = 0
+        self.near_duplicates_dropped = 0
+        # identity -> comment (a set once several were seen), oldest first.
+        self._seen: Dict[Tuple[Any, ...], Any] = {}
+
+    def is_duplicate(self, msg: Any) -> bool:
+        """Records `msg` and returns whether it repeats an earlier event."""
+        key = event_identity(msg)
+        if key not in self._seen:
+            self._add(key, msg.get("comment") or "")
+            return False
+        return self._repeats(key, msg.get("comment") or "")
+
+    def _add(self, key: Tuple[Any, ...], comment: str) -> None:
+        self._seen[key] = comment
+        if self.window is not None and len(self._seen) > self.window:
+            del self._seen[next(iter(self._seen))]
+
+    def _repeats(self, key: Tuple[Any, ...], comment: str) -> bool:
+        comments = self._seen[key]
+        if comment == comments or (type(comments) is set and comment in comments):
+            self.duplicates += 1
+            return True
+        # A new comment for a known identity; repeats of it count as exact.
+        if type(comments) is not set:
+            comments = self._seen[key] = {comments}
+        comments.add(comment)
+        if self.near_duplicates == "drop":
+            self.near_duplicates_dropped += 1
+            return True
+        return False
+
+    def filter(self, messages: Iterable[Any]) -> Iterator[Any]:
+        """Lazily yields the messages that are not duplicates."""
+        # is_duplicate, inlined for the common case of a new identity.
+        seen, window, repeats = self._seen, self.window, self._repeats
+        for msg in messages:
+            key = event_identity(msg)
+            if key not in seen:
+                seen[key] = msg.get("comment") or ""
+                if window is not None and len(seen) > window:
+                    del seen[next(iter(seen))]
+                yield msg
+            elif not repeats(key, msg.get("comment") or ""):
+                yield msg
+
+    def metrics(self) -> Dict[str, int]:
+        """Dropped counts, as reported in StoryPack.metrics."""
+        return {
+            "duplicates_dropped": self.duplicates,
+            "near_duplicates_dropped": self.near_duplicates_dropped,
+        }
+
+
+def first_occurrences(rows: Any, near_duplicates: str = "drop") -> Tuple[Any, Dict[str, int]]:
+    """
+    Columnar form of `Deduplicator` for a whole event set: `rows` is an
+    (n, 7) integer array of the identity fields followed by a comment code
+    (equal values for equal strings). Returns the indices of the events to
+    keep, ascending, and the dropped counts.
+    """
+    import numpy as np
+
+    if near_duplicates not in NEAR_DUPLICATE_RULES:
+        raise ValueError(f"Unknown near-duplicate rule: {near_duplicates!r}")
+    n = len(rows)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp), {"duplicates_dropped": 0, "near_duplicates_dropped": 0}
+
+    identity = _row_keys(rows[:, :6])
+    # The identity is the high part of the pair key, so sorting by pair also
+    # groups each identity's rows together.
+    pairs = _row_keys(np.column_stack([identity, rows[:, 6]]))
+    order = np.argsort(pairs, kind="stable")
+    sorted_pairs, sorted_identity = pairs[order], identity[order]
+
+    pair_starts = np.ones(n, dtype=bool)
+    pair_starts[1:] = sorted_pairs[1:] != sorted_pairs[:-1]
+    first_pairs = np.sort(order[pair_starts])
+    if near_duplicates == "keep":
+        keep = first_pairs
+        near = 0
+    else:
+        identity_starts = np.ones(n, dtype=bool)
+        identity_starts[1:] = sorted_identity[1:] != sorted_identity[:-1]
+        # Earliest row of each identity, whichever comment it has.
+        keep = np.sort(np.minimum.reduceat(order, np.flatnonzero(identity_starts)))
+        near = len(first_pairs) - len(keep)
+    return keep, {"duplicates_dropped": n - len(first_pairs), "near_duplicates_dropped": near}
+
+
+def _row_keys(rows: Any) -> Any:
+    # One int64 per row, equal exactly for equal rows: the columns are offset
+    # to start at 0 and combined in mixed radix. When the combined range would
+    # overflow, the keys so far are first renumbered densely (in order).
+    import numpy as np
+
+    key = np.zeros(len(rows), dtype=np.int64)
+    size = 1
+    for column in rows.T:
+        low = int(column.min())
+        radix = int(column.max()) - low + 1
+        if radix >= 1 << 31:
+            _, column = np.unique(column, return_inverse=True)
+            low, radix = 0, int(column.max()) + 1
+        if size * radix >= 1 << 62:
+            _, key = np.unique(key, return_inverse=True)
+            size = int(key.max()) + 1
+        key = key * radix + (column - low)
+        size *= radix
+    return key
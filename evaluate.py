@@ -0,0 +1,376 @@
+"""
+Factual-consistency evaluation of generated captions.
+
+Every HighlightPage of a pack is matched back to its source event, by minute
+and the comment fragment in its headline, and its caption is checked against
+that event:
+  - a minute the caption mentions is the event's minute (or its displayed
+    match time);
+  - the event's main player is named, and every player named is one of the
+    event's players or named in its commentary;
+  - every team named is a contestant of the match.
+Players and teams are recognized through a `NameIndex` built once from the
+squad files: one compiled pattern over every name variant, mapping each
+variant to the ids it can refer to.
+
+Many packs are evaluated over the process pool of `workers.run_in_pool`: the
+reference data is handed to each worker when it starts and the index is built
+there once.
+"""
+
+import glob
+import gzip
+import json
+import os
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from events import Event, normalize_events
+from output import GZIP_SUFFIX, SHARD_FORMAT, read_sharded_pack
+from reference import ReferenceData
+from workers import run_in_pool
+
+PACK_SUFFIXES = (".json", ".json" + GZIP_SUFFIX)
+SHARD_RE = re.compile(r"\.pages-\d{4,}\.json$")
+# "84'", "85th minute", "90+2'", "45 + 1 minute", and the feed's own "90'+2'"
+MINUTE_RE = re.compile(
+    r"(?<![\d.])(\d{1,3})(?:['’]?\s*\+\s*(\d{1,2}))?(?:['’]|(?:st|nd|rd|th)?[\s-]minute)"
+)
+# Name variants shorter than this are too ambiguous to look for.
+MIN_NAME_LENGTH = 3
+
+
+def _fold(text: str) -> str:
+    # Accents are dropped so "Tomás" in a squad file matches "Tomas".
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+class NameIndex:
+    """
+    Player and team names from the squad files, compiled for lookup in text.
+
+    Attributes:
+        players (Dict[str, FrozenSet[str]]): Player ids keyed by name variant
+            (full name, short name, match name, last name); a shared last
+            name maps to several ids.
+        teams (Dict[str, FrozenSet[str]]): Contestant ids keyed by team name
+            variant.
+        player_names (Dict[str, str]): 'First Last' keyed by player id.
+    """
+
+    def __init__(self, refs: ReferenceData) -> None:
+        self.player_names = {
+            player_id: refs.player_name(player_id) for player_id in refs.players
+        }
+        players: Dict[str, Set[str]] = {}
+        teams: Dict[str, Set[str]] = {}
+        for player_id, person in refs.players.items():
+            for variant in (
+                f"{person.get('firstName', '')} {person.get('lastName', '')}",
+                f"{person.get('shortFirstName', '')} {person.get('shortLastName', '')}",
+                person.get("matchName"),
+                person.get("knownName"),
+                person.get("lastName"),
+                person.get("shortLastName"),
+            ):
+                self._add(players, variant, player_id)
+        for contestant_id, squad in refs.teams.items():
+            for variant in (
+                squad.get("contestantName"),
+                squad.get("contestantShortName"),
+                squad.get("contestantClubName"),
+            ):
+                self._add(teams, variant, contestant_id)
+
+        self.players = {name: frozenset(ids) for name, ids in players.items()}
+        self.teams = {name: frozenset(ids) for name, ids in teams.items()}
+        # Longest first, so "Johnny Kenny" is found rather than "Kenny".
+        names = sorted(set(self.players) | set(self.teams), key=lambda n: (-len(n), n))
+        self._pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(map(re.escape, names)) + r")(?!\w)" if names else r"(?!)"
+        )
+
+    @classmethod
+    def from_reference(cls, refs: ReferenceData) -> "NameIndex":
+        return cls(refs)
+
+    @staticmethod
+    def _add(index: Dict[str, Set[str]], variant: Optional[str], ident: str) -> None:
+        if variant:
+            variant = _fold(" ".join(variant.split()))
+            if len(variant) >= MIN_NAME_LENGTH:
+                index.setdefault(variant, set()).add(ident)
+
+    def mentions(
+        self, text: str
+    ) -> Tuple[List[Tuple[str, FrozenSet[str]]], List[Tuple[str, FrozenSet[str]]]]:
+        """
+        Returns the (name, candidate ids) of the players and of the teams
+        named in `text`, in order of appearance.
+        """
+        players, teams = [], []
+        for match in self._pattern.finditer(_fold(text)):
+            name = match.group()
+            if name in self.players:
+                players.append((name, self.players[name]))
+            if name in self.teams:
+                teams.append((name, self.teams[name]))
+        return players, teams
+
+
+def _allowed_minutes(event: Event) -> FrozenSet[int]:
+    # Feed minutes count from 0 while the displayed time ("85'", "90+2'")
+    # counts from 1; captions may use either.
+    allowed = {event.minute, event.minute + 1}
+    match = MINUTE_RE.search(event.time or "")
+    if match:
+        allowed.add(int(match.group(1)) + int(match.group(2) or 0))
+    return frozenset(allowed)
+
+
+def check_caption(
+    caption: str, event: Event, index: NameIndex, match_teams: FrozenSet[str]
+) -> List[str]:
+    """Returns the factual problems of `caption` for `event`; empty when consistent."""
+    issues = []
+    allowed = _allowed_minutes(event)
+    for match in MINUTE_RE.finditer(caption):
+        minute = int(match.group(1)) + int(match.group(2) or 0)
+        if minute not in allowed:
+            issues.append(f"minute {match.group().strip()} but the event is at {event.minute}")
+
+    players, teams = index.mentions(caption)
+    event_players = {ref for ref in (event.playerRef1, event.playerRef2) if ref}
+    # The feed's own commentary can name others (e.g. the saving keeper).
+    for _, ids in index.mentions(event.comment or "")[0]:
+        event_players |= ids
+    named: Set[str] = set()
+    for name, ids in players:
+        if ids.isdisjoint(event_players):
+            issues.append(f"names {name}, who is not in the event")
+        named |= ids
+    main_player = event.playerRef1
+    if main_player in index.player_names and main_player not in named:
+        issues.append(f"does not name the event's player ({index.player_names[main_player]})")
+
+    event_teams = {ref for ref in (event.teamRef1, event.teamRef2) if ref}
+    for name, ids in teams:
+        if ids.isdisjoint(match_teams | event_teams):
+            issues.append(f"names {name}, who is not in the match")
+    return issues
+
+
+class PackEvaluation(NamedTuple):
+    """Outcome of checking the captions of one pack."""
+
+    pack_path: str
+    source: Optional[str]
+    seconds: float
+    captions: int
+    consistent: int
+    issues: Tuple[Tuple[int, str], ...] = ()
+    error: Optional[str] = None
+
+    @property
+    def accuracy(self) -> Optional[float]:
+        """Share of captions without issues; None for a pack without captions."""
+        return self.consistent / self.captions if self.captions else None
+
+
+# The name index and source override of this worker process.
+_worker: Dict[str, Any] = {}
+
+
+def _is_pack(path: str) -> bool:
+    # Reports, sweep results and other JSON that happens to sit next to the
+    # packs are not evaluated; unreadable files are, so they show as failures.
+    opener = gzip.open if path.endswith(GZIP_SUFFIX) else open
+    try:
+        with opener(path, "rt", encoding="utf-8") as f:
+            document = json.load(f)
+    except (OSError, ValueError):
+        return True
+    return isinstance(document, dict) and (
+        "pages" in document or document.get("format") == SHARD_FORMAT
+    )
+
+
+def resolve_packs(pattern: str) -> List[str]:
+    """
+    Expands a directory (all .json/.json.gz packs in it) or a glob pattern
+    into a sorted list of pack files. Page shards of sharded packs are left
+    out, since their manifest stands for the pack, and so is JSON that is not
+    a pack (no `pages` and not a shard manifest).
+    """
+    if os.path.isdir(pattern):
+        paths = (os.path.join(pattern, name) for name in os.listdir(pattern))
+        paths = (path for path in paths if path.endswith(PACK_SUFFIXES))
+    else:
+        paths = glob.glob(pattern)
+    return sorted(
+        path for path in paths
+        if os.path.isfile(path) and not SHARD_RE.search(path) and _is_pack(path)
+    )
+
+
+def load_pack(path: str) -> Dict[str, Any]:
+    """Reads a plain, gzipped or sharded pack as a dict."""
+    opener = gzip.open if path.endswith(GZIP_SUFFIX) else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        pack = json.load(f)
+    if pack.get("format") == SHARD_FORMAT:
+        return read_sharded_pack(path).model_dump(mode="json", exclude_none=True)
+    return pack
+
+
+@lru_cache(maxsize=16)
+def _source_events(
+    source: str,
+) -> Tuple[FrozenSet[str], Dict[Tuple[int, str], List[Event]]]:
+    # Packs of one match share a source; keep the last few indexed.
+    from main import loadMatchEvents
+
+    match_info, messages = loadMatchEvents(source)
+    match_teams = frozenset(
+        c["id"] for c in match_info.get("contestant", []) if c.get("id")
+    )
+    events: Dict[Tuple[int, str], List[Event]] = {}
+    for event in normalize_events(messages):
+        events.setdefault((event.minute, event.headline_fragment), []).append(event)
+    return match_teams, events
+
+
+def _headline_fragment(headline: str) -> str:
+    # Highlight headlines are "<minute>' <LABEL> -- <fragment>".
+    _, _, fragment = headline.partition(" -- ")
+    return fragment
+
+
+def evaluate_pack(
+    pack: Dict[str, Any], source: str, index: NameIndex
+) -> Tuple[int, int, List[Tuple[int, str]]]:
+    """
+    Checks every highlight caption of `pack` against the events of `source`.
+    Returns (captions, consistent captions, [(page number, issue), ...]).
+    """
+    match_teams, events = _source_events(source)
+    captions = consistent = 0
+    issues: List[Tuple[int, str]] = []
+    for number, page in enumerate(pack["pages"]):
+        if page.get("type") != "highlight":
+            continue
+        captions += 1
+        candidates = events.get((page["minute"], _headline_fragment(page["headline"])))
+        if not candidates:
+            issues.append((number, f"no source event at minute {page['minute']} for this headline"))
+            continue
+        # Identical events repeat the same facts; any of them may be the one.
+        found = [check_caption(page["caption"], event, index, match_teams) for event in candidates]
+        best = min(found, key=len)
+        if best:
+            issues.extend((number, issue) for issue in best)
+        else:
+            consistent += 1
+    return captions, consistent, issues
+
+
+def _init_worker(refs: ReferenceData, source: Optional[str]) -> None:
+    # Built once per worker and shared by every pack it checks.
+    _worker["index"] = NameIndex.from_reference(refs)
+    _worker["source"] = source
+
+
+def _evaluate_one(pack_path: str) -> PackEvaluation:
+    start = time.perf_counter()
+    source = _worker["source"]
+    try:
+        pack = load_pack(pack_path)
+        source = source or pack.get("source")
+        if not source:
+            raise ValueError("pack has no source")
+        captions, consistent, issues = evaluate_pack(pack, source, _worker["index"])
+    except (Exception, SystemExit) as e:
+        # loadMatchEvents reports bad input with exit(1); keep evaluating.
+        return PackEvaluation(
+            pack_path, source, time.perf_counter() - start, 0, 0, error=repr(e)
+        )
+    return PackEvaluation(
+        pack_path, source, time.perf_counter() - start, captions, consistent, tuple(issues)
+    )
+
+
+def run_evaluation(
+    pack_paths: List[str],
+    refs: ReferenceData,
+    source: Optional[str] = None,
+    jobs: Optional[int] = None,
+) -> List[PackEvaluation]:
+    """
+    Checks every pack's captions against its source events (the pack's
+    `source`, or `source` for all of them) over `jobs` processes (see
+    `workers.run_in_pool`). Results come back in input order.
+    """
+    init_args = (refs, source)
+
+    workers = jobs or os.cpu_count() or 1
+    # Packs are quick to check, so hand them out in chunks.
+    chunksize = max(1, len(pack_paths) // (workers * 4))
+    return run_in_pool(_evaluate_one, pack_paths, _init_worker, init_args, workers, chunksize)
+
+
+def build_report(results: List[PackEvaluation], wall_seconds: float) -> Dict[str, Any]:
+    """Per-pack accuracy and issues plus totals and throughput, as JSON data."""
+    captions = sum(r.captions for r in results)
+    consistent = sum(r.consistent for r in results)
+    return {
+        "packs": [
+            {
+                "pack": r.pack_path,
+                "source": r.source,
+                "captions": r.captions,
+                "consistent": r.consistent,
+                "accuracy": r.accuracy,
+                "seconds": r.seconds,
+                "issues": [{"page": page, "issue": issue} for page, issue in r.issues],
+                "error": r.error,
+            }
+            for r in results
+        ],
+        "totals": {
+            "packs": len(results),
+            "failed": sum(r.error is not None for r in results),
+            "captions": captions,
+            "consistent": consistent,
+            "accuracy": consistent / captions if captions else None,
+            "wall_seconds": wall_seconds,
+            "packs_per_second": len(results) / wall_seconds if wall_seconds else None,
+            "captions_per_second": captions / wall_seconds if wall_seconds else None,
+        },
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Prints a per-pack accuracy table with its issues, then the totals."""
+    packs = report["packs"]
+    width = max([len(p["pack"]) for p in packs] + [4])
+    print(f"{'pack':<{width}}  {'captions':>8}  {'accuracy':>8}  result")
+    for p in packs:
+        accuracy = "-" if p["accuracy"] is None else f"{p['accuracy']:.1%}"
+        outcome = "ok" if p["error"] is None else f"FAILED {p['error']}"
+        print(f"{p['pack']:<{width}}  {p['captions']:>8}  {accuracy:>8}  {outcome}")
+        for issue in p["issues"]:
+            print(f"{'':<{width}}    page {issue['page']}: {issue['issue']}")
+
+    totals = report["totals"]
+    accuracy = "-" if totals["accuracy"] is None else f"{totals['accuracy']:.1%}"
+    print(
+        f"{totals['packs']} packs, {totals['failed']} failed, "
+        f"{totals['consistent']}/{totals['captions']} captions consistent ({accuracy}) "
+        f"in {totals['wall_seconds']:.3f}s wall time "
+        f"({totals['packs_per_second'] or 0:.1f} packs/s, "
+        f"{totals['captions_per_second'] or 0:.1f} captions/s)"
+    )
@@ -0,0 +1,95 @@
+"""
+Compact event records.
+
+Feed messages are normalized once, as they are ingested, into `Event` tuples:
+numeric fields are converted to ints, the type and weight key are interned and
+the headline fragment is split off the comment up front, so scoring and page
+building read attributes instead of repeating dict lookups and conversions.
+Fields of the feed that no stage uses are dropped.
+"""
+
+import sys
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Optional
+
+from ranking import TYPE_TO_WEIGHT_KEY_MAP, int_or_zero
+
+
+class Event(NamedTuple):
+    """
+    One normalized match event.
+
+    Attributes:
+        id (Optional[str]): Feed message id.
+        type (str): Event type, e.g. "goal" (interned).
+        minute (int): Minute in the match.
+        period (int): Match period (0 when missing).
+        second (int): Second within the minute (0 when missing).
+        comment (str): Commentary text.
+        time (str): Display time from the feed.
+        playerRef1, playerRef2, teamRef1, teamRef2 (Optional[str]): Squad ids.
+        weight_key (str): Key into `event_weights` for this type (interned).
+        headline_fragment (str): First sentence of the comment.
+    """
+
+    id: Optional[str]
+    type: str
+    minute: int
+    period: int
+    second: int
+    comment: str
+    time: str
+    playerRef1: Optional[str]
+    playerRef2: Optional[str]
+    teamRef1: Optional[str]
+    teamRef2: Optional[str]
+    weight_key: str
+    headline_fragment: str
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """
+        Dict-style read access, so code shared with raw feed messages (caption
+        prompts, asset queries) works on records too.
+        """
+        value = getattr(self, name, None)
+        return default if value is None else value
+
+
+_new_event = tuple.__new__
+_intern = sys.intern
+
+
+def to_event(msg: Dict[str, Any]) -> Event:
+    """
+    Normalizes one feed message. A non-numeric `minute` raises ValueError, as
+    it does when scoring raw messages.
+    """
+    get = msg.get
+    msg_type = _intern(get("type", ""))
+    comment = get("comment", "")
+    weight_key = TYPE_TO_WEIGHT_KEY_MAP.get(msg_type, msg_type)
+    # Built positionally through tuple.__new__; the generated keyword
+    # constructor is several times slower at ingestion volumes.
+    return _new_event(
+        Event,
+        (
+            get("id"),
+            msg_type,
+            int(get("minute", 0)),
+            int_or_zero(get("period", 0)),
+            int_or_zero(get("second", 0)),
+            comment,
+            get("time", ""),
+            get("playerRef1"),
+            get("playerRef2"),
+            get("teamRef1"),
+            get("teamRef2"),
+            _intern(weight_key),
+            comment.split(".", 1)[0],
+        ),
+    )
+
+
+def normalize_events(messages: Iterable[Dict[str, Any]]) -> Iterator[Event]:
+    """Lazily normalizes a message stream (already normalized events pass through)."""
+    for msg in messages:
+        yield msg if isinstance(msg, Event) else to_event(msg)
@@ -1,82 +1,330 @@
+import contextvars
 import json
-import os
-import json
-from typing import Any, Dict, Tuple
-
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
+from cache import CaptionCache
+from instrument import count, span
+from llm import ClientProvider, get_provider
+from matcher import AssetMatcher
+from reference import ASSET_DATA, ReferenceData, get_reference_data
 
 SYSTEM_PROMPT = """
 You are a usefull AI Agent, used for creating football (soccer) match caption,
 for interesting match events. The captions generated should not be longer than
 3 sentences.
 """
-ASSET_DATA = "assets/asset_descriptions.json"
-
-def generate_caption(msg: Dict[str, Any]) -> Tuple[str, str]:
-    load_dotenv()
-    api_key = os.environ.get("GEMINI_API_KEY")
-    client = genai.Client(api_key=api_key)
-
-    eventType = f"{msg.get('type','')}\n"
-    comment = f"comment: {msg.get('comment','')}\n"
-    eventTime = f"time: {msg.get('time','')}\n"
-
-    playerRef1 = msg.get("playerRef1", "")
-    teamRef1 = msg.get("teamRef1", "")
-    playerRef2 = msg.get("playerRef2", "")
-    teamRef2 = msg.get("teamRef2", "")
-
-    # Load squads
-    with open("data/celtic-squad.json") as f:
-        squad = json.load(f)["squad"][0]
-        for p in squad["person"]:
-            if p["id"] == playerRef1:
-                playerRef1 = f"player-1: {p['firstName']} {p['lastName']}\n"
-        if teamRef1:
-            teamRef1 = f"team-1: {squad['contestantName']}\n"
-
-    with open("data/kilmarnock-squad.json") as f:
-        squad = json.load(f)["squad"][0]
-        for p in squad["person"]:
-            if p["id"] == playerRef2:
-                playerRef2 = f"player-2: {p['firstName']} {p['lastName']}\n"
-        if teamRef2:
-            teamRef2 = f"team-2: {squad['contestantName']}\n"
-
-    caption = (
-        eventType + comment + eventTime + playerRef1 + teamRef1 + playerRef2 + teamRef2
-    )
+MODEL = "gemini-2.0-flash-001"
+PLACEHOLDER_ASSET = "assets/placeholder.png"
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces request starts to at most `rate` per second.
+    """
+
+    def __init__(self, rate: float) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def acquire(self) -> None:
+        """Blocks until the caller may start its request."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+def _provider_for(client, provider: Optional[ClientProvider]) -> ClientProvider:
+    if provider is not None:
+        return provider
+    if client is not None:
+        return ClientProvider(client=client)
+    return get_provider()
+
+
+def _generate(
+    provider: ClientProvider,
+    contents: str,
+    limiter: Optional[RateLimiter] = None,
+    cache: Optional[CaptionCache] = None,
+    json_output: bool = False,
+) -> str:
+    if cache is not None:
+        key = CaptionCache.key(MODEL, SYSTEM_PROMPT, contents)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    if limiter is not None:
+        limiter.acquire()
+    text = provider.generate(MODEL, contents, SYSTEM_PROMPT, json_output=json_output)
+
+    if cache is not None and text:
+        cache.put(key, text)
+    return text
+
 
-    with open(ASSET_DATA) as f:
-        data = json.load(f)
-    prompt = f"""
-    You are given the asset description input data: {data["assets"]}, with 'filename' and 'description'.
+def _pick_asset(
+    provider: ClientProvider,
+    contents: str,
+    limiter: Optional[RateLimiter] = None,
+    cache: Optional[CaptionCache] = None,
+) -> str:
+    with span("asset_pick"):
+        return _generate(provider, contents, limiter, cache)
+
+
+def _resolved(value: Any) -> Future:
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+def describe_event(msg: Dict[str, Any], refs: ReferenceData) -> str:
+    """
+    Builds the plain-text event description used as the caption prompt,
+    resolving player and team ids through the reference data indexes.
+    """
+    caption = f"{msg.get('type','')}\n"
+    caption += f"comment: {msg.get('comment','')}\n"
+    caption += f"time: {msg.get('time','')}\n"
+
+    for n in (1, 2):
+        player_name = refs.player_name(msg.get(f"playerRef{n}", ""))
+        if player_name:
+            caption += f"player-{n}: {player_name}\n"
+        team_name = refs.team_name(msg.get(f"teamRef{n}", ""))
+        if team_name:
+            caption += f"team-{n}: {team_name}\n"
+
+    return caption
+
+
+def asset_prompt(caption: str, refs: ReferenceData) -> str:
+    """Builds the prompt asking the model to pick the closest asset."""
+    return f"""
+    You are given the asset description input data: {refs.assets}, with 'filename' and 'description'.
     Read the 'description' for each object in the assests array and compare it to the caption: {caption},
     then return the 'filename' of the assest that most closely matches the scenario described in the caption.
     If an image is a close match with no, direct match just return the one that is the CLOSEST match, do not provide any explanations.
     Use the following format to return the filename: 'assets/filename.jpg'
     """
-    response_asset = client.models.generate_content(
-        model='gemini-2.0-flash-001',
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            system_instruction=SYSTEM_PROMPT,
-        ),
+
+
+def _combine(asset_text: Optional[str], caption_text: Optional[str]) -> Tuple[str, str]:
+    if asset_text and caption_text:
+        return (asset_text.strip(), caption_text)
+    elif caption_text:
+        return (PLACEHOLDER_ASSET, caption_text)
+    return ("", "")
+
+
+def generate_caption(
+    msg: Dict[str, Any],
+    refs: Optional[ReferenceData] = None,
+    client=None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    provider: Optional[ClientProvider] = None,
+) -> Tuple[str, str]:
+    """
+    Returns an (asset, caption) pair for one event, making the asset and
+    caption requests one after the other. Requests already in `cache` are
+    answered from disk. With a `matcher`, the asset is picked locally and the
+    LLM asset request is only made when the matcher finds nothing.
+
+    Requests go through `provider`, a provider wrapping `client`, or the
+    process-wide provider from `llm.get_provider`, in that order.
+    """
+    if refs is None:
+        refs = get_reference_data()
+
+    caption = describe_event(msg, refs)
+    with span("asset_pick"):
+        local_asset = matcher.match_event(msg, refs) if matcher else None
+    provider = _provider_for(client, provider)
+
+    if local_asset:
+        response_asset = local_asset
+    else:
+        response_asset = _pick_asset(provider, asset_prompt(caption, refs), cache=cache)
+    response_caption = _generate(provider, caption, cache=cache)
+
+    return _combine(response_asset, response_caption)
+
+
+def generate_captions(
+    msgs: List[Dict[str, Any]],
+    refs: Optional[ReferenceData] = None,
+    client=None,
+    max_workers: int = 4,
+    rate_limit: Optional[float] = None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    provider: Optional[ClientProvider] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Concurrent variant of `generate_caption` for a list of events.
+
+    Every asset and caption request is submitted to a bounded thread pool up
+    front, optionally throttled to `rate_limit` requests per second. Results are
+    returned in the same order as `msgs`.
+    """
+    if not msgs:
+        return []
+    if refs is None:
+        refs = get_reference_data()
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    captions = [describe_event(msg, refs) for msg in msgs]
+    with span("asset_pick"):
+        local_assets = [
+            matcher.match_event(msg, refs) if matcher else None for msg in msgs
+        ]
+    prompts = [
+        None if local else asset_prompt(caption, refs)
+        for local, caption in zip(local_assets, captions)
+    ]
+    provider = _provider_for(client, provider)
+
+    def submit(fn, *args):
+        # Run each request in a copy of the caller's context so an active
+        # instrumentation recorder sees it.
+        return pool.submit(contextvars.copy_context().run, fn, *args)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        asset_futures = [
+            submit(_pick_asset, provider, prompt, limiter, cache)
+            if prompt
+            else _resolved(local)
+            for prompt, local in zip(prompts, local_assets)
+        ]
+        caption_futures = [
+            submit(_generate, provider, caption, limiter, cache)
+            for caption in captions
+        ]
+        return [
+            _combine(asset_future.result(), caption_future.result())
+            for asset_future, caption_future in zip(asset_futures, caption_futures)
+        ]
+
+
+def event_key(msg: Dict[str, Any], index: int) -> str:
+    """Identifies an event within a batched request: its id, or its position."""
+    return str(msg.get("id") or f"event-{index}")
+
+
+def batch_prompt(items: List[Dict[str, str]], refs: ReferenceData) -> str:
+    """
+    Builds the single request asking for a caption and an asset for every
+    event. `items` are {"id", "description"} dicts; the JSON list of events is
+    always the last part of the prompt.
+    """
+    return (
+        f"You are given the asset description input data: {refs.assets}, "
+        "with 'filename' and 'description'.\n"
+        "For every match event below, write a caption for the event and pick "
+        "the filename of the asset that most closely matches it (the closest "
+        "one if none matches directly).\n"
+        'Answer with a JSON list of objects {"id": ..., "caption": ..., '
+        '"asset": "assets/filename.jpg"}, one per event, using the event ids '
+        "given.\n"
+        f"Events:\n{json.dumps(items, ensure_ascii=False)}"
     )
-    response_caption = client.models.generate_content(
-        model='gemini-2.0-flash-001',
-        contents=caption,
-        config=types.GenerateContentConfig(
-            system_instruction=SYSTEM_PROMPT,
-        ),
+
+
+def parse_batch_response(text: Optional[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Returns {event id: (asset, caption)} for every well-formed item of a
+    batched response. Malformed output yields an empty dict, so every event
+    falls back to its own requests.
+    """
+    if not text:
+        return {}
+    text = text.strip()
+    if text.startswith("```"):
+        # Models sometimes wrap JSON in a fenced code block.
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        items = json.loads(text)
+    except ValueError:
+        return {}
+    if isinstance(items, dict):
+        items = items.get("events", items.get("items", []))
+    if not isinstance(items, list):
+        return {}
+
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        caption, asset = item.get("caption"), item.get("asset")
+        if item.get("id") is None or not isinstance(caption, str) or not caption:
+            continue
+        results[str(item["id"])] = _combine(asset if isinstance(asset, str) else None, caption)
+    return results
+
+
+def generate_captions_batched(
+    msgs: List[Dict[str, Any]],
+    refs: Optional[ReferenceData] = None,
+    client=None,
+    max_workers: int = 4,
+    rate_limit: Optional[float] = None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    provider: Optional[ClientProvider] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Captions all `msgs` with one structured request instead of two requests
+    per event. Events the response leaves out (or answers without a caption)
+    fall back to per-event requests through `generate_captions`. Local
+    `matcher` hits take precedence over the assets the model picks. Results
+    are returned in the same order as `msgs`.
+    """
+    if not msgs:
+        return []
+    if refs is None:
+        refs = get_reference_data()
+    provider = _provider_for(client, provider)
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+
+    keys = [event_key(msg, i) for i, msg in enumerate(msgs)]
+    items = [
+        {"id": key, "description": describe_event(msg, refs)}
+        for key, msg in zip(keys, msgs)
+    ]
+    response = _generate(
+        provider, batch_prompt(items, refs), limiter, cache, json_output=True
     )
+    answered = parse_batch_response(response)
 
-    if response_asset.text and response_caption.text:
-        return (response_asset.text.strip(), response_caption.text)
-    elif response_caption.text:
-        return ("assets/placeholder.png", response_caption.text)
-    return ("", "")
+    missing = [i for i, key in enumerate(keys) if key not in answered]
+    count("caption_fallbacks", len(missing))
+    fallback = generate_captions(
+        [msgs[i] for i in missing],
+        refs,
+        max_workers=max_workers,
+        rate_limit=rate_limit,
+        cache=cache,
+        matcher=matcher,
+        provider=provider,
+    )
+    results = dict(zip(missing, fallback))
 
+    with span("asset_pick"):
+        for i, (key, msg) in enumerate(zip(keys, msgs)):
+            if i in results:
+                continue
+            asset, caption = answered[key]
+            local_asset = matcher.match_event(msg, refs) if matcher else None
+            results[i] = (local_asset or asset, caption)
+    return [results[i] for i in range(len(msgs))]
@@ -0,0 +1,202 @@
+"""
+Incremental readers for match event files.
+
+`stream_match_events` yields message dicts one at a time from either the
+regular `match_events.json` layout (parsed incrementally, a chunk at a time)
+or NDJSON (one JSON object per line), so scoring can start before the whole
+file has been read and only a chunk of the source is held in memory.
+"""
+
+import json
+import sys
+from itertools import chain
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+class _JsonStream:
+    """
+    Minimal pull parser over a text file: structural characters are consumed
+    one at a time and complete values are decoded with `raw_decode` from a
+    sliding buffer.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE) -> None:
+        self._f = f
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buf, self._pos)
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self._error(f"Expecting '{char}'")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number running into the end of the buffer may be truncated.
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Iterates the keys of an object, leaving each value to the caller."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise self._error("Expecting property name")
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def items(self) -> Iterator[None]:
+        """Iterates the elements of an array, leaving each one to the caller."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield None
+            if self.peek() == ",":
+                self._pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def _iter_json_document(
+    f: TextIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[str, Any]]:
+    # Yields ("matchInfo", dict) and ("message", dict) records in file order.
+    # As in createStoryPack, only the first entry of "messages" is used.
+    stream = _JsonStream(f, chunk_size)
+    for key in stream.members():
+        if key == "matchInfo":
+            yield "matchInfo", stream.value()
+        elif key == "messages":
+            for index, _ in enumerate(stream.items()):
+                if index > 0:
+                    stream.value()
+                    continue
+                for inner_key in stream.members():
+                    if inner_key != "message":
+                        stream.value()
+                        continue
+                    for _ in stream.items():
+                        yield "message", stream.value()
+        else:
+            stream.value()
+
+
+def _iter_ndjson(f: TextIO) -> Iterator[Tuple[str, Any]]:
+    # A line holding a "matchInfo" key carries the match metadata; every
+    # other non-blank line is a message.
+    for line in f:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if "matchInfo" in record:
+            yield "matchInfo", record["matchInfo"]
+        else:
+            yield "message", record
+
+
+def _iter_records(path: str) -> Iterator[Tuple[str, Any]]:
+    with open(path) as f:
+        if path.endswith(NDJSON_SUFFIXES):
+            yield from _iter_ndjson(f)
+        else:
+            yield from _iter_json_document(f)
+
+
+def stream_match_events(
+    path: str,
+) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """
+    Opens a match event file for incremental reading.
+
+    Returns the `matchInfo` dict and an iterator over the messages. The file is
+    read up to the match info straight away; messages are parsed lazily as the
+    iterator is consumed. Messages that appear before the match info are held
+    until it is found.
+
+    Raises:
+        FileNotFoundError: If `path` does not exist.
+        json.JSONDecodeError: If the content is not valid JSON.
+        ValueError: If the file has no `matchInfo`.
+    """
+    records = _iter_records(path)
+    early: List[Dict[str, Any]] = []
+    match_info: Optional[Dict[str, Any]] = None
+    for kind, value in records:
+        if kind == "matchInfo":
+            match_info = value
+            break
+        early.append(value)
+
+    if match_info is None:
+        raise ValueError(f"No matchInfo found in {path}")
+
+    messages = (value for kind, value in records if kind == "message")
+    return match_info, chain(early, messages)
+
+
+def peak_memory_kb() -> Optional[int]:
+    """
+    Peak resident set size of this process in KiB, or None where the
+    `resource` module is unavailable (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and KiB elsewhere.
+    return peak // 1024 if sys.platform == "darwin" else peak
@@ -0,0 +1,221 @@
+"""
+Lightweight pipeline instrumentation.
+
+While a `Recorder` is active (see `recording`), `span` and `timed_iter` time
+the pipeline stages and `count` tallies events such as LLM calls and cache
+hits. Without an active recorder they do nothing beyond a context variable
+lookup, so the hooks stay in place for ordinary runs.
+
+`counting` scopes counters to one block (e.g. one pack) whether or not a run
+is being recorded. Counts from concurrent packs in other threads are not
+seen, unlike the process-wide provider and cache totals.
+
+Span times are exclusive: a span nested in another (in the same thread) is
+subtracted from its parent, so e.g. `select` is the heap work alone, not the
+scoring it pulls through. Spans from worker threads (asset picks issued
+concurrently) are summed across threads.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Pipeline stages in report order; other span names are listed after these.
+STAGES = (
+    "load",
+    "dedup",
+    "score",
+    "select",
+    "caption",
+    "asset_pick",
+    "build",
+    "validate",
+    "write",
+)
+
+
+class Recorder:
+    """
+    Collects span timings and counters for one run (or one pack).
+
+    Attributes:
+        seconds (Dict[str, float]): Exclusive seconds per span name.
+        calls (Dict[str, int]): Number of spans recorded per name.
+        counters (Dict[str, Any]): Values accumulated by `count`.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[List[Any]]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(self, name: str) -> None:
+        self._stack().append([name, time.perf_counter(), 0.0])
+
+    def stop(self) -> None:
+        stack = self._stack()
+        name, started, nested = stack.pop()
+        elapsed = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += elapsed
+        self.add(name, elapsed - nested)
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + calls
+
+    def count(self, name: str, n: Any = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def timings(self) -> Dict[str, float]:
+        """Seconds per stage, rounded for StoryPack.metrics."""
+        with self._lock:
+            return {name: round(s, 6) for name, s in self._ordered(self.seconds)}
+
+    def report(self) -> str:
+        """Per-stage breakdown followed by the counters, as printable text."""
+        with self._lock:
+            rows = self._ordered(self.seconds)
+            calls = dict(self.calls)
+            counters = sorted(self.counters.items())
+        total = sum(s for _, s in rows) or 1.0
+        lines = [f"{'stage':<12} {'ms':>10} {'calls':>8} {'share':>6}"]
+        for name, seconds in rows:
+            lines.append(
+                f"{name:<12} {seconds * 1000:>10.3f} {calls[name]:>8} "
+                f"{seconds / total:>6.1%}"
+            )
+        if counters:
+            lines.append(
+                ", ".join(
+                    f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+                    for name, value in counters
+                )
+            )
+        return "\n".join(lines)
+
+    @staticmethod
+    def _ordered(seconds: Dict[str, float]):
+        known = [(name, seconds[name]) for name in STAGES if name in seconds]
+        extra = sorted((n, s) for n, s in seconds.items() if n not in STAGES)
+        return known + extra
+
+
+_current: contextvars.ContextVar[Optional[Recorder]] = contextvars.ContextVar(
+    "recorder", default=None
+)
+_counters: contextvars.ContextVar[Optional["Counters"]] = contextvars.ContextVar(
+    "counters", default=None
+)
+
+
+class Counters:
+    """
+    Counters for one `counting` block.
+
+    Attributes:
+        values (Dict[str, Any]): Values accumulated by `count`.
+    """
+
+    def __init__(self) -> None:
+        self.values: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, n: Any = 1) -> None:
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + n
+
+    def get(self, name: str, default: Any = 0) -> Any:
+        with self._lock:
+            return self.values.get(name, default)
+
+
+def current() -> Optional[Recorder]:
+    """Returns the active recorder, if any."""
+    return _current.get()
+
+
+@contextmanager
+def recording(recorder: Optional[Recorder] = None) -> Iterator[Recorder]:
+    """Makes `recorder` (a new one by default) active for the block."""
+    recorder = recorder or Recorder()
+    token = _current.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def counting() -> Iterator[Counters]:
+    """
+    Collects `count` calls made in the block, including from worker threads
+    run in a copy of its context, into a new `Counters`.
+    """
+    counters = Counters()
+    token = _counters.set(counters)
+    try:
+        yield counters
+    finally:
+        _counters.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Times the block as stage `name` when recording."""
+    recorder = _current.get()
+    if recorder is None:
+        yield
+        return
+    recorder.start(name)
+    try:
+        yield
+    finally:
+        recorder.stop()
+
+
+def timed_iter(name: str, iterable: Iterable[Any]) -> Iterable[Any]:
+    """
+    Wraps `iterable` so the work done to produce each item is timed as stage
+    `name` (the consumer's time between items is not counted). Returns
+    `iterable` itself when not recording.
+    """
+    recorder = _current.get()
+    if recorder is None:
+        return iterable
+    return _timed(recorder, name, iterable)
+
+
+def _timed(recorder: Recorder, name: str, iterable: Iterable[Any]) -> Iterator[Any]:
+    iterator = iter(iterable)
+    while True:
+        recorder.start(name)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            recorder.stop()
+        yield item
+
+
+def count(name: str, n: Any = 1) -> None:
+    """Adds `n` to counter `name` when recording and in a `counting` block."""
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.count(name, n)
+    counters = _counters.get()
+    if counters is not None:
+        counters.add(name, n)
@@ -0,0 +1,255 @@
+"""
+Live mode: keep a story pack up to date while a match event file grows.
+
+`LiveStory` holds the scored top-`max_pages` selection in memory and only
+captions events that newly enter it; `watch` polls the input file, feeds it new
+messages and atomically rewrites the output pack whenever the selection
+changes.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from cache import CaptionCache
+from dedup import DEFAULT_WINDOW, Deduplicator
+from ingest import NDJSON_SUFFIXES, stream_match_events
+from main import assembleStoryPack, buildPages, captionEvents
+from matcher import AssetMatcher
+from models import StoryPack
+from output import write_pack
+from ranking import Weights, compile_profile, iter_scored_events
+from reference import ReferenceData
+
+
+def message_key(msg: Dict[str, Any]) -> str:
+    """Identifies a feed message: its `id`, or a hash of its content."""
+    if msg.get("id"):
+        return str(msg["id"])
+    payload = json.dumps(msg, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+class LiveStory:
+    """
+    Incrementally maintained selection and captions for one match.
+
+    Only the current top `max_pages` messages are kept (as a min-heap on the
+    same (score, minute, first-seen) ranking `select_top_events` uses), since a
+    message that drops out can never re-enter once more messages arrive.
+
+    With `skip_seen`, the keys of the most recent `DEFAULT_WINDOW` messages
+    are remembered so that re-read messages are not scored again. Sources that
+    only ever hand over new messages (a tailed NDJSON file) can turn it off.
+    """
+
+    def __init__(
+        self,
+        match_info: Dict[str, Any],
+        weights_data: Weights,
+        source: str,
+        refs: Optional[ReferenceData] = None,
+        caption_workers: int = 1,
+        rate_limit: Optional[float] = None,
+        cache: Optional[CaptionCache] = None,
+        matcher: Optional[AssetMatcher] = None,
+        batched_captions: bool = False,
+        near_duplicates: str = "drop",
+        skip_seen: bool = True,
+    ) -> None:
+        self.match_info = match_info
+        self.profile = compile_profile(weights_data)
+        self.source = source
+        self._caption_options = (
+            refs, caption_workers, rate_limit, cache, matcher, batched_captions
+        )
+
+        self._top: List[Tuple[Tuple[int, int, int], str, Dict[str, Any]]] = []
+        # Message key -> None, oldest first; None when not tracked.
+        self._seen: Optional[Dict[str, None]] = {} if skip_seen else None
+        # Repeats under new ids (overlapping feeds); recent identities only.
+        self._dedup = Deduplicator(near_duplicates, DEFAULT_WINDOW)
+        self._seq = 0
+        self._captions: Dict[str, Tuple[str, str]] = {}
+
+    def add(self, messages: Iterable[Dict[str, Any]]) -> int:
+        """
+        Scores new messages (already seen ones are skipped) and returns how
+        many entered the selection.
+        """
+        def unseen():
+            seen = self._seen
+            for msg in messages:
+                key = message_key(msg)
+                if key not in seen:
+                    seen[key] = None
+                    if len(seen) > DEFAULT_WINDOW:
+                        del seen[next(iter(seen))]
+                    yield msg
+
+        limit = self.profile.max_pages
+        entered = 0
+        fresh = messages if self._seen is None else unseen()
+        unique = self._dedup.filter(fresh)
+        for score, minute, msg in iter_scored_events(unique, self.profile):
+            self._seq += 1
+            entry = ((score, minute, -self._seq), message_key(msg), msg)
+            if len(self._top) < limit:
+                heapq.heappush(self._top, entry)
+            elif limit > 0 and entry[0] > self._top[0][0]:
+                heapq.heapreplace(self._top, entry)
+            else:
+                continue
+            entered += 1
+        return entered
+
+    def selection(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns the selected (key, message) pairs in chronological order."""
+        ranked = sorted(self._top, reverse=True)
+        ranked.sort(key=lambda entry: entry[0][1])
+        return [(key, msg) for _, key, msg in ranked]
+
+    def build(self) -> StoryPack:
+        """
+        Builds the pack for the current selection, captioning only events that
+        have not been captioned before.
+        """
+        selected = self.selection()
+        missing = [(key, msg) for key, msg in selected if key not in self._captions]
+        new_captions = captionEvents([msg for _, msg in missing], *self._caption_options)
+        for (key, _), caption in zip(missing, new_captions):
+            self._captions[key] = caption
+
+        # Captions of events that left the selection are no longer needed.
+        keys = {key for key, _ in selected}
+        self._captions = {k: v for k, v in self._captions.items() if k in keys}
+
+        pages, metrics = buildPages(
+            self.match_info,
+            [msg for _, msg in selected],
+            [self._captions[key] for key, _ in selected],
+            self.profile,
+        )
+        metrics["captioned"] = len(missing)
+        metrics.update(self._dedup.metrics())
+        return assembleStoryPack(self.match_info, pages, metrics, source=self.source)
+
+
+class FileTail:
+    """
+    Polls a match event file for changes. NDJSON files are tailed from the
+    last read offset and malformed lines are skipped; the JSON layout is
+    re-read and re-parsed in full on every change and relies on `LiveStory`
+    skipping messages it has already seen, so NDJSON suits long feeds better.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.match_info: Optional[Dict[str, Any]] = None
+        self._offset = 0
+        self._signature: Optional[Tuple[int, int]] = None
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Returns messages read since the previous poll (possibly none)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return []
+
+        if self.path.endswith(NDJSON_SUFFIXES):
+            messages = self._read_appended_lines()
+        else:
+            try:
+                self.match_info, stream = stream_match_events(self.path)
+                messages = list(stream)
+            except ValueError:
+                # Caught mid-write (or no matchInfo yet); retry next poll.
+                return []
+
+        self._signature = signature
+        return messages
+
+    def _read_appended_lines(self) -> List[Dict[str, Any]]:
+        messages = []
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # incomplete last line, read it next time
+                self._offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    print(f"Skipping malformed line in {self.path}: {e}")
+                    continue
+                if "matchInfo" in record:
+                    self.match_info = record["matchInfo"]
+                else:
+                    messages.append(record)
+        return messages
+
+
+def watch(
+    input_path: str,
+    output_path: str,
+    weights_data: Weights,
+    interval: float = 0.5,
+    max_polls: Optional[int] = None,
+    compact: bool = False,
+    use_gzip: bool = False,
+    **caption_options: Any,
+) -> Optional[LiveStory]:
+    """
+    Polls `input_path` every `interval` seconds and atomically rewrites
+    `output_path` whenever new messages change the selection. Runs until
+    interrupted, or for `max_polls` polls. `caption_options` are passed on to
+    `LiveStory`; a caption `cache` among them is pruned after the first
+    rebuild and then at most every `cache.PRUNE_INTERVAL` seconds.
+    """
+    tail = FileTail(input_path)
+    story: Optional[LiveStory] = None
+    pending: List[Dict[str, Any]] = []
+    written = False
+    polls = 0
+
+    while max_polls is None or polls < max_polls:
+        polls += 1
+        pending.extend(tail.poll())
+        if story is None and tail.match_info is not None:
+            story = LiveStory(
+                tail.match_info,
+                weights_data,
+                input_path,
+                # A tailed NDJSON file never hands over a message twice.
+                skip_seen=not input_path.endswith(NDJSON_SUFFIXES),
+                **caption_options,
+            )
+
+        if story is not None:
+            entered = story.add(pending)
+            pending = []
+            if entered or not written:
+                start = time.perf_counter()
+                pack = story.build()
+                write_pack(output_path, pack, compact=compact, use_gzip=use_gzip)
+                written = True
+                if caption_options.get("cache") is not None:
+                    caption_options["cache"].maybe_prune()
+                print(
+                    f"Updated {output_path}: {len(pack.pages)} pages, "
+                    f"{pack.metrics['captioned']} new captions "
+                    f"in {time.perf_counter() - start:.3f}s"
+                )
+
+        if max_polls is None or polls < max_polls:
+            time.sleep(interval)
+
+    return story
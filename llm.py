@@ -0,0 +1,238 @@
+"""
+LLM client provider.
+
+One client is created lazily per process and shared by every request, so
+environment parsing and client setup happen once and HTTP connections are
+pooled by the client's transport. The provider retries transient failures and
+records per-call latency and retry counts.
+
+Tests and offline runs can inject any object with a
+`models.generate_content(model=..., contents=..., config=...)` method via
+`ClientProvider(client=...)` or `set_provider`; `StubClient` is a local one
+with canned, deterministic answers.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from instrument import count
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+# Recent request latencies kept for the percentiles in `summary`.
+LATENCY_WINDOW = 10000
+
+
+def _default_factory():
+    # The genai SDK and dotenv are slow to import; only load them once a
+    # request actually has to go to the model.
+    from dotenv import load_dotenv
+    from google import genai
+
+    load_dotenv()
+    api_key = os.environ.get("GEMINI_API_KEY")
+    return genai.Client(api_key=api_key)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if getattr(exc, "code", None) in RETRYABLE_STATUS:
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    try:
+        import httpx
+    except ImportError:
+        return False
+    return isinstance(exc, httpx.TransportError)
+
+
+class ClientProvider:
+    """
+    Lazily created, shared LLM client with retries and call statistics.
+
+    Attributes:
+        max_retries (int): Extra attempts after a retryable failure.
+        backoff (float): Seconds to wait before the first retry; doubles each time.
+        calls (int): Requests sent, including retries.
+        retries (int): Requests that were retries.
+        seconds (float): Total seconds taken by successful requests.
+        latencies (deque): Seconds taken by the most recent successful
+            requests, at most `latency_window` of them.
+    """
+
+    def __init__(
+        self,
+        client: Any = None,
+        factory: Optional[Callable[[], Any]] = None,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        latency_window: int = LATENCY_WINDOW,
+    ) -> None:
+        self._client = client
+        self._factory = factory or _default_factory
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.calls = 0
+        self.retries = 0
+        self.seconds = 0.0
+        self.latencies: deque = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """Returns the shared client, creating it on first use."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def generate(
+        self,
+        model: str,
+        contents: str,
+        system_instruction: str,
+        json_output: bool = False,
+    ) -> Optional[str]:
+        """
+        Sends one request and returns the response text. With `json_output`
+        the model is asked to answer with JSON only.
+        """
+        # A plain dict, which genai accepts as a GenerateContentConfig, so
+        # injected clients never need the SDK imported.
+        config: Dict[str, Any] = {"system_instruction": system_instruction}
+        if json_output:
+            config["response_mime_type"] = "application/json"
+        client = self.get()
+        attempt = 0
+        while True:
+            with self._lock:
+                self.calls += 1
+                if attempt:
+                    self.retries += 1
+            count("llm_calls")
+            if attempt:
+                count("llm_retries")
+            start = time.perf_counter()
+            try:
+                response = client.models.generate_content(
+                    model=model, contents=contents, config=config
+                )
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                time.sleep(self.backoff * 2**attempt)
+                attempt += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.seconds += elapsed
+                self.latencies.append(elapsed)
+            count("llm_seconds", elapsed)
+            return response.text
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns call counters in the shape used by StoryPack.metrics."""
+        with self._lock:
+            return {
+                "llm_calls": self.calls,
+                "llm_retries": self.retries,
+                "llm_seconds": round(self.seconds, 3),
+            }
+
+    def summary(self) -> str:
+        """
+        One-line human readable latency summary; the percentiles cover the
+        most recent requests only.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+            calls, retries, seconds = self.calls, self.retries, self.seconds
+        if not latencies:
+            return f"LLM: {calls} calls, {retries} retries"
+        return (
+            f"LLM: {calls} calls, {retries} retries, {seconds:.2f}s total, "
+            f"p50 {statistics.median(latencies) * 1000:.0f}ms, "
+            f"max {latencies[-1] * 1000:.0f}ms"
+        )
+
+
+_provider: Optional[ClientProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_provider() -> ClientProvider:
+    """Returns the process-wide provider, creating a default one if needed."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = ClientProvider()
+    return _provider
+
+
+def set_provider(provider: Optional[ClientProvider]) -> None:
+    """Replaces the process-wide provider (None restores the default)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+STUB_ASSET = "assets/placeholder.png"
+BATCH_MARKER = "Events:\n"
+
+
+def _stub_caption(description: str) -> str:
+    # Echo the event's comment (or its type) so captions stay recognisable.
+    lines = [line for line in description.strip().splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith("comment: ") and line[9:].strip():
+            return line[9:].strip()
+    return lines[0].strip() if lines else "Match event."
+
+
+class StubModels:
+    """
+    Local stand-in for `client.models` returning canned output shaped like
+    the real model's: a filename for asset prompts, the event comment as the
+    caption, and a JSON list for batched caption requests. Events whose ids
+    are in `skip_ids` are left out of batched answers.
+    """
+
+    def __init__(self, skip_ids: Iterable[str] = ()) -> None:
+        self.skip_ids = set(skip_ids)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, model: str, contents: str, config: Any) -> Any:
+        with self._lock:
+            self.calls += 1
+        if BATCH_MARKER in contents:
+            events = json.loads(contents.rsplit(BATCH_MARKER, 1)[1])
+            text = json.dumps(
+                [
+                    {
+                        "id": event["id"],
+                        "caption": _stub_caption(event["description"]),
+                        "asset": STUB_ASSET,
+                    }
+                    for event in events
+                    if event["id"] not in self.skip_ids
+                ]
+            )
+        elif "asset description input data" in contents:
+            text = STUB_ASSET
+        else:
+            text = _stub_caption(contents)
+        return SimpleNamespace(text=text)
+
+
+class StubClient:
+    """Offline client backed by `StubModels`."""
+
+    def __init__(self, skip_ids: Iterable[str] = ()) -> None:
+        self.models = StubModels(skip_ids)
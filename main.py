@@ -1,84 +1,53 @@
 import json
+import time
 import uuid
 
-from datetime import datetime
-from typing import Any, Dict, List
-
-from jsonschema import Draft202012Validator, ValidationError
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from models import CoverPage, HighlightPage, InfoPage, Page, StoryPack
-from generate import generate_caption
+from cache import CaptionCache
+from events import Event, normalize_events, to_event
+from generate import generate_caption, generate_captions, generate_captions_batched
+from ingest import NDJSON_SUFFIXES, peak_memory_kb, stream_match_events
+from instrument import counting, current, recording, span, timed_iter
+from llm import ClientProvider, StubClient, get_provider, set_provider
+from matcher import AssetMatcher
+from output import serialize_pack, write_pack, write_sharded_pack
+from ranking import (
+    TYPE_TO_WEIGHT_KEY_MAP,
+    RankingProfile,
+    Weights,
+    compile_profile,
+    iter_scored_events,
+    select_top_indices,
+    select_top_scored,
+)
+from reference import ReferenceData, get_reference_data
+from store import EventStore, StoredEvents
+from validation import SCHEMA_DEFINITION
 from cli import get_args
+from dedup import DEFAULT_WINDOW, Deduplicator, first_occurrences
 
 INPUT_DATA = "data/match_events.json"
-SCHEMA_DEFINITION = "schema/story.schema.json"
 WEIGHTS_FILE = "weights.example.json"
 
-# This map translates the 'type' from match_events.json (schema)
-# into the event key used in weights.example.json.
-# This is necessary because the names don't always match.
-TYPE_TO_WEIGHT_KEY_MAP = {
-    "goal": "goal",
-    "penalty goal": "goal",          # Treat as a goal
-    "penalty lost": "penalty_missed", # 'penalty lost' in schema
-    "attempt saved": "shot_on_target",
-    "attempt blocked": "shot_on_target",
-    "miss": "chance",                 # 'miss' in schema, 'chance' in weights
-    "post": "chance",                 # 'post' in schema, 'chance' in weights
-    "yellow card": "card_yellow",
-    "red card": "card_red",           # Handle red cards if they appear
-    "substitution": "substitution",
-    "penalty won": "shot_on_target",  # A won penalty is a high-value event
-}
-
 
-
-def getStoryData(
+def buildPages(
     matchInfo: Dict[str, Any],
-    messages: List[Dict[str, Any]],
-    weights_data: Dict[str, Any],
-):
-    """
-    Scores, ranks, and selects match events to build a list of pages.
+    events: List[Event],
+    captions: List[Tuple[str, str]],
+    profile: RankingProfile,
+) -> Tuple[List[Page], Dict[str, Any]]:
     """
-    
-    event_weights: Dict[str, int] = weights_data["event_weights"]
-    bonus_minute: int = weights_data["late_minute_bonus_after"]
-    bonus_amount: int = weights_data["late_minute_bonus"]
-    max_event_pages: int = weights_data["max_pages"]
-    
-    scored_events = []
-
-    # --- 1. Score all events ---
-    for msg in messages:
-        msg_type = msg.get("type", "")
-        minute = int(msg.get("minute", 0))
-
-        # Find the corresponding key in the weights file
-        # If not in map, use the type string itself (e.g., "corner")
-        weight_key = TYPE_TO_WEIGHT_KEY_MAP.get(msg_type, msg_type)
-
-        # Get the base score, default to 0 if not in weights
-        score = event_weights.get(weight_key, 0)
-
-        # Apply late minute bonus (only to events that have a score)
-        if minute > bonus_minute and score > 0:
-            score += bonus_amount
-
-        scored_events.append((score, msg))
+    Builds the cover page plus one page per selected event, using the
+    (asset, caption) pair generated for each event. Raw feed messages are
+    accepted too and normalized on the way.
 
-    # --- 2. Select top events ---
-    # Sort by score (descending), using minute (desc) as a tie-breaker
-    scored_events.sort(key=lambda x: (x[0], int(x[1].get("minute", 0))), reverse=True)
-
-    # Get the top N events
-    top_events_with_scores = scored_events[:max_event_pages]
-    
-    # Re-sort the selected events by minute (ascending) for chronological order
-    top_events = [event for score, event in top_events_with_scores]
-    top_events.sort(key=lambda x: int(x.get("minute", 0)))
-
-    # --- 3. Build Pages ---
+    Event types with a positive weight in `profile` become HighlightPages;
+    everything else (substitution, start, end, etc.) becomes an InfoPage.
+    """
     pages: List[Page] = []
     goals_count: int = 0
     highlights_count: int = 0
@@ -92,108 +61,319 @@ def getStoryData(
         )
     )
 
-    # Determine which event types should be HighlightPages
-    # These are types with a score > 0 in the weights file
-    highlight_weight_keys = {key for key, val in event_weights.items() if val > 0}
-    
-    highlight_types = set()
-    for msg_type in TYPE_TO_WEIGHT_KEY_MAP:
-        weight_key = TYPE_TO_WEIGHT_KEY_MAP[msg_type]
-        if weight_key in highlight_weight_keys:
-            highlight_types.add(msg_type)
-    # Add any types that are direct matches (e.g., 'goal')
-    for msg_type in event_weights:
-        if event_weights[msg_type] > 0:
-            highlight_types.add(msg_type)
-
-
     # Process only the selected top events
-    for msg in top_events:
-        msg_type: str = msg.get("type", "")
-        minute: int = int(msg.get("minute", 0))
-        comment: str = msg.get("comment", "")
-        asset, ai_caption = generate_caption(msg)
-        print(f"asset: {asset}")
-
-        if msg_type in ["goal", "penalty goal"]:
+    for msg, (asset, ai_caption) in zip(events, captions):
+        event = msg if isinstance(msg, Event) else to_event(msg)
+        rule = profile.rule(event.type)
+        headline = rule.headline(event.minute, event.headline_fragment)
+
+        if rule.is_goal:
             goals_count += 1
 
-        # If the event type is in our set of "highlight" types, create a HighlightPage
-        if msg_type in highlight_types:
+        if rule.is_highlight:
             highlights_count += 1
-            headline = ""
-            
-            # Create more descriptive headlines
-            if msg_type in ["goal", "penalty goal"]:
-                headline = f"{minute}' GOAL! -- {comment.split('.')[0]}"
-            elif msg_type in ["yellow card", "red card"]:
-                headline = f"{minute}' {msg_type.upper()} -- {comment.split('.')[0]}"
-            elif msg_type in ["attempt saved", "attempt blocked", "post", "miss"]:
-                headline = f"{minute}' CHANCE! -- {comment.split('.')[0]}"
-            elif msg_type == "penalty won":
-                headline = f"{minute}' PENALTY! -- {comment.split('.')[0]}"
-            elif msg_type == "penalty lost":
-                headline = f"{minute}' PENALTY CONCEDED! -- {comment.split('.')[0]}"
-            else:
-                 headline = f"{minute}' {msg_type.upper()} -- {comment.split('.')[0]}"
-
             pages.append(
                 HighlightPage(
                     type="highlight",
                     headline=headline,
-                    caption=ai_caption if ai_caption else comment,
-                    minute=minute,
+                    caption=ai_caption if ai_caption else event.comment,
+                    minute=event.minute,
                     image=asset,
                 )
             )
         else:
-            # Otherwise, create an InfoPage (for substitution, start, end, etc.)
-            headline = f"{minute}' Match {msg_type.capitalize()}"
-            pages.append(InfoPage(type="info", headline=headline, body=comment))
+            pages.append(InfoPage(type="info", headline=headline, body=event.comment))
 
     metrics = {"goals": goals_count, "highlights": highlights_count}
 
     return pages, metrics
 
 
-def createStoryPack() -> StoryPack:
-    # Load weights
+def captionEvents(
+    events: List[Dict[str, Any]],
+    refs: Optional[ReferenceData] = None,
+    caption_workers: int = 1,
+    rate_limit: Optional[float] = None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    batched: bool = False,
+) -> List[Tuple[str, str]]:
+    """
+    Returns an (asset, caption) pair per event, in the order given. With
+    `batched`, all events are captioned by a single structured request.
+    Requests are spaced to `rate_limit` per second however many workers run.
+    """
+    if batched and events:
+        return generate_captions_batched(
+            events,
+            refs,
+            max_workers=caption_workers,
+            rate_limit=rate_limit,
+            cache=cache,
+            matcher=matcher,
+        )
+    if caption_workers > 1 or rate_limit:
+        # One worker still goes through here so the rate limiter applies.
+        return generate_captions(
+            events,
+            refs,
+            max_workers=caption_workers,
+            rate_limit=rate_limit,
+            cache=cache,
+            matcher=matcher,
+        )
+    return [generate_caption(msg, refs, cache=cache, matcher=matcher) for msg in events]
+
+
+def getStoryData(
+    matchInfo: Dict[str, Any],
+    messages: Iterable[Dict[str, Any]],
+    weights_data: Weights,
+    refs: Optional[ReferenceData] = None,
+    caption_workers: int = 1,
+    rate_limit: Optional[float] = None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    batched_captions: bool = False,
+    near_duplicates: str = "drop",
+):
+    """
+    Scores, ranks, and selects match events to build a list of pages.
+
+    `weights_data` is a weights dict or a compiled `ranking.RankingProfile`;
+    dicts are compiled once per distinct configuration and reused.
+    `refs` holds the squad and asset data shared by every caption call; when
+    omitted, `generate_caption` falls back to the process-wide cached copy.
+    With `caption_workers` > 1 the asset and caption requests for all selected
+    events are issued concurrently, throttled to `rate_limit` requests/second.
+    Responses are served from and stored in `cache` when one is given, and
+    `matcher` picks assets locally instead of asking the LLM.
+    `batched_captions` asks for every caption and asset in one request, with
+    per-event requests only for events the answer leaves out.
+    Repeated events are dropped before scoring (see `dedup`; `near_duplicates`
+    is the rule for events differing only in comment) and counted in the
+    metrics. Requests go
+    through the process-wide `llm.get_provider()`; this pack's own call, retry
+    and cache counts are added to the metrics.
+    """
+    
+    profile = compile_profile(weights_data)
+
+    # --- 1 & 2. Score all events and select the top ones ---
+    # A single ranking pass reads each message once, so only the selection is
+    # normalized; converting every message to a record costs more than it saves.
+    # Streamed input is parsed as it is scored, which counts as "load".
+    with span("select"):
+        if isinstance(messages, StoredEvents):
+            # Compiled input is ranked on its columns; only the selection is decoded.
+            with span("dedup"):
+                keep, dropped = first_occurrences(messages.identity_rows(), near_duplicates)
+            columns = messages.columns.take(keep)
+            top_events = [
+                messages[int(keep[i])] for i in select_top_indices(columns, profile)
+            ]
+        else:
+            # Streamed input keeps only recent identities, so memory stays bounded.
+            deduplicator = Deduplicator(
+                near_duplicates, None if isinstance(messages, list) else DEFAULT_WINDOW
+            )
+            unique = timed_iter("dedup", deduplicator.filter(timed_iter("load", messages)))
+            scored = timed_iter("score", iter_scored_events(unique, profile))
+            top_events = [
+                to_event(msg) for msg in select_top_scored(scored, profile.max_pages)
+            ]
+            dropped = deduplicator.metrics()
+
+    # Generate captions for the selected events, preserving their order.
+    # Counted per pack: the provider and cache may serve concurrent packs.
+    with counting() as pack_counts, span("caption"):
+        captions = captionEvents(
+            top_events, refs, caption_workers, rate_limit, cache, matcher,
+            batched_captions,
+        )
+
+    # --- 3. Build Pages ---
+    with span("build"):
+        pages, metrics = buildPages(matchInfo, top_events, captions, profile)
+    metrics.update(dropped)
+    if cache is not None:
+        metrics.update({k: pack_counts.get(k) for k in ("cache_hits", "cache_misses")})
+    metrics.update(
+        {
+            "llm_calls": pack_counts.get("llm_calls"),
+            "llm_retries": pack_counts.get("llm_retries"),
+            "llm_seconds": round(pack_counts.get("llm_seconds", 0.0), 3),
+        }
+    )
+
+    return pages, metrics
+
+
+def loadWeights(path: str = WEIGHTS_FILE) -> Dict[str, Any]:
     try:
-        with open(WEIGHTS_FILE) as f:
-            weights_data = json.load(f)
+        with open(path) as f:
+            return json.load(f)
     except FileNotFoundError:
-        print(f"Error: Weights file not found at {WEIGHTS_FILE}")
+        print(f"Error: Weights file not found at {path}")
         exit(1)
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {WEIGHTS_FILE}")
+        print(f"Error: Could not decode JSON from {path}")
         exit(1)
 
 
-    # Extract messages data
+def loadMatchEvents(
+    input_path: str = INPUT_DATA,
+    stream: bool = False,
+    store: Optional[EventStore] = None,
+) -> Tuple[Dict[str, Any], Iterable[Dict[str, Any]]]:
+    """
+    Returns (matchInfo, messages) for a match event file. With `stream`
+    (always for NDJSON input) messages is an iterator that parses the file as
+    it is consumed.
+
+    With an event `store`, an up-to-date compiled copy of the file is used
+    instead of parsing it; otherwise the parsed file is compiled into the
+    store for the next run. Messages are then `store.StoredEvents`.
+    """
+    messages: Iterable[Dict[str, Any]]
+    if store is not None:
+        stored = store.get(input_path)
+        if stored is not None:
+            return stored
     try:
-        with open(INPUT_DATA) as f:
-            data = json.load(f)
+        if stream or input_path.endswith(NDJSON_SUFFIXES):
+            matchInfo, messages = stream_match_events(input_path)
+        else:
+            with open(input_path) as f:
+                data = json.load(f)
+            matchInfo = data["matchInfo"]
+            messages = data["messages"][0]["message"]
+        if store is not None:
+            messages = store.put(input_path, matchInfo, messages)
     except FileNotFoundError:
-        print(f"Error: Match event file not found at {INPUT_DATA}")
+        print(f"Error: Match event file not found at {input_path}")
         exit(1)
     except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from {INPUT_DATA}")
+        print(f"Error: Could not decode JSON from {input_path}")
+        exit(1)
+    except ValueError as e:
+        print(f"Error: {e}")
         exit(1)
-    matchInfo: Dict[str, Any] = data["matchInfo"]
-    messages: List[Dict[str, Any]] = data["messages"][0]["message"]
 
-    # Pass weights data to getStoryData
-    pages, metrics= getStoryData(
-        matchInfo=matchInfo, messages=messages, weights_data=weights_data
+    return matchInfo, messages
+
+
+def createStoryPack(
+    caption_workers: int = 1,
+    rate_limit: Optional[float] = None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    input_path: str = INPUT_DATA,
+    stream: bool = False,
+    weights_data: Optional[Weights] = None,
+    refs: Optional[ReferenceData] = None,
+    batched_captions: bool = False,
+    event_store: Optional[EventStore] = None,
+    near_duplicates: str = "drop",
+) -> StoryPack:
+    """
+    Loads weights and match events and builds the StoryPack.
+
+    With `stream` (always for NDJSON input) messages are parsed incrementally
+    and scored as they are read instead of loading the whole file first.
+    With `event_store`, unchanged files are read from their compiled copy.
+    `weights_data` and `refs` may be supplied by callers building many packs,
+    so they are only loaded once.
+    """
+    # Load weights
+    if weights_data is None:
+        weights_data = loadWeights()
+
+    with span("load"):
+        matchInfo, messages = loadMatchEvents(input_path, stream, event_store)
+
+    try:
+        return buildStoryPack(
+            matchInfo,
+            messages,
+            weights_data,
+            source=input_path,
+            refs=refs,
+            caption_workers=caption_workers,
+            rate_limit=rate_limit,
+            cache=cache,
+            matcher=matcher,
+            batched_captions=batched_captions,
+            near_duplicates=near_duplicates,
+        )
+    except json.JSONDecodeError:
+        # Streamed input is only fully parsed while it is being scored
+        print(f"Error: Could not decode JSON from {input_path}")
+        exit(1)
+
+
+def buildStoryPack(
+    matchInfo: Dict[str, Any],
+    messages: Iterable[Dict[str, Any]],
+    weights_data: Weights,
+    source: str = INPUT_DATA,
+    refs: Optional[ReferenceData] = None,
+    caption_workers: int = 1,
+    rate_limit: Optional[float] = None,
+    cache: Optional[CaptionCache] = None,
+    matcher: Optional[AssetMatcher] = None,
+    batched_captions: bool = False,
+    near_duplicates: str = "drop",
+) -> StoryPack:
+    """
+    Builds the StoryPack for match events that are already loaded, e.g. a
+    payload received by the story service. Errors propagate to the caller.
+    """
+    pages, metrics = getStoryData(
+        matchInfo=matchInfo,
+        messages=messages,
+        weights_data=weights_data,
+        refs=refs,
+        caption_workers=caption_workers,
+        rate_limit=rate_limit,
+        cache=cache,
+        matcher=matcher,
+        batched_captions=batched_captions,
+        near_duplicates=near_duplicates,
     )
-    dt = str(datetime.fromisoformat(matchInfo["date"].replace("Z", "+00:00")))
+
+    with span("build"):
+        story = assembleStoryPack(matchInfo, pages, metrics, source=source)
+    recorder = current()
+    if recorder is not None:
+        # Stages up to here; validation and writing happen after the pack
+        # exists and are only reported by the caller.
+        story.metrics["timings"] = recorder.timings()
+    return story
+
+
+def assembleStoryPack(
+    matchInfo: Dict[str, Any],
+    pages: List[Page],
+    metrics: Dict[str, Any],
+    source: str = INPUT_DATA,
+) -> StoryPack:
+    """
+    Wraps built pages in a StoryPack carrying the match metadata. The pages
+    were validated when built, so they are not validated again.
+    """
+    dt = datetime.fromisoformat(matchInfo["date"].replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        # Date-only values drop the offset when parsed; they are UTC
+        dt = dt.replace(tzinfo=timezone.utc)
     title = matchInfo.get("description")
 
-    story_pack = StoryPack(
+    story_pack = StoryPack.from_built_pages(
         title=title,
         pack_id=matchInfo.get("id", str(uuid.uuid4())),
+        source=source,
         pages=pages,
-        created_at=dt,
+        created_at=dt.isoformat(),
         metrics=metrics,
     )
 
@@ -206,35 +386,218 @@ def main():
     print("Story Teller")
     print("=" * 60)
     print()
-    story = createStoryPack()
-    # story_pack = story.model_dump_json(indent=2)
-    story_pack = story.model_dump(exclude_none=True)
-
     args = get_args()
+    if args.shard_size is not None and (args.shard_size < 1 or args.gzip):
+        print("Error: --shard-size must be at least 1 and cannot be combined with --gzip")
+        exit(1)
+    if args.shard_size is not None and (args.batch or args.watch or args.serve or args.sweep or args.evaluate):
+        print("Error: --shard-size only applies to a single pack, not --batch, --watch, --serve, --sweep or --evaluate")
+        exit(1)
 
-    if args.strict:
+    if args.stub_llm:
+        set_provider(ClientProvider(client=StubClient()))
+
+    if args.batch:
+        from batch import print_summary, resolve_inputs, run_batch
+
+        if args.event_store:
+            openEventStore()  # fail before starting workers without numpy
+        input_paths = resolve_inputs(args.batch)
+        if not input_paths:
+            print(f"Error: No match event files found for {args.batch}")
+            exit(1)
+        start = time.perf_counter()
+        results = run_batch(
+            input_paths,
+            weights_data=loadWeights(),
+            refs=get_reference_data(),
+            options=vars(args),
+            jobs=args.jobs,
+        )
+        print_summary(results, time.perf_counter() - start)
+        return
+
+    if args.sweep:
+        from output import write_bytes_atomic
+        from sweep import build_report, config_label, expand_configs, grid_axes, print_report, run_sweep
+
+        weights_data = loadWeights()
+        spec = loadWeights(args.sweep)
+        event_store = openEventStore() if args.event_store else None
+        _, messages = loadMatchEvents(args.input, args.stream, event_store)
         try:
-            with open(SCHEMA_DEFINITION) as f:
-                schema = json.load(f)
-                validator = Draft202012Validator(schema)
-                validator.validate(story_pack)
-                print("Valid!")
-                print(story.model_dump_json(indent=2))
-
-                # Save to story.json
-                output_path = "out/story.json"
-                with open(output_path, "w") as out:
-                    json.dump(story_pack, out, indent=2)
+            deduplicator = Deduplicator(args.near_duplicates)
+            messages = list(deduplicator.filter(normalize_events(messages)))
+        except json.JSONDecodeError:
+            print(f"Error: Could not decode JSON from {args.input}")
+            exit(1)
+
+        axes = grid_axes(spec)
+        configs = expand_configs(spec, weights_data, args.samples, args.seed)
+        labels = [config_label(config, axes) for config in configs]
+        start = time.perf_counter()
+        # The base weights run as trial 0 so every trial can be compared to it
+        trials = run_sweep(
+            messages, [weights_data] + configs, [{}] + labels, jobs=args.jobs
+        )
+        report = build_report(
+            messages, trials[1:], trials[0], time.perf_counter() - start
+        )
+        print_report(report)
+        if args.sweep_report:
+            write_bytes_atomic(
+                args.sweep_report, json.dumps(report, indent=2).encode("utf-8")
+            )
+            print(f"Sweep report written to {args.sweep_report}")
+        return
+
+    if args.evaluate:
+        from evaluate import build_report, print_report, resolve_packs, run_evaluation
+        from output import write_bytes_atomic
+
+        pack_paths = resolve_packs(args.evaluate)
+        if not pack_paths:
+            print(f"Error: No story packs found for {args.evaluate}")
+            exit(1)
+        start = time.perf_counter()
+        results = run_evaluation(pack_paths, get_reference_data(), jobs=args.jobs)
+        report = build_report(results, time.perf_counter() - start)
+        print_report(report)
+        if args.evaluate_report:
+            write_bytes_atomic(
+                args.evaluate_report, json.dumps(report, indent=2).encode("utf-8")
+            )
+            print(f"Evaluation report written to {args.evaluate_report}")
+        return
+
+    # Stub answers must never land under the keys real model calls use.
+    cache = None if args.no_cache or args.stub_llm else CaptionCache()
+    matcher = None
+    if args.asset_matcher == "local":
+        matcher = AssetMatcher.from_reference(get_reference_data())
+
+    if args.serve:
+        from service import StoryService, serve
+
+        service = StoryService(
+            loadWeights(),
+            get_reference_data(),
+            caption_workers=args.workers,
+            rate_limit=args.rate_limit,
+            cache=cache,
+            matcher=matcher,
+            batched_captions=args.batched_captions,
+            strict=args.strict,
+            fast_validate=args.fast_validate,
+            compact=args.compact,
+            near_duplicates=args.near_duplicates,
+        )
+        serve(service, args.host, args.port, args.socket)
+        return
+
+    if args.watch:
+        from live import watch
+
+        print(f"Watching {args.input} (Ctrl+C to stop)")
+        try:
+            watch(
+                args.input,
+                args.output,
+                loadWeights(),
+                interval=args.interval,
+                compact=args.compact,
+                use_gzip=args.gzip,
+                caption_workers=args.workers,
+                rate_limit=args.rate_limit,
+                cache=cache,
+                matcher=matcher,
+                batched_captions=args.batched_captions,
+                near_duplicates=args.near_duplicates,
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
+    profiler = None
+    if args.profile_dump:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    with recording() if args.profile else nullcontext() as recorder:
+        writeStory(args, cache, matcher)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile_dump)
+        print(f"cProfile stats written to {args.profile_dump}")
+    if recorder is not None:
+        print(recorder.report())
+
 
+def openEventStore() -> EventStore:
+    """Returns the compiled event store used by --event-store."""
+    try:
+        return EventStore()
+    except ImportError:
+        print("Error: --event-store requires numpy")
+        exit(1)
+
+
+def writeStory(args, cache: Optional[CaptionCache], matcher: Optional[AssetMatcher]) -> None:
+    """
+    Builds the pack for `args.input`, validates it under --strict and writes
+    it to `args.output`.
+    """
+    story = createStoryPack(
+        caption_workers=args.workers,
+        rate_limit=args.rate_limit,
+        cache=cache,
+        matcher=matcher,
+        input_path=args.input,
+        stream=args.stream,
+        batched_captions=args.batched_captions,
+        event_store=openEventStore() if args.event_store else None,
+        near_duplicates=args.near_duplicates,
+    )
+    print(get_provider().summary())
+    peak_kb = peak_memory_kb()
+    if peak_kb is not None:
+        print(f"Peak memory: {peak_kb / 1024:.1f} MiB")
+    if cache is not None:
+        cache.prune()
+    # Serialize once; the same bytes are printed and written. Shards are
+    # serialized page by page, so only --strict needs the whole pack then.
+    data = None
+    if args.strict or not args.shard_size:
+        data = serialize_pack(story, compact=args.compact)
+
+    if args.strict:
+        from jsonschema import ValidationError
+        from validation import validate_pack
+
+        try:
+            with span("validate"):
+                validate_pack(story, trusted=args.fast_validate)
+            print("Valid!")
+            print(data.decode("utf-8"))
         except ValidationError as e:
             print(f"Schema Invalid: {e}")
             return
 
+    if args.shard_size:
+        with span("write"):
+            paths = write_sharded_pack(
+                args.output, story, args.shard_size, compact=args.compact
+            )
+        print(f"Saved story pack to {paths[-1]} with {len(paths) - 1} page shards")
+        return
+
     # Save to story.json
-    output_path = args.output
-    with open(output_path, "w") as out:
-        json.dump(story_pack, out, indent=2)
-        print(f"Saved story pack to {output_path}")
+    with span("write"):
+        output_path = write_pack(args.output, story, use_gzip=args.gzip, data=data)
+    print(f"Saved story pack to {output_path}")
 
 
 if __name__ == "__main__":
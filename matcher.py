@@ -0,0 +1,136 @@
+"""
+Offline asset matcher: a BM25 index over the asset descriptions.
+
+The index is built once per run and scores an event's comment, resolved player
+names and action keywords against every asset through the inverted index, so
+picking an image costs a few dict lookups instead of an LLM round-trip.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from reference import ReferenceData
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+SCORE_RE = re.compile(r"(\d+), [^.,]+? (\d+)\.")
+ASSIST_RE = re.compile(r"Assisted by [^.]*\.?")
+
+STOPWORDS = frozenset(
+    "a an and at by during for from in into it of on onto out s the to with".split()
+)
+
+# Words an asset description is likely to use for each event type.
+EVENT_KEYWORDS: Dict[str, str] = {
+    "goal": "scores scoring celebrates",
+    "penalty goal": "scores scoring penalty celebrates",
+    "penalty won": "penalty",
+    "penalty lost": "penalty",
+    "attempt saved": "action",
+    "attempt blocked": "action",
+    "miss": "action",
+    "post": "action",
+    "lineup": "walks pitch",
+    "start": "walks pitch",
+    "end 2": "full time applauds",
+    "end 14": "full time applauds",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cases `text` and splits it into BM25 terms, dropping stopwords."""
+    terms = (t.removesuffix("'s") for t in TOKEN_RE.findall(text.lower()))
+    return [t for t in terms if t not in STOPWORDS]
+
+
+def _subject(description: str) -> str:
+    # Descriptions share a "PLACE - DATE: <subject> during a ... match" frame;
+    # only the subject tells the images apart.
+    _, _, subject = description.partition(": ")
+    subject, _, _ = (subject or description).partition(" during ")
+    return subject
+
+
+class AssetMatcher:
+    """
+    BM25 index over asset descriptions.
+
+    Attributes:
+        filenames (List[str]): Asset paths in index order ('assets/<filename>').
+        k1 (float): BM25 term-frequency saturation.
+        b (float): BM25 length normalisation.
+        min_score (float): Best scores below this are treated as no match, so
+            an event sharing only a team name with an asset is not illustrated
+            by it.
+    """
+
+    def __init__(
+        self,
+        assets: List[Dict[str, str]],
+        k1: float = 1.2,
+        b: float = 0.75,
+        min_score: float = 3.0,
+    ) -> None:
+        self.filenames = [f"assets/{a['filename']}" for a in assets]
+        self.k1 = k1
+        self.b = b
+        self.min_score = min_score
+
+        docs = [tokenize(_subject(a["description"])) for a in assets]
+        avg_len = sum(len(d) for d in docs) / len(docs) if docs else 0.0
+
+        # term -> [(doc index, precomputed BM25 weight)]
+        self._postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        doc_freq = Counter(term for doc in docs for term in set(doc))
+        n_docs = len(docs)
+        for i, doc in enumerate(docs):
+            norm = k1 * (1 - b + b * len(doc) / avg_len) if avg_len else k1
+            for term, tf in Counter(doc).items():
+                df = doc_freq[term]
+                idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                self._postings[term].append((i, idf * tf * (k1 + 1) / (tf + norm)))
+
+    @classmethod
+    def from_reference(cls, refs: ReferenceData) -> "AssetMatcher":
+        return cls(refs.assets)
+
+    def scores(self, query: str) -> List[float]:
+        """Returns the BM25 score of `query` against every asset."""
+        totals = [0.0] * len(self.filenames)
+        for term in tokenize(query):
+            for i, weight in self._postings.get(term, ()):
+                totals[i] += weight
+        return totals
+
+    def match(self, query: str) -> Optional[str]:
+        """
+        Returns the best matching asset path, or None when no asset reaches
+        `min_score`. Ties go to the asset listed first.
+        """
+        totals = self.scores(query)
+        if not totals:
+            return None
+        best = max(range(len(totals)), key=lambda i: (totals[i], -i))
+        return self.filenames[best] if totals[best] >= self.min_score else None
+
+    def match_event(self, msg: Dict[str, Any], refs: ReferenceData) -> Optional[str]:
+        """Scores an event using its comment, player and type keywords."""
+        return self.match(event_query(msg, refs))
+
+
+def event_query(msg: Dict[str, Any], refs: ReferenceData) -> str:
+    """
+    Builds the matcher query for an event: the comment without its assist
+    credit, the resolved name of the acting player, keywords for the event
+    type and the scoreline as 'X-Y'.
+    """
+    comment = msg.get("comment", "")
+    parts = [ASSIST_RE.sub("", comment), EVENT_KEYWORDS.get(msg.get("type", ""), "")]
+    name = refs.player_name(msg.get("playerRef1", ""))
+    if name:
+        parts.append(name)
+    score = SCORE_RE.search(comment)
+    if score:
+        parts.append(f"{score.group(1)}-{score.group(2)}")
+    return " ".join(parts)
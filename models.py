@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Annotated, Any, Dict, List, Optional, Union
 
-from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from pydantic import BaseModel, ConfigDict, Discriminator, Field, StringConstraints, Tag
 
 
 class CoverPage(BaseModel):
@@ -72,8 +72,28 @@ class InfoPage(BaseModel):
     body: Optional[str] = None
 
 
-# Union type for polymorphic page entries
-Page = Union[CoverPage, HighlightPage, InfoPage]
+PAGE_MODELS = (CoverPage, HighlightPage, InfoPage)
+
+
+def _page_type(value: Any) -> Optional[str]:
+    # Normalized like the `type` fields, so a padded or differently cased
+    # value is still checked (and reported) by the model it names.
+    if isinstance(value, dict):
+        page_type = value.get("type")
+        return page_type.strip().lower() if isinstance(page_type, str) else None
+    return getattr(value, "type", None)
+
+
+# Union type for polymorphic page entries, dispatched on `type` so each entry
+# is validated against one model instead of tried against each in turn.
+Page = Annotated[
+    Union[
+        Annotated[CoverPage, Tag("cover")],
+        Annotated[HighlightPage, Tag("highlight")],
+        Annotated[InfoPage, Tag("info")],
+    ],
+    Discriminator(_page_type),
+]
 
 
 class StoryPack(BaseModel):
@@ -97,3 +117,21 @@ class StoryPack(BaseModel):
     pages: List[Page] = Field(..., min_length=1)
     created_at: str 
     metrics: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_built_pages(cls, pages: List[Any], **fields: Any) -> "StoryPack":
+        """
+        Builds a pack from page model instances, which pydantic validated
+        when they were constructed, without validating every page a second
+        time. The other fields are validated as usual, so the pack holds the
+        same guarantees as one built through the constructor.
+
+        Anything other than a non-empty list of page models (e.g. dicts from
+        external input) goes through full validation.
+        """
+        if not pages or not all(type(page) in PAGE_MODELS for page in pages):
+            return cls(pages=pages, **fields)
+        header = cls(pages=pages[:1], **fields)
+        values = dict(header)
+        values["pages"] = list(pages)
+        return cls.model_construct(_fields_set=header.model_fields_set, **values)
@@ -0,0 +1,165 @@
+"""
+Story pack output: serialize once with pydantic's JSON serializer and write
+atomically, optionally compact and/or gzip-compressed.
+
+Large packs can instead be written sharded: a small manifest carrying the pack
+fields, the cover and a page index, plus page shards next to it, so a reader
+can show the cover straight away and fetch pages as they are needed.
+"""
+
+import glob
+import gzip
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from models import StoryPack
+
+GZIP_SUFFIX = ".gz"
+SHARD_FORMAT = "story-pack-shards"
+SHARD_VERSION = 1
+
+
+def serialize_pack(story: StoryPack, compact: bool = False) -> bytes:
+    """Returns the pack as UTF-8 JSON, indented unless `compact`."""
+    return story.model_dump_json(
+        exclude_none=True, indent=None if compact else 2
+    ).encode("utf-8")
+
+
+def output_path_for(path: str, use_gzip: bool = False) -> str:
+    """Appends the gzip suffix to `path` when compressing and it is missing."""
+    if use_gzip and not path.endswith(GZIP_SUFFIX):
+        return path + GZIP_SUFFIX
+    return path
+
+
+def write_bytes_atomic(path: str, data: bytes) -> None:
+    """Writes `data` to a temp file next to `path`, then renames it over."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".story-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_pack(
+    path: str,
+    story: StoryPack,
+    compact: bool = False,
+    use_gzip: bool = False,
+    data: Optional[bytes] = None,
+) -> str:
+    """
+    Writes the pack to `path` atomically and returns the path written (with
+    `.gz` appended when compressing). Pass `data` from `serialize_pack` to
+    reuse an existing serialization.
+
+    A path ending in `.gz` is always compressed.
+    """
+    path = output_path_for(path, use_gzip)
+    if data is None:
+        data = serialize_pack(story, compact=compact)
+    if path.endswith(GZIP_SUFFIX):
+        data = gzip.compress(data, mtime=0)
+    write_bytes_atomic(path, data)
+    return path
+
+
+def shard_path(manifest_path: str, number: int) -> str:
+    """Path of page shard `number` for a manifest, e.g. out/story.pages-0000.json."""
+    stem, _ = os.path.splitext(manifest_path)
+    return f"{stem}.pages-{number:04d}.json"
+
+
+def _page_index(page: Dict[str, Any]) -> Dict[str, Any]:
+    entry = {"type": page["type"], "headline": page["headline"]}
+    if "minute" in page:
+        entry["minute"] = page["minute"]
+    return entry
+
+
+def write_sharded_pack(
+    manifest_path: str, story: StoryPack, shard_size: int, compact: bool = False
+) -> List[str]:
+    """
+    Writes the pack as `shard_size`-page shards plus a manifest at
+    `manifest_path` and returns the paths written, manifest last.
+
+    Every file is written atomically and the manifest only after its shards,
+    so a reader never sees a manifest pointing at missing pages. Shards left
+    over from an earlier, larger pack are removed.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+    indent = None if compact else 2
+    pack = story.model_dump(mode="json", exclude_none=True)
+    pages = pack.pop("pages")
+
+    written, shards = [], []
+    for number, start in enumerate(range(0, len(pages), shard_size)):
+        path = shard_path(manifest_path, number)
+        chunk = pages[start:start + shard_size]
+        data = json.dumps({"start": start, "pages": chunk}, ensure_ascii=False, indent=indent)
+        write_bytes_atomic(path, data.encode("utf-8"))
+        written.append(path)
+        shards.append({"path": os.path.basename(path), "start": start, "count": len(chunk)})
+
+    manifest = {
+        "format": SHARD_FORMAT,
+        "version": SHARD_VERSION,
+        **pack,
+        "page_count": len(pages),
+        "shard_size": shard_size,
+        "cover": pages[0],
+        "index": [_page_index(page) for page in pages],
+        "shards": shards,
+    }
+    data = json.dumps(manifest, ensure_ascii=False, indent=indent)
+    write_bytes_atomic(manifest_path, data.encode("utf-8"))
+    written.append(manifest_path)
+
+    stem, _ = os.path.splitext(manifest_path)
+    for stale in glob.glob(glob.escape(stem) + ".pages-*.json"):
+        if stale not in written:
+            os.unlink(stale)
+    return written
+
+
+def read_sharded_pack(manifest_path: str) -> StoryPack:
+    """
+    Rebuilds the StoryPack written by `write_sharded_pack`. The result is
+    fully validated, as for any pack read from disk.
+
+    Raises:
+        ValueError: If the manifest is not a shard manifest or shards are
+            missing pages.
+    """
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != SHARD_FORMAT:
+        raise ValueError(f"{manifest_path} is not a sharded story pack manifest")
+
+    directory = os.path.dirname(manifest_path)
+    pages: List[Dict[str, Any]] = []
+    for shard in manifest["shards"]:
+        with open(os.path.join(directory, shard["path"]), encoding="utf-8") as f:
+            data = json.load(f)
+        if data["start"] != len(pages) or len(data["pages"]) != shard["count"]:
+            raise ValueError(f"Shard {shard['path']} does not match the manifest")
+        pages.extend(data["pages"])
+    if len(pages) != manifest["page_count"]:
+        raise ValueError(f"Shards hold {len(pages)} pages, expected {manifest['page_count']}")
+
+    fields = {
+        name: manifest[name]
+        for name in StoryPack.model_fields
+        if name != "pages" and name in manifest
+    }
+    return StoryPack.model_validate({**fields, "pages": pages})
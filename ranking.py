@@ -0,0 +1,356 @@
+"""
+Event scoring and top-K selection.
+
+A weights file is compiled once into a `RankingProfile`, a per-type table of
+weight, highlight flag and headline label plus the late-minute bonus rule.
+Profiles are immutable, cached per weights configuration and shared across
+matches and threads.
+"""
+
+import heapq
+import json
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from events import Event
+
+# This map translates the 'type' from match_events.json (schema)
+# into the event key used in weights.example.json.
+# This is necessary because the names don't always match.
+TYPE_TO_WEIGHT_KEY_MAP = {
+    "goal": "goal",
+    "penalty goal": "goal",          # Treat as a goal
+    "penalty lost": "penalty_missed", # 'penalty lost' in schema
+    "attempt saved": "shot_on_target",
+    "attempt blocked": "shot_on_target",
+    "miss": "chance",                 # 'miss' in schema, 'chance' in weights
+    "post": "chance",                 # 'post' in schema, 'chance' in weights
+    "yellow card": "card_yellow",
+    "red card": "card_red",           # Handle red cards if they appear
+    "substitution": "substitution",
+    "penalty won": "shot_on_target",  # A won penalty is a high-value event
+}
+
+# Headline labels for highlight pages; other highlight types use their
+# upper-cased type, e.g. "CORNER".
+HIGHLIGHT_LABELS = {
+    "goal": "GOAL!",
+    "penalty goal": "GOAL!",
+    "yellow card": "YELLOW CARD",
+    "red card": "RED CARD",
+    "attempt saved": "CHANCE!",
+    "attempt blocked": "CHANCE!",
+    "post": "CHANCE!",
+    "miss": "CHANCE!",
+    "penalty won": "PENALTY!",
+    "penalty lost": "PENALTY CONCEDED!",
+}
+GOAL_TYPES = frozenset({"goal", "penalty goal"})
+
+
+class TypeRule(NamedTuple):
+    """How one event type is scored and presented."""
+
+    weight: int
+    is_highlight: bool
+    is_goal: bool
+    label: str
+
+    def headline(self, minute: int, fragment: str) -> str:
+        """Page headline for an event of this type."""
+        if self.is_highlight:
+            return f"{minute}' {self.label} -- {fragment}"
+        return f"{minute}' {self.label}"
+
+
+class RankingProfile:
+    """
+    A weights configuration compiled for ranking and page building.
+
+    Attributes:
+        weights_data (Dict[str, Any]): The weights the profile was built from.
+        event_weights (Dict[str, int]): Weight per weights-file event key.
+        bonus_after (int): Minute after which the late bonus applies.
+        bonus_amount (int): Bonus added to scoring events after `bonus_after`.
+        max_pages (int): Number of events to select.
+    """
+
+    def __init__(self, weights_data: Dict[str, Any]) -> None:
+        self.weights_data = weights_data
+        self.event_weights: Dict[str, int] = dict(weights_data["event_weights"])
+        self.bonus_after: int = weights_data["late_minute_bonus_after"]
+        self.bonus_amount: int = weights_data["late_minute_bonus"]
+        self.max_pages: int = weights_data["max_pages"]
+
+        # Highlight types are those whose weight key, or the type itself,
+        # has a positive weight.
+        self._positive = {k for k, v in self.event_weights.items() if v > 0}
+        self._rules: Dict[str, TypeRule] = {}
+        for msg_type in list(TYPE_TO_WEIGHT_KEY_MAP) + list(self.event_weights):
+            self._rules[msg_type] = self._build_rule(msg_type)
+
+    def _build_rule(self, msg_type: str) -> TypeRule:
+        # If not in map, the type string itself is the weight key (e.g. "corner")
+        weight_key = TYPE_TO_WEIGHT_KEY_MAP.get(msg_type, msg_type)
+        is_highlight = weight_key in self._positive or msg_type in self._positive
+        if is_highlight:
+            label = HIGHLIGHT_LABELS.get(msg_type, msg_type.upper())
+        else:
+            label = f"Match {msg_type.capitalize()}"
+        return TypeRule(
+            self.event_weights.get(weight_key, 0),
+            is_highlight,
+            msg_type in GOAL_TYPES,
+            label,
+        )
+
+    def rule(self, msg_type: str) -> TypeRule:
+        """Returns the rule for `msg_type`, building it for unseen types."""
+        rule = self._rules.get(msg_type)
+        if rule is None:
+            # Deterministic, so a concurrent duplicate insert is harmless.
+            rule = self._rules.setdefault(msg_type, self._build_rule(msg_type))
+        return rule
+
+    def score(self, weight: int, minute: int) -> int:
+        """Applies the late-minute bonus (only to events that have a score)."""
+        if minute > self.bonus_after and weight > 0:
+            return weight + self.bonus_amount
+        return weight
+
+
+Weights = Union[Dict[str, Any], RankingProfile]
+
+
+@lru_cache(maxsize=128)
+def _compile_cached(key: str) -> RankingProfile:
+    return RankingProfile(json.loads(key))
+
+
+def compile_profile(weights: Weights) -> RankingProfile:
+    """
+    Returns the profile for a weights dict, reusing the one already compiled
+    for an equal configuration. Profiles are passed through unchanged.
+    """
+    if isinstance(weights, RankingProfile):
+        return weights
+    return _compile_cached(json.dumps(weights, sort_keys=True))
+
+
+def iter_scored_events(
+    messages: Iterable[Dict[str, Any]], weights_data: Weights
+) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    Yields a (score, minute, message) triple for every message.
+    """
+    profile = compile_profile(weights_data)
+    rule, score = profile.rule, profile.score
+
+    for msg in messages:
+        minute = int(msg.get("minute", 0))
+        yield score(rule(msg.get("type", "")).weight, minute), minute, msg
+
+
+def iter_scored_records(
+    events: Iterable["Event"], weights_data: Weights
+) -> Iterator[Tuple[int, int, "Event"]]:
+    """
+    `iter_scored_events` for normalized `events.Event` records, which carry
+    their integer minute already.
+    """
+    profile = compile_profile(weights_data)
+    rule, score = profile.rule, profile.score
+
+    for event in events:
+        yield score(rule(event.type).weight, event.minute), event.minute, event
+
+
+def select_top_scored(scored: Iterable[Tuple[int, int, Any]], limit: int) -> List[Any]:
+    """
+    Returns the items of the `limit` best (score, minute, item) triples in
+    chronological order; the selection step of `select_top_events`.
+    """
+    top = heapq.nlargest(limit, scored, key=lambda scored: (scored[0], scored[1]))
+    # Re-sort the selected events by minute (ascending) for chronological order
+    top.sort(key=lambda scored: scored[1])
+    return [msg for _, _, msg in top]
+
+
+def select_top_events(
+    messages: Iterable[Dict[str, Any]], weights_data: Weights
+) -> List[Dict[str, Any]]:
+    """
+    Returns the `max_pages` highest scoring messages in chronological order.
+
+    Messages are consumed as a stream and only the current top K are kept in a
+    bounded heap, so memory is O(K) and time O(n log K). Ranking is by score,
+    then minute, both descending; remaining ties go to the earlier message,
+    exactly as a stable descending sort of the full list would.
+    """
+    profile = compile_profile(weights_data)
+    return select_top_scored(iter_scored_events(messages, profile), profile.max_pages)
+
+
+def select_top_records(
+    events: Iterable["Event"], weights_data: Weights
+) -> List["Event"]:
+    """`select_top_events` for normalized `events.Event` records."""
+    profile = compile_profile(weights_data)
+    return select_top_scored(iter_scored_records(events, profile), profile.max_pages)
+
+
+def int_or_zero(value: Any) -> int:
+    """Converts a feed field to int; missing or malformed values become 0."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _message_row(msg: Dict[str, Any]) -> Tuple[str, int, int, int]:
+    # Same conversion (and errors) as iter_scored_events for minutes.
+    return (
+        msg.get("type", ""),
+        int(msg.get("minute", 0)),
+        int_or_zero(msg.get("period", 0)),
+        int_or_zero(msg.get("second", 0)),
+    )
+
+
+class EventColumns:
+    """
+    Columnar form of a message list for the NumPy scoring engine.
+
+    Built once per event set, after which every weights configuration is
+    scored with array operations instead of a pass over the messages.
+
+    Attributes:
+        messages (List[Dict[str, Any]]): The messages, in input order.
+        types (List[str]): Distinct message types; `type_codes` index into it.
+        type_codes (numpy.ndarray): Type code of each message.
+        minutes (numpy.ndarray): `minute` of each message.
+        periods (numpy.ndarray): `period` of each message (0 when missing).
+        seconds (numpy.ndarray): `second` of each message (0 when missing).
+    """
+
+    def __init__(self, messages: Iterable[Dict[str, Any]]) -> None:
+        import numpy as np
+
+        from events import Event
+
+        self.messages = list(messages)
+        rows = [
+            # type, minute, period and second are adjacent Event fields
+            m[1:5] if isinstance(m, Event) else _message_row(m)
+            for m in self.messages
+        ]
+        types, minutes, periods, seconds = zip(*rows) if rows else ((),) * 4
+
+        codes: Dict[str, int] = {}
+        self.type_codes = np.fromiter(
+            (codes.setdefault(t, len(codes)) for t in types),
+            dtype=np.int32,
+            count=len(rows),
+        )
+        self.types = list(codes)
+        self.minutes = np.array(minutes, dtype=np.int64)
+        self.periods = np.array(periods, dtype=np.int16)
+        self.seconds = np.array(seconds, dtype=np.int16)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        types: List[str],
+        type_codes: Any,
+        minutes: Any,
+        periods: Any,
+        seconds: Any,
+        messages: Any = (),
+    ) -> "EventColumns":
+        """Wraps arrays that are already in columnar form, e.g. from a store."""
+        import numpy as np
+
+        columns = cls.__new__(cls)
+        columns.messages = messages
+        columns.types = list(types)
+        columns.type_codes = np.asarray(type_codes, dtype=np.int32)
+        columns.minutes = np.asarray(minutes, dtype=np.int64)
+        columns.periods = np.asarray(periods, dtype=np.int16)
+        columns.seconds = np.asarray(seconds, dtype=np.int16)
+        return columns
+
+    def take(self, indices: Any) -> "EventColumns":
+        """Returns the columns of the events at `indices` (without messages)."""
+        return EventColumns.from_arrays(
+            self.types,
+            self.type_codes[indices],
+            self.minutes[indices],
+            self.periods[indices],
+            self.seconds[indices],
+        )
+
+    def __len__(self) -> int:
+        return len(self.type_codes)
+
+
+def score_columns(columns: EventColumns, weights_data: Weights):
+    """
+    Returns the scores `iter_scored_events` would give, as an int64 array.
+    """
+    import numpy as np
+
+    profile = compile_profile(weights_data)
+    type_weights = np.array(
+        [profile.rule(t).weight for t in columns.types], dtype=np.int64
+    )
+    scores = type_weights[columns.type_codes]
+    late = (columns.minutes > profile.bonus_after) & (scores > 0)
+    return scores + late * profile.bonus_amount
+
+
+def select_top_indices(columns: EventColumns, weights_data: Weights):
+    """
+    Returns the indices of the events `select_top_events` would pick, in the
+    same (chronological) order.
+    """
+    import numpy as np
+
+    profile = compile_profile(weights_data)
+    n, k = len(columns), profile.max_pages
+    if k <= 0 or n == 0:
+        return np.zeros(0, dtype=np.intp)
+    scores = score_columns(columns, profile)
+
+    # Only events scoring at least the k-th best score can be selected; rank
+    # those by score, then minute (descending), then input order.
+    candidates = np.arange(n)
+    if k < n:
+        threshold = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(scores >= threshold)
+    ranked = candidates[
+        np.lexsort((candidates, -columns.minutes[candidates], -scores[candidates]))
+    ][:k]
+    return ranked[np.argsort(columns.minutes[ranked], kind="stable")]
+
+
+def select_top_events_vectorized(
+    messages: Iterable[Dict[str, Any]], weights_data: Weights
+) -> List[Dict[str, Any]]:
+    """
+    NumPy implementation of `select_top_events`, returning the same events.
+    Prefer building `EventColumns` once and calling `select_top_indices` when
+    ranking one event set under many weights configurations.
+    """
+    columns = messages if isinstance(messages, EventColumns) else EventColumns(messages)
+    return [columns.messages[i] for i in select_top_indices(columns, weights_data)]
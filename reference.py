@@ -0,0 +1,84 @@
+"""
+Reference data shared across a run: squad lists and asset descriptions.
+
+The files are parsed once and indexed by player id and contestant id so that
+caption generation can resolve `playerRef`/`teamRef` fields with dict lookups.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+SQUAD_FILES: Tuple[str, ...] = (
+    "data/celtic-squad.json",
+    "data/kilmarnock-squad.json",
+)
+ASSET_DATA = "assets/asset_descriptions.json"
+
+
+class ReferenceData:
+    """
+    Parsed squad and asset files with lookup indexes.
+
+    Attributes:
+        players (Dict[str, Dict[str, Any]]): Person records keyed by player id.
+        teams (Dict[str, Dict[str, Any]]): Squad records keyed by contestant id.
+        player_team (Dict[str, str]): Contestant id keyed by player id.
+        assets (List[Dict[str, str]]): Asset 'filename'/'description' entries.
+    """
+
+    def __init__(
+        self, squads: List[Dict[str, Any]], assets: List[Dict[str, str]]
+    ) -> None:
+        self.players: Dict[str, Dict[str, Any]] = {}
+        self.teams: Dict[str, Dict[str, Any]] = {}
+        self.player_team: Dict[str, str] = {}
+        self.assets = assets
+
+        for squad in squads:
+            contestant_id = squad["contestantId"]
+            self.teams[contestant_id] = squad
+            for person in squad.get("person", []):
+                self.players[person["id"]] = person
+                self.player_team[person["id"]] = contestant_id
+
+    def player_name(self, player_id: str) -> Optional[str]:
+        """Returns 'First Last' for a player id, or None if unknown."""
+        person = self.players.get(player_id)
+        if person is None:
+            return None
+        return f"{person['firstName']} {person['lastName']}"
+
+    def team_name(self, contestant_id: str) -> Optional[str]:
+        """Returns the contestant name for a team id, or None if unknown."""
+        squad = self.teams.get(contestant_id)
+        if squad is None:
+            return None
+        return squad["contestantName"]
+
+
+def load_reference_data(
+    squad_files: Tuple[str, ...] = SQUAD_FILES, asset_file: str = ASSET_DATA
+) -> ReferenceData:
+    """
+    Reads the squad and asset files from disk and builds a ReferenceData.
+    """
+    squads: List[Dict[str, Any]] = []
+    for path in squad_files:
+        with open(path) as f:
+            squads.extend(json.load(f)["squad"])
+
+    with open(asset_file) as f:
+        assets = json.load(f)["assets"]
+
+    return ReferenceData(squads=squads, assets=assets)
+
+
+@lru_cache(maxsize=None)
+def get_reference_data(
+    squad_files: Tuple[str, ...] = SQUAD_FILES, asset_file: str = ASSET_DATA
+) -> ReferenceData:
+    """
+    Process-wide cached variant of `load_reference_data`.
+    """
+    return load_reference_data(squad_files=squad_files, asset_file=asset_file)
@@ -0,0 +1,342 @@
+"""
+Story service: builds story packs over HTTP from one long-running process.
+
+Weights, squads, asset descriptions, the schema validator and the heavy
+imports are loaded once when the service starts, so each request only pays
+for ranking, captioning and building its pack. Requests are handled on their
+own threads; the LLM provider and caption cache are shared between them.
+
+    POST /packs    body: a match document in the layout of
+                   data/match_events.json; returns the pack as JSON.
+                   ?profile=1 adds stage timings to the pack metrics.
+    GET  /stats    request counts, throughput and latency percentiles
+    GET  /health   liveness check
+
+Listens on TCP (`--host`/`--port`) or on a Unix socket (`--socket`).
+"""
+
+import http.client
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from cache import PRUNE_INTERVAL, CaptionCache
+from instrument import recording, span
+from matcher import AssetMatcher
+from models import StoryPack
+from output import serialize_pack
+from ranking import Weights, compile_profile
+from reference import ReferenceData, get_reference_data
+
+# Latencies kept for the percentiles reported by /stats.
+LATENCY_WINDOW = 10000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class BadRequest(ValueError):
+    """A request whose payload is not a usable match document."""
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class ServiceStats:
+    """
+    Thread-safe request counters and a window of recent latencies.
+
+    Attributes:
+        started (float): `time.monotonic()` when the service started.
+        requests (int): Completed pack requests.
+        errors (int): Pack requests that failed.
+        in_flight (int): Pack requests currently being built.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def begin(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def end(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts, throughput and p50/p90/p99/max latency in milliseconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            uptime = time.monotonic() - self.started
+            snapshot = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "in_flight": self.in_flight,
+                "uptime_s": round(uptime, 3),
+                "throughput_rps": round(self.requests / uptime, 3) if uptime else 0.0,
+            }
+        for name, pct in (("p50_ms", 50), ("p90_ms", 90), ("p99_ms", 99)):
+            snapshot[name] = round(percentile(latencies, pct) * 1000, 3)
+        snapshot["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else 0.0
+        return snapshot
+
+
+class StoryService:
+    """
+    Warm state shared by every request.
+
+    Attributes:
+        profile (RankingProfile): Compiled weights.
+        refs (ReferenceData): Squads and asset descriptions.
+        cache (Optional[CaptionCache]): Shared LLM response cache.
+        matcher (Optional[AssetMatcher]): Local asset matcher, if enabled.
+        validator: Compiled schema validator when `strict`, else None.
+        stats (ServiceStats): Request counters and latencies.
+        prune_interval (float): Minimum seconds between caption cache prunes;
+            the first pack built prunes it.
+    """
+
+    def __init__(
+        self,
+        weights_data: Weights,
+        refs: Optional[ReferenceData] = None,
+        caption_workers: int = 1,
+        rate_limit: Optional[float] = None,
+        cache: Optional[CaptionCache] = None,
+        matcher: Optional[AssetMatcher] = None,
+        batched_captions: bool = False,
+        strict: bool = False,
+        fast_validate: bool = False,
+        compact: bool = True,
+        near_duplicates: str = "drop",
+        prune_interval: float = PRUNE_INTERVAL,
+    ) -> None:
+        self.profile = compile_profile(weights_data)
+        self.refs = refs if refs is not None else get_reference_data()
+        self.cache = cache
+        self.matcher = matcher
+        self.compact = compact
+        self._caption_options = {
+            "caption_workers": caption_workers,
+            "rate_limit": rate_limit,
+            "batched_captions": batched_captions,
+            "near_duplicates": near_duplicates,
+        }
+        self.validator = None
+        if strict:
+            from validation import get_validator
+
+            self.validator = get_validator(trusted=fast_validate)
+        self.stats = ServiceStats()
+        self.prune_interval = prune_interval
+        self._warm_imports()
+
+    @staticmethod
+    def _warm_imports() -> None:
+        # Imported on the first LLM call otherwise, inside a request.
+        try:
+            from google.genai import types  # noqa: F401
+        except ImportError:
+            pass
+
+    def build(self, document: Any, source: str = "request", profile: bool = False) -> StoryPack:
+        """
+        Builds (and under `strict`, validates) the pack for a match document.
+
+        Raises:
+            BadRequest: If `document` is not in the match event file layout.
+        """
+        from main import buildStoryPack
+
+        match_info, messages = parse_match_document(document)
+        with recording() if profile else nullcontext():
+            story = buildStoryPack(
+                match_info,
+                messages,
+                self.profile,
+                source=source,
+                refs=self.refs,
+                cache=self.cache,
+                matcher=self.matcher,
+                **self._caption_options,
+            )
+            if self.validator is not None:
+                with span("validate"):
+                    self.validator.validate(story.model_dump(exclude_none=True))
+        if self.cache is not None:
+            # At most once per interval, so the cache stays within its bounds
+            # however long the service runs.
+            self.cache.maybe_prune(self.prune_interval)
+        return story
+
+    def handle_pack(self, body: bytes, source: str, profile: bool = False) -> Tuple[int, bytes]:
+        """Returns (HTTP status, response body) for a POST /packs request."""
+        self.stats.begin()
+        start = time.perf_counter()
+        status = 200
+        try:
+            try:
+                document = json.loads(body)
+            except ValueError as e:
+                raise BadRequest(f"Could not decode JSON: {e}") from e
+            payload = serialize_pack(self.build(document, source, profile), self.compact)
+        except Exception as e:
+            # Messages that fail conversion or validation are the client's.
+            status = 400 if isinstance(e, (BadRequest, ValueError, KeyError, TypeError)) else 500
+            payload = _error_body(e)
+        finally:
+            self.stats.end(time.perf_counter() - start, status == 200)
+        return status, payload
+
+
+def parse_match_document(document: Any) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Returns (matchInfo, messages) from a match document, like loadMatchEvents."""
+    try:
+        match_info = document["matchInfo"]
+        messages = document["messages"][0]["message"]
+    except (KeyError, IndexError, TypeError) as e:
+        raise BadRequest(f"Not a match event document: missing {e}") from e
+    if not isinstance(match_info, dict) or not isinstance(messages, list):
+        raise BadRequest("Not a match event document: bad matchInfo or messages")
+    return match_info, messages
+
+
+def _error_body(error: Exception) -> bytes:
+    return json.dumps({"error": type(error).__name__, "detail": str(error)}).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "StoryService/1"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> StoryService:
+        return self.server.service
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/stats":
+            self._send(200, json.dumps(self.service.stats.snapshot()).encode("utf-8"))
+        elif path == "/health":
+            self._send(200, b'{"status": "ok"}')
+        else:
+            self._send(404, b'{"error": "NotFound"}')
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/packs":
+            self.close_connection = True  # the unread body would follow
+            self._send(404, b'{"error": "NotFound"}')
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send(413, b'{"error": "PayloadTooLarge"}')
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        query = parse_qs(url.query)
+        source = query.get("source", ["request"])[0] or "request"
+        profile = query.get("profile", ["0"])[0] not in ("", "0", "false")
+        status, payload = self.service.handle_pack(body, source, profile)
+        self._send(status, payload)
+
+    def _send(self, status: int, payload: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Per-request logging would dominate under load; see /stats instead.
+        pass
+
+
+class StoryHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: StoryService) -> None:
+        self.service = service
+        super().__init__(address, _Handler)
+
+
+class StoryUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, service: StoryService) -> None:
+        self.service = service
+        if os.path.exists(path):
+            os.unlink(path)  # a stale socket from a previous run
+        super().__init__(path, _Handler)
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address.
+        return request, ("unix", 0)
+
+
+def make_server(
+    service: StoryService,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    socket_path: Optional[str] = None,
+) -> socketserver.BaseServer:
+    """Returns a threaded HTTP server for `service` (port 0 picks a free one)."""
+    if socket_path:
+        return StoryUnixServer(socket_path, service)
+    return StoryHTTPServer((host, port), service)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix socket, for clients of `--socket` services."""
+
+    def __init__(self, path: str, timeout: float = 60.0) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def serve(
+    service: StoryService,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    socket_path: Optional[str] = None,
+) -> None:
+    """Serves until interrupted, then prints the final stats."""
+    server = make_server(service, host, port, socket_path)
+    where = socket_path or "http://%s:%d" % server.server_address[:2]
+    print(f"Story service listening on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        print(json.dumps(service.stats.snapshot()))
@@ -0,0 +1,240 @@
+"""
+Compiled event store: match event files converted once into a columnar
+binary form, so later runs over an unchanged file skip JSON parsing.
+
+Each source file maps to one .npz file under STORE_DIR. It holds:
+  - the numeric columns (minute, period, second);
+  - one int32 column per string field, indexing a shared string table (a
+    UTF-8 blob plus offsets);
+  - a JSON header with the match info and the source's size, mtime and
+    SHA-256.
+An entry is used as is while the source's size and mtime are unchanged.
+Otherwise the source is hashed, and only re-parsed if its content changed.
+
+Loaded entries are `StoredEvents`. Scoring and selection run on the columns
+(`ranking.select_top_indices`), and only the records actually read are
+decoded. NumPy is required and is imported when a store is created.
+"""
+
+import hashlib
+import io
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+from events import Event, to_event
+from instrument import count
+from output import write_bytes_atomic
+from ranking import EventColumns
+
+STORE_DIR = ".cache/events"
+STORE_VERSION = 1
+STRING_FIELDS = (
+    "id",
+    "type",
+    "comment",
+    "time",
+    "playerRef1",
+    "playerRef2",
+    "teamRef1",
+    "teamRef2",
+)
+_POSITIONS = [Event._fields.index(field) for field in STRING_FIELDS]
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StoredEvents(Sequence):
+    """
+    The events of one compiled match file, as a sequence of `Event` records
+    decoded on access.
+
+    Attributes:
+        columns (EventColumns): Type codes, minutes, periods and seconds, for
+            ranking without decoding any record.
+    """
+
+    def __init__(self, arrays: Dict[str, Any]) -> None:
+        import numpy as np
+
+        self._strings = {field: arrays[f"s_{field}"] for field in STRING_FIELDS}
+        self._blob = arrays["blob"].tobytes()
+        self._offsets = arrays["offsets"].tolist()
+        self._minutes = arrays["minute"]
+        self._periods = arrays["period"]
+        self._seconds = arrays["second"]
+
+        type_ids, type_codes = np.unique(self._strings["type"], return_inverse=True)
+        self.columns = EventColumns.from_arrays(
+            [self._string(j) for j in type_ids.tolist()],
+            type_codes,
+            self._minutes,
+            self._periods,
+            self._seconds,
+            messages=self,
+        )
+
+    def identity_rows(self) -> Any:
+        """
+        (n, 7) array of each event's `dedup.event_identity` fields, with
+        strings as string table codes, followed by its comment's code.
+        """
+        import numpy as np
+
+        strings = self._strings
+        return np.column_stack(
+            [
+                strings["type"],
+                self._periods,
+                self._minutes,
+                self._seconds,
+                strings["playerRef1"],
+                strings["teamRef1"],
+                strings["comment"],
+            ]
+        ).astype(np.int64, copy=False)
+
+    def _string(self, j: int) -> Optional[str]:
+        if j < 0:
+            return None
+        return self._blob[self._offsets[j]:self._offsets[j + 1]].decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._minutes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = range(len(self))[i]
+        msg = {
+            field: value
+            for field in STRING_FIELDS
+            if (value := self._string(int(self._strings[field][i]))) is not None
+        }
+        msg["minute"] = int(self._minutes[i])
+        msg["period"] = int(self._periods[i])
+        msg["second"] = int(self._seconds[i])
+        return to_event(msg)
+
+
+def _columnize(messages: Iterable[Any]) -> Dict[str, Any]:
+    # Raises for messages that the columns cannot represent exactly
+    # (non-string ids, huge numbers, ...) or that do not normalize at all.
+    import numpy as np
+
+    events = [m if isinstance(m, Event) else to_event(m) for m in messages]
+    table: Dict[str, int] = {}
+    arrays: Dict[str, Any] = {}
+    for field, pos in zip(STRING_FIELDS, _POSITIONS):
+        column = []
+        for event in events:
+            value = event[pos]
+            if value is None:
+                column.append(-1)
+            elif type(value) is str:
+                column.append(table.setdefault(value, len(table)))
+            else:
+                raise TypeError(f"{field} is not a string: {value!r}")
+        arrays[f"s_{field}"] = np.array(column, dtype=np.int32)
+
+    encoded = [s.encode("utf-8") for s in table]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    arrays["offsets"] = offsets
+    arrays["blob"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    arrays["minute"] = np.array([e.minute for e in events], dtype=np.int64)
+    arrays["period"] = np.array([e.period for e in events], dtype=np.int64)
+    arrays["second"] = np.array([e.second for e in events], dtype=np.int64)
+    return arrays
+
+
+class EventStore:
+    """
+    Directory of compiled match event files.
+
+    Attributes:
+        directory (str): Folder holding one .npz per source file.
+    """
+
+    def __init__(self, directory: str = STORE_DIR) -> None:
+        import numpy  # noqa: F401  (fail early when NumPy is missing)
+
+        self.directory = directory
+
+    def path_for(self, source: str) -> str:
+        key = hashlib.sha256(os.path.abspath(source).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key[:32]}.npz")
+
+    def get(self, source: str) -> Optional[Tuple[Dict[str, Any], StoredEvents]]:
+        """
+        Returns (matchInfo, events) from the compiled copy of `source`, or
+        None when there is none or the source's content has changed.
+        """
+        import numpy as np
+
+        path = self.path_for(source)
+        try:
+            stat = os.stat(source)
+            with np.load(path, allow_pickle=False) as data:
+                header = json.loads(str(data["header"]))
+                if header.get("version") != STORE_VERSION:
+                    return None
+                touched = (stat.st_size, stat.st_mtime_ns) != (
+                    header["size"],
+                    header["mtime_ns"],
+                )
+                if touched and file_sha256(source) != header["sha256"]:
+                    return None
+                arrays = {name: data[name] for name in data.files if name != "header"}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if touched:
+            # Same content under a new mtime; record it to skip hashing next time.
+            header.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            self._write(path, header, arrays)
+        count("event_store_hits")
+        return header["match_info"], StoredEvents(arrays)
+
+    def put(
+        self, source: str, match_info: Dict[str, Any], messages: Iterable[Any]
+    ) -> Sequence[Any]:
+        """
+        Compiles parsed messages of `source` into the store and returns them as
+        `StoredEvents`. Messages the format cannot represent are returned as a
+        plain list and not stored.
+        """
+        stat = os.stat(source)
+        digest = file_sha256(source)
+        messages = list(messages)
+        count("event_store_misses")
+        try:
+            arrays = _columnize(messages)
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return messages
+
+        header = {
+            "version": STORE_VERSION,
+            "source": os.path.abspath(source),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+            "match_info": match_info,
+        }
+        self._write(self.path_for(source), header, arrays)
+        return StoredEvents(arrays)
+
+    @staticmethod
+    def _write(path: str, header: Dict[str, Any], arrays: Dict[str, Any]) -> None:
+        import numpy as np
+
+        buffer = io.BytesIO()
+        np.savez(buffer, header=np.array(json.dumps(header)), **arrays)
+        write_bytes_atomic(path, buffer.getvalue())
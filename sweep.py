@@ -0,0 +1,258 @@
+"""
+Sweep mode: rank one match's events under many weights configurations.
+
+Events are loaded and indexed once (as `ranking.EventColumns` when NumPy is
+available), then every configuration is scored and selected against that
+index in a process pool. No captions are generated, so a sweep only measures
+which events each configuration would put in the pack.
+
+A sweep spec is a weights file whose values may be lists, e.g.
+
+    {"event_weights": {"goal": [4, 5, 6], "chance": [1, 2]},
+     "late_minute_bonus_after": [70, 75, 80]}
+
+Every list is a grid axis; anything not in the spec keeps its value from the
+base weights file.
+"""
+
+import copy
+import random
+import time
+from itertools import combinations
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from events import Event
+from ranking import select_top_events, select_top_records
+from workers import run_in_pool
+
+Axis = Tuple[Tuple[str, ...], List[Any]]
+# Distinct selections (those chosen by the most trials) compared pairwise in
+# the report; the table grows with the square of this.
+OVERLAP_LIMIT = 50
+
+
+class Trial(NamedTuple):
+    """Outcome of ranking the events under one weights configuration."""
+
+    config: Dict[str, Any]
+    selected: Tuple[int, ...]
+    seconds: float
+
+
+# The event index this worker process ranks every trial against.
+_worker: Dict[str, Any] = {}
+
+
+def grid_axes(spec: Dict[str, Any]) -> List[Axis]:
+    """Returns the (path, values) pairs for every list in the spec."""
+    axes: List[Axis] = []
+    for key, value in spec.items():
+        if key == "event_weights":
+            for event, weight in value.items():
+                if isinstance(weight, list):
+                    axes.append((("event_weights", event), weight))
+        elif isinstance(value, list):
+            axes.append(((key,), value))
+    return axes
+
+
+def axis_name(path: Tuple[str, ...]) -> str:
+    return ".".join(path)
+
+
+def _apply(base: Dict[str, Any], spec: Dict[str, Any], choice: Sequence[Any], axes: List[Axis]):
+    weights = copy.deepcopy(base)
+    # Fixed (non-list) values in the spec override the base as well.
+    for key, value in spec.items():
+        if key == "event_weights":
+            for event, weight in value.items():
+                if not isinstance(weight, list):
+                    weights["event_weights"][event] = weight
+        elif not isinstance(value, list):
+            weights[key] = value
+    for (path, _), value in zip(axes, choice):
+        target = weights
+        for part in path[:-1]:
+            target = target[part]
+        target[path[-1]] = value
+    return weights
+
+
+def expand_configs(
+    spec: Dict[str, Any],
+    base: Dict[str, Any],
+    samples: Optional[int] = None,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Returns the weights configurations of the spec's grid, or `samples` of
+    them drawn without replacement (seeded, so sweeps are repeatable).
+    """
+    axes = grid_axes(spec)
+    sizes = [len(values) for _, values in axes]
+    total = 1
+    for size in sizes:
+        total *= size
+
+    if samples is not None and samples < total:
+        numbers = sorted(random.Random(seed).sample(range(total), samples))
+    else:
+        numbers = range(total)
+
+    configs = []
+    for number in numbers:
+        # Decode the grid position as a mixed-radix number, last axis fastest.
+        choice = []
+        for size in reversed(sizes):
+            number, digit = divmod(number, size)
+            choice.append(digit)
+        choice.reverse()
+        values = [values[digit] for (_, values), digit in zip(axes, choice)]
+        configs.append(_apply(base, spec, values, axes))
+    return configs
+
+
+def build_index(messages: List[Dict[str, Any]]) -> Any:
+    """
+    Returns the index trials rank against: EventColumns without the message
+    dicts when NumPy is installed, otherwise the messages themselves.
+    """
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return messages
+    from ranking import EventColumns
+
+    columns = EventColumns(messages)
+    # Trials only need the arrays; don't ship the messages to every worker.
+    columns.messages = []
+    return columns
+
+
+def _init_worker(index: Any) -> None:
+    _worker["index"] = index
+    if isinstance(index, list):
+        _worker["positions"] = {id(msg): i for i, msg in enumerate(index)}
+
+
+def _select(weights: Dict[str, Any]) -> Tuple[int, ...]:
+    index = _worker["index"]
+    if isinstance(index, list):
+        positions = _worker["positions"]
+        select = select_top_records if index and isinstance(index[0], Event) else select_top_events
+        return tuple(positions[id(msg)] for msg in select(index, weights))
+
+    from ranking import select_top_indices
+
+    return tuple(select_top_indices(index, weights).tolist())
+
+
+def _run_trial(job: Tuple[Dict[str, Any], Dict[str, Any]]) -> Trial:
+    label, weights = job
+    start = time.perf_counter()
+    selected = _select(weights)
+    return Trial(label, selected, time.perf_counter() - start)
+
+
+def config_label(weights: Dict[str, Any], axes: List[Axis]) -> Dict[str, Any]:
+    """The swept values of a configuration, keyed by dotted axis name."""
+    label = {}
+    for path, _ in axes:
+        value = weights
+        for part in path:
+            value = value[part]
+        label[axis_name(path)] = value
+    return label
+
+
+def run_sweep(
+    messages: List[Dict[str, Any]],
+    configs: List[Dict[str, Any]],
+    labels: List[Dict[str, Any]],
+    jobs: Optional[int] = None,
+) -> List[Trial]:
+    """
+    Ranks `messages` under every configuration over `jobs` processes (see
+    `workers.run_in_pool`). Trials come back in config order, each with the
+    input positions of the selected events.
+    """
+    index = build_index(messages)
+    work = list(zip(labels, configs))
+
+    return run_in_pool(
+        _run_trial, work, _init_worker, (index,), jobs, chunksize=max(1, len(work) // 64)
+    )
+
+
+def jaccard(a: Sequence[int], b: Sequence[int]) -> float:
+    """Overlap of two selections: |a & b| / |a | b| (1.0 when both are empty)."""
+    union = set(a) | set(b)
+    if not union:
+        return 1.0
+    return len(set(a) & set(b)) / len(union)
+
+
+def build_report(
+    messages: List[Dict[str, Any]],
+    trials: List[Trial],
+    baseline: Trial,
+    wall_seconds: float,
+    overlap_limit: int = OVERLAP_LIMIT,
+) -> Dict[str, Any]:
+    """
+    Summarises a sweep: every trial's selected event ids and overlap with the
+    baseline, the distinct selections the sweep produced and the pairwise
+    overlap between the `overlap_limit` selections most trials chose.
+    """
+    def event_ids(selected):
+        return [str(messages[i].get("id", i)) for i in selected]
+
+    distinct: Dict[Tuple[int, ...], List[int]] = {}
+    for n, trial in enumerate(trials):
+        distinct.setdefault(trial.selected, []).append(n)
+    selections = list(distinct)
+    position = {selected: n for n, selected in enumerate(selections)}
+    compared = sorted(
+        sorted(range(len(selections)), key=lambda n: -len(distinct[selections[n]]))[:overlap_limit]
+    )
+
+    return {
+        "events": len(messages),
+        "trials": len(trials),
+        "wall_seconds": round(wall_seconds, 6),
+        "trial_seconds": round(sum(t.seconds for t in trials), 6),
+        "baseline": event_ids(baseline.selected),
+        "results": [
+            {
+                "config": trial.config,
+                "selected": event_ids(trial.selected),
+                "overlap_with_baseline": round(jaccard(trial.selected, baseline.selected), 4),
+                "selection": position[trial.selected],
+                "seconds": round(trial.seconds, 6),
+            }
+            for trial in trials
+        ],
+        "selections": [
+            {"selected": event_ids(s), "trials": distinct[s]} for s in selections
+        ],
+        "selection_overlap": [
+            {"a": a, "b": b, "jaccard": round(jaccard(selections[a], selections[b]), 4)}
+            for a, b in combinations(compared, 2)
+        ],
+    }
+
+
+def print_report(report: Dict[str, Any], limit: int = 20) -> None:
+    """Prints the trials least like the baseline, then sweep totals."""
+    results = sorted(report["results"], key=lambda r: r["overlap_with_baseline"])
+    print(f"{'overlap':>7}  {'ms':>8}  config")
+    for r in results[:limit]:
+        config = ", ".join(f"{k}={v}" for k, v in r["config"].items())
+        print(f"{r['overlap_with_baseline']:>7.2f}  {r['seconds'] * 1000:>8.3f}  {config}")
+    if len(results) > limit:
+        print(f"... {len(results) - limit} more trials")
+    print(
+        f"{report['trials']} trials over {report['events']} events, "
+        f"{len(report['selections'])} distinct selections, "
+        f"{report['trial_seconds']:.3f}s of ranking in {report['wall_seconds']:.3f}s wall time"
+    )
@@ -0,0 +1,44 @@
+"""
+Shared test doubles.
+"""
+
+import threading
+import time
+
+import pytest
+
+
+class FakeModels:
+    """Stands in for `client.models`, sleeping `latency` seconds per request."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, model, contents, config):
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self._in_flight -= 1
+        if "asset description input data" in contents:
+            text = "assets/fake.jpg\n"
+        else:
+            text = f"caption for {contents.splitlines()[1]}"
+        return type("Response", (), {"text": text})()
+
+
+class FakeClient:
+    def __init__(self, latency=0.0):
+        self.models = FakeModels(latency)
+
+
+@pytest.fixture
+def fake_client():
+    """Factory for a local fake LLM client: `fake_client(latency=0.0)`."""
+    return FakeClient
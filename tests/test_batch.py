@@ -0,0 +1,89 @@
+"""
+Tests for batch story pack generation.
+"""
+
+import json
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from batch import resolve_inputs, run_batch
+from main import INPUT_DATA, loadWeights
+from reference import get_reference_data
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    match_dir = tmp_path / "matches"
+    match_dir.mkdir()
+    for name in ("a.json", "b.json"):
+        shutil.copy(INPUT_DATA, match_dir / name)
+    (match_dir / "broken.json").write_text("{not json")
+    (match_dir / "notes.txt").write_text("ignored")
+    return match_dir
+
+
+@pytest.fixture
+def options(tmp_path):
+    return {
+        "workers": 1,
+        "rate_limit": None,
+        "no_cache": True,
+        "asset_matcher": "local",
+        "stream": False,
+        "strict": True,
+        "fast_validate": False,
+        "compact": False,
+        "gzip": False,
+        "profile": True,
+        "batched_captions": False,
+        "stub_llm": False,
+        "event_store": False,
+        "near_duplicates": "drop",
+        "output_dir": str(tmp_path / "packs"),
+    }
+
+
+def test_resolve_inputs_accepts_directory_and_glob(inputs):
+    names = [p.rsplit("/", 1)[-1] for p in resolve_inputs(str(inputs))]
+    assert names == ["a.json", "b.json", "broken.json"]
+    assert resolve_inputs(str(inputs / "[ab].json")) == [
+        str(inputs / "a.json"),
+        str(inputs / "b.json"),
+    ]
+
+
+def test_run_batch_writes_one_pack_per_match(inputs, options):
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")):
+        results = run_batch(
+            resolve_inputs(str(inputs)),
+            loadWeights(),
+            get_reference_data(),
+            options,
+            jobs=1,
+        )
+
+    assert [r.error is None for r in results] == [True, True, False]
+    for result in results[:2]:
+        with open(result.output_path) as f:
+            pack = json.load(f)
+        assert pack["source"] == result.input_path
+        assert len(pack["pages"]) == result.pages == 8
+        assert {"load", "select", "caption", "build"} <= set(pack["metrics"]["timings"])
+    assert results[2].output_path is None
+
+
+def test_run_batch_prunes_the_cache(inputs, options, tmp_path, monkeypatch):
+    weights_data, refs = loadWeights(), get_reference_data()
+    monkeypatch.chdir(tmp_path)
+    stale = tmp_path / ".cache" / "llm" / "ab" / "stale.json"
+    stale.parent.mkdir(parents=True)
+    stale.write_text('{"text": "old"}')
+    os.utime(stale, (0, 0))
+
+    options.update(no_cache=False, strict=False)
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")):
+        run_batch(resolve_inputs(str(inputs / "a.json")), weights_data, refs, options, jobs=1)
+    assert not stale.exists()
@@ -0,0 +1,113 @@
+"""
+Tests for batched captioning against the offline stub model.
+"""
+
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+import main
+from batch import run_batch
+from cache import CaptionCache
+from generate import generate_captions, generate_captions_batched, parse_batch_response
+from llm import STUB_ASSET, ClientProvider, StubClient, set_provider
+from main import INPUT_DATA, captionEvents
+from reference import ReferenceData
+
+
+@pytest.fixture
+def refs():
+    return ReferenceData(squads=[], assets=[{"filename": "fake.jpg", "description": "x"}])
+
+
+@pytest.fixture
+def messages():
+    return [
+        {"id": str(100 + m), "type": "goal", "minute": str(m), "comment": f"Goal at {m}"}
+        for m in (10, 20, 30, 40, 50)
+    ]
+
+
+def test_batched_matches_per_event_captions(refs, messages):
+    per_event = generate_captions(messages, refs, StubClient())
+    client = StubClient()
+    batched = generate_captions_batched(messages, refs, client)
+
+    assert batched == per_event
+    assert batched[2] == (STUB_ASSET, "Goal at 30")
+    # One request instead of a caption and an asset request per event.
+    assert client.models.calls == 1
+
+
+def test_batched_falls_back_for_missing_events(refs, messages):
+    client = StubClient(skip_ids={"120", "140"})
+    batched = generate_captions_batched(messages, refs, client)
+
+    assert batched == generate_captions(messages, refs, StubClient())
+    assert client.models.calls == 1 + 2 * 2
+
+
+def test_batched_repeat_is_served_from_cache(refs, messages, tmp_path):
+    cache = CaptionCache(directory=str(tmp_path))
+    generate_captions_batched(messages, refs, StubClient(), cache=cache)
+
+    client = StubClient()
+    generate_captions_batched(messages, refs, client, cache=cache)
+    assert client.models.calls == 0
+
+
+def test_caption_events_batched(refs, messages):
+    client = StubClient()
+    set_provider(ClientProvider(client=client))
+    try:
+        captions = captionEvents(messages, refs, batched=True)
+    finally:
+        set_provider(None)
+    assert [caption for _, caption in captions] == [m["comment"] for m in messages]
+    assert client.models.calls == 1
+
+
+def test_stub_runs_leave_the_cache_empty(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = os.path.dirname(main.__file__)
+    for name in ("data", "schema", "assets", "weights.example.json"):
+        os.symlink(os.path.join(root, name), name)
+    os.mkdir("matches")
+    shutil.copy(os.path.join(root, INPUT_DATA), "matches/a.json")
+
+    try:
+        with patch("sys.argv", ["main.py", "--stub-llm", "-o", "out/story.json"]):
+            main.main()
+        options = {
+            "workers": 1, "rate_limit": None, "no_cache": False, "asset_matcher": "llm",
+            "stream": False, "strict": False, "fast_validate": False, "compact": False,
+            "gzip": False, "profile": False, "batched_captions": False, "stub_llm": True,
+            "event_store": False, "near_duplicates": "drop", "output_dir": "packs",
+        }
+        results = run_batch(["matches/a.json"], main.loadWeights(), None, options, jobs=1)
+    finally:
+        set_provider(None)
+
+    assert os.path.exists("out/story.json")
+    assert results[0].error is None
+    # Canned answers would otherwise be served to later real runs.
+    assert not os.path.exists(".cache")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '[{"id": "1", "caption": "A", "asset": "assets/a.jpg"}]',
+        '```json\n[{"id": "1", "caption": "A", "asset": "assets/a.jpg"}]\n```',
+        '{"events": [{"id": 1, "caption": "A", "asset": "assets/a.jpg"}, "junk"]}',
+    ],
+)
+def test_parse_batch_response(text):
+    assert parse_batch_response(text) == {"1": ("assets/a.jpg", "A")}
+
+
+@pytest.mark.parametrize("text", [None, "", "not json", "[1, 2]", '[{"id": "1"}]'])
+def test_parse_batch_response_malformed(text):
+    assert parse_batch_response(text) == {}
@@ -0,0 +1,102 @@
+"""
+Tests for the on-disk LLM response cache.
+"""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from cache import CaptionCache
+from generate import generate_caption, generate_captions
+from main import getStoryData
+from reference import ReferenceData
+
+
+@pytest.fixture
+def refs():
+    return ReferenceData(squads=[], assets=[{"filename": "fake.jpg", "description": "x"}])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CaptionCache(directory=str(tmp_path / "cache"))
+
+
+def test_key_changes_with_prompt_inputs():
+    base = CaptionCache.key("model-a", "system", "goal\ncomment: Goal!\n")
+    assert base == CaptionCache.key("model-a", "system", "goal\ncomment: Goal!\n")
+    assert base != CaptionCache.key("model-b", "system", "goal\ncomment: Goal!\n")
+    assert base != CaptionCache.key("model-a", "other", "goal\ncomment: Goal!\n")
+    assert base != CaptionCache.key("model-a", "system", "miss\ncomment: Goal!\n")
+
+
+def test_rerun_is_served_from_cache(refs, cache, fake_client):
+    msg = {"type": "goal", "minute": "10", "comment": "Goal!"}
+    first_client = fake_client()
+    first = generate_caption(msg, refs, first_client, cache=cache)
+    assert first_client.models.calls == 2
+    assert cache.stats() == {"cache_hits": 0, "cache_misses": 2}
+
+    second_client = fake_client()
+    assert generate_captions([msg], refs, second_client, cache=cache) == [first]
+    assert second_client.models.calls == 0
+    assert cache.stats() == {"cache_hits": 2, "cache_misses": 2}
+
+
+def test_expired_entries_are_misses_and_pruned(cache):
+    key = CaptionCache.key("m", "s", "c")
+    cache.put(key, "text")
+    assert cache.get(key) == "text"
+
+    old = time.time() - cache.max_age - 1
+    os.utime(cache._path(key), (old, old))
+    assert cache.get(key) is None
+    assert cache.prune() == 1
+    assert not os.path.exists(cache._path(key))
+
+
+def test_prune_drops_oldest_entries_over_size_limit(cache):
+    keys = [CaptionCache.key("m", "s", str(i)) for i in range(3)]
+    for age, key in zip((30, 20, 10), keys):
+        cache.put(key, "x" * 100)
+        stamp = time.time() - age
+        os.utime(cache._path(key), (stamp, stamp))
+
+    cache.max_bytes = 2 * os.path.getsize(cache._path(keys[0]))
+    assert cache.prune() == 1
+    assert [cache.get(key) for key in keys] == [None, "x" * 100, "x" * 100]
+
+
+def test_cache_counters_reported_in_metrics(cache):
+    weights = {
+        "event_weights": {"goal": 5},
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 1,
+    }
+    def fake_generate_caption(msg, refs, cache, matcher):
+        cache.put("hit", "a.jpg")
+        cache.get("hit"), cache.get("hit"), cache.get("miss")
+        return ("a.jpg", "caption")
+
+    cache.hits, cache.misses = 10, 10  # from an earlier pack
+    messages = [{"type": "goal", "minute": "5", "comment": "Goal"}]
+    with patch("main.generate_caption", side_effect=fake_generate_caption) as mock_gen:
+        _, metrics = getStoryData(
+            {"description": "A vs B"}, messages, weights, cache=cache
+        )
+    assert metrics["cache_hits"] == 2
+    assert metrics["cache_misses"] == 1
+    assert mock_gen.call_args.kwargs["cache"] is cache
+
+
+def test_maybe_prune_runs_at_most_once_per_interval(cache):
+    key = CaptionCache.key("m", "s", "c")
+    old = time.time() - cache.max_age - 1
+    for expected in (1, 0):
+        cache.put(key, "text")
+        os.utime(cache._path(key), (old, old))
+        assert cache.maybe_prune(3600) == expected
+    assert cache.maybe_prune(0) == 1
@@ -0,0 +1,109 @@
+"""
+Tests for duplicate event removal.
+"""
+
+import json
+import random
+from unittest.mock import patch
+
+import pytest
+
+from dedup import Deduplicator, first_occurrences
+from events import to_event
+from live import LiveStory
+from main import createStoryPack
+
+
+def _msg(i, minute, comment="Goal!", player="p1", msg_type="goal"):
+    return {
+        "id": str(i),
+        "type": msg_type,
+        "period": "1",
+        "minute": str(minute),
+        "second": "12",
+        "playerRef1": player,
+        "teamRef1": "t1",
+        "comment": comment,
+    }
+
+
+def test_drop_rule_drops_repeats_and_near_duplicates():
+    dedup = Deduplicator("drop")
+    messages = [
+        _msg(1, 10),
+        _msg(2, 10),  # re-sent under a new id
+        _msg(3, 10, comment="Goal! Reworded."),
+        _msg(4, 10, player="p2"),  # a different event
+        to_event(_msg(5, 10)),  # records share the identity of their message
+    ]
+    assert [m.get("id") for m in dedup.filter(messages)] == ["1", "4"]
+    assert dedup.metrics() == {"duplicates_dropped": 2, "near_duplicates_dropped": 1}
+
+
+def test_keep_rule_only_drops_exact_repeats():
+    dedup = Deduplicator("keep")
+    messages = [_msg(1, 10), _msg(2, 10, comment="Other."), _msg(3, 10, comment="Other.")]
+    assert [m["id"] for m in dedup.filter(messages)] == ["1", "2"]
+    assert dedup.metrics() == {"duplicates_dropped": 1, "near_duplicates_dropped": 0}
+
+
+def test_window_bounds_the_index():
+    dedup = Deduplicator(window=2)
+    kept = list(dedup.filter([_msg(1, 1), _msg(2, 2), _msg(3, 3), _msg(4, 1)]))
+    assert len(dedup._seen) == 2
+    # Minute 1 fell out of the window, so its repeat is no longer caught.
+    assert [m["id"] for m in kept] == ["1", "2", "3", "4"]
+
+
+def test_unknown_rule_is_rejected():
+    with pytest.raises(ValueError):
+        Deduplicator("merge")
+
+
+@pytest.mark.parametrize("rule", ["drop", "keep"])
+def test_columnar_dedup_matches_streaming(rule):
+    np = pytest.importorskip("numpy")
+    rng = random.Random(7)
+    rows = np.array(
+        [[rng.randint(0, 2) for _ in range(6)] + [rng.randint(0, 2)] for _ in range(500)]
+    )
+    messages = [
+        {
+            "type": str(r[0]), "period": r[1], "minute": r[2], "second": r[3],
+            "playerRef1": str(r[4]), "teamRef1": str(r[5]), "comment": str(r[6]),
+        }
+        for r in rows.tolist()
+    ]
+    dedup = Deduplicator(rule)
+    expected = [i for i, msg in enumerate(messages) if not dedup.is_duplicate(msg)]
+
+    keep, dropped = first_occurrences(rows, rule)
+    assert keep.tolist() == expected
+    assert dropped == dedup.metrics()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_pack_has_no_duplicate_highlights(tmp_path, stream):
+    path = tmp_path / "match.json"
+    messages = [_msg(1, 10), _msg(2, 10), _msg(3, 20), _msg(4, 10, comment="Reworded.")]
+    match_info = {"id": "m", "description": "A vs B", "date": "2025-11-09Z"}
+    path.write_text(json.dumps({"matchInfo": match_info, "messages": [{"message": messages}]}))
+
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")):
+        story = createStoryPack(input_path=str(path), stream=stream)
+    assert [page.minute for page in story.pages[1:]] == [10, 20]
+    assert story.metrics["duplicates_dropped"] == 1
+    assert story.metrics["near_duplicates_dropped"] == 1
+
+
+def test_live_story_drops_repeats_under_new_ids():
+    weights_data = {
+        "event_weights": {"goal": 5},
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 5,
+    }
+    story = LiveStory({"id": "m", "description": "A vs B", "date": "2025-11-09Z"}, weights_data, "feed")
+    story.add([_msg(1, 10), _msg(2, 20)])
+    assert story.add([_msg(3, 10), _msg(4, 30)]) == 1
+    assert [msg["id"] for _, msg in story.selection()] == ["1", "2", "4"]
@@ -0,0 +1,127 @@
+"""
+Tests for the caption factual-consistency evaluator.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from evaluate import (
+    NameIndex,
+    _allowed_minutes,
+    build_report,
+    check_caption,
+    evaluate_pack,
+    resolve_packs,
+    run_evaluation,
+)
+from events import to_event
+from main import INPUT_DATA, createStoryPack
+from models import StoryPack
+from output import write_pack, write_sharded_pack
+from reference import get_reference_data
+
+
+@pytest.fixture(scope="module")
+def index():
+    return NameIndex.from_reference(get_reference_data())
+
+
+@pytest.fixture(scope="module")
+def pack():
+    # Captions repeat the event's own commentary, so every fact is right.
+    with patch("main.generate_caption", lambda msg, *args, **kwargs: ("a.jpg", msg.get("comment"))):
+        story = createStoryPack(input_path=INPUT_DATA)
+    return story.model_dump(mode="json", exclude_none=True)
+
+
+def _highlights(pack):
+    return [i for i, page in enumerate(pack["pages"]) if page["type"] == "highlight"]
+
+
+def _with_caption(pack, number, caption):
+    pages = [dict(page) for page in pack["pages"]]
+    pages[number]["caption"] = caption
+    return dict(pack, pages=pages)
+
+
+def test_name_index_resolves_variants(index):
+    players, teams = index.mentions("Goal! Celtic 1, Kilmarnock 0. Johnny Kenny (Celtic) scores. Kenny again!")
+    assert [name for name, _ in players] == ["Johnny Kenny", "Kenny"]
+    assert len({ids for _, ids in players}) == 1
+    assert [name for name, _ in teams] == ["Celtic", "Kilmarnock", "Celtic"]
+
+
+def test_commentary_captions_are_consistent(pack, index):
+    captions, consistent, issues = evaluate_pack(pack, INPUT_DATA, index)
+    assert captions == len(_highlights(pack)) > 0
+    assert (consistent, issues) == (captions, [])
+
+
+def test_wrong_facts_are_reported(pack, index):
+    number = _highlights(pack)[0]
+    page = pack["pages"][number]
+    caption = page["caption"]
+    other = next(
+        name for name, ids in index.players.items()
+        if " " in name and not any(part in caption for part in name.split())
+    )
+
+    cases = {
+        "minute": caption + f" A moment to remember in the {page['minute'] + 30}th minute.",
+        "not in the event": caption + f" {other} watched on.",
+        "does not name": "A great moment for the home side.",
+    }
+    for expected, wrong in cases.items():
+        captions, consistent, issues = evaluate_pack(_with_caption(pack, number, wrong), INPUT_DATA, index)
+        assert consistent == captions - 1
+        assert [n for n, _ in issues] == [number]
+        assert expected in issues[0][1]
+
+    moved = _with_caption(pack, number, caption)
+    moved["pages"][number]["minute"] += 1
+    _, _, issues = evaluate_pack(moved, INPUT_DATA, index)
+    assert "no source event" in issues[0][1]
+
+
+def test_run_evaluation_reports_per_pack_accuracy(tmp_path, pack, index):
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps(pack))
+    number = _highlights(pack)[0]
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps(_with_caption(pack, number, "Nobody scores.")))
+    write_sharded_pack(str(tmp_path / "sharded.json"), StoryPack.model_validate(pack), 3)
+    write_pack(str(tmp_path / "zipped.json"), StoryPack.model_validate(pack), use_gzip=True)
+    (tmp_path / "broken.json").write_text(json.dumps(dict(pack, source=str(tmp_path / "missing.json"))))
+    (tmp_path / "report.json").write_text(json.dumps({"packs": [], "totals": {}}))
+    (tmp_path / "list.json").write_text("[]")
+
+    paths = resolve_packs(str(tmp_path))
+    assert [p.rsplit("/", 1)[-1] for p in paths] == [
+        "bad.json", "broken.json", "good.json", "sharded.json", "zipped.json.gz",
+    ]
+    results = run_evaluation(paths, get_reference_data(), jobs=1)
+    by_name = {r.pack_path.rsplit("/", 1)[-1]: r for r in results}
+    total = len(_highlights(pack))
+    assert by_name["good.json"].accuracy == by_name["sharded.json"].accuracy == 1.0
+    assert by_name["zipped.json.gz"].consistent == total
+    assert by_name["bad.json"].consistent == total - 1
+    assert by_name["broken.json"].error is not None
+
+    report = build_report(results, 0.5)
+    assert report["totals"]["captions"] == 4 * total
+    assert report["totals"]["packs_per_second"] == 10
+    assert report["packs"][0]["issues"][0]["page"] == number
+
+
+def test_feed_stoppage_time_format(index):
+    event = to_event({
+        "type": "goal", "minute": "92", "time": "90'+3'", "comment": "Goal!",
+        "playerRef1": "unknown-player",
+    })
+    assert 93 in _allowed_minutes(event)
+    assert check_caption("Goal at 90'+3' to seal it.", event, index, frozenset()) == []
+    assert check_caption("Goal in the 90+2 minute.", event, index, frozenset()) == []
+    issues = check_caption("Goal at 90'+5'!", event, index, frozenset())
+    assert issues == ["minute 90'+5' but the event is at 92"]
@@ -0,0 +1,85 @@
+"""
+Tests for normalized event records.
+"""
+
+import random
+
+import pytest
+
+from events import Event, normalize_events, to_event
+from ranking import TYPE_TO_WEIGHT_KEY_MAP, select_top_events, select_top_records
+
+
+@pytest.fixture
+def weights_data():
+    return {
+        "event_weights": {"goal": 5, "shot_on_target": 3, "chance": 2, "card_yellow": 1},
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 7,
+    }
+
+
+@pytest.fixture
+def messages():
+    rng = random.Random(5)
+    types = list(TYPE_TO_WEIGHT_KEY_MAP) + ["corner"]
+    return [
+        {
+            "id": str(i),
+            "type": rng.choice(types),
+            "minute": str(rng.choice([10, 80, 90])),
+            "period": "2",
+            "second": "7",
+            "comment": f"Event {i}. More detail.",
+        }
+        for i in range(300)
+    ]
+
+
+def test_message_is_normalized_once():
+    event = to_event(
+        {
+            "id": "1",
+            "type": "penalty goal",
+            "minute": "88",
+            "period": "2",
+            "comment": "Goal! Celtic 2, Kilmarnock 0. Scored.",
+            "playerRef1": "p1",
+            "timestamp": "2025-11-09T17:53:02Z",
+        }
+    )
+    assert (event.minute, event.period, event.second) == (88, 2, 0)
+    assert event.weight_key == "goal"
+    assert event.headline_fragment == "Goal! Celtic 2, Kilmarnock 0"
+    # Reads like the raw message for shared prompt-building code.
+    assert event.get("time", "") == ""
+    assert event.get("playerRef1", "") == "p1"
+    assert event.get("playerRef2", "") == ""
+    assert event.get("timestamp") is None
+
+
+def test_bad_minute_is_rejected_like_the_dict_path():
+    with pytest.raises(ValueError):
+        to_event({"type": "goal", "minute": "soon"})
+
+
+def test_record_selection_matches_dict_selection(messages, weights_data):
+    records = list(normalize_events(messages))
+    assert list(normalize_events(records)) == records
+    for max_pages in (0, 1, 7, 400):
+        weights_data["max_pages"] = max_pages
+        expected = [to_event(m) for m in select_top_events(messages, weights_data)]
+        assert select_top_records(records, weights_data) == expected
+
+
+def test_columns_from_records_match_columns_from_dicts(messages):
+    np = pytest.importorskip("numpy")
+    from ranking import EventColumns
+
+    from_dicts = EventColumns(messages)
+    from_records = EventColumns(normalize_events(messages))
+    assert from_dicts.types == from_records.types
+    for name in ("type_codes", "minutes", "periods", "seconds"):
+        assert np.array_equal(getattr(from_dicts, name), getattr(from_records, name))
+    assert isinstance(from_records.messages[0], Event)
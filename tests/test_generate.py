@@ -0,0 +1,97 @@
+"""
+Tests for caption generation against a local fake LLM client.
+"""
+
+import time
+
+import pytest
+
+from generate import RateLimiter, generate_caption, generate_captions
+from llm import ClientProvider, set_provider
+from main import captionEvents, getStoryData
+from reference import ReferenceData
+
+
+@pytest.fixture
+def refs():
+    return ReferenceData(squads=[], assets=[{"filename": "fake.jpg", "description": "x"}])
+
+
+@pytest.fixture
+def messages():
+    return [
+        {"type": "goal", "minute": str(m), "comment": f"Goal at {m}"}
+        for m in (10, 20, 30, 40, 50)
+    ]
+
+
+def test_generate_captions_matches_sequential_order(refs, messages, fake_client):
+    client = fake_client()
+    sequential = [generate_caption(msg, refs, client) for msg in messages]
+    concurrent = generate_captions(messages, refs, client, max_workers=4)
+    assert concurrent == sequential
+    assert concurrent[2] == ("assets/fake.jpg", "caption for comment: Goal at 30")
+
+
+def test_generate_captions_overlaps_requests(refs, messages, fake_client):
+    client = fake_client(latency=0.05)
+    start = time.perf_counter()
+    generate_captions(messages, refs, client, max_workers=10)
+    elapsed = time.perf_counter() - start
+
+    assert client.models.calls == 2 * len(messages)
+    assert client.models.max_in_flight == 10
+    # Sequentially this would take 10 x 50ms.
+    assert elapsed < 0.25
+
+
+def test_generate_captions_respects_worker_bound(refs, messages, fake_client):
+    client = fake_client(latency=0.01)
+    generate_captions(messages, refs, client, max_workers=2)
+    assert client.models.max_in_flight <= 2
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(rate=100)
+    start = time.perf_counter()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_get_story_data_concurrent_keeps_chronological_pages(refs, messages, fake_client):
+    weights = {
+        "event_weights": {"goal": 5},
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 5,
+    }
+    match_info = {"description": "A vs B"}
+    set_provider(ClientProvider(client=fake_client(0.01)))
+    try:
+        pages, metrics = getStoryData(
+            match_info, list(reversed(messages)), weights, refs, caption_workers=4
+        )
+    finally:
+        set_provider(None)
+    assert [p.minute for p in pages[1:]] == [10, 20, 30, 40, 50]
+    assert pages[1].caption == "caption for comment: Goal at 10"
+    assert pages[1].image == "assets/fake.jpg"
+    assert metrics["llm_calls"] == 10
+    assert metrics["llm_retries"] == 0
+
+
+def test_rate_limit_applies_to_sequential_captions(refs, messages, fake_client):
+    client = fake_client()
+    set_provider(ClientProvider(client=client))
+    try:
+        start = time.perf_counter()
+        captionEvents(messages[:3], refs, caption_workers=1, rate_limit=40)
+        elapsed = time.perf_counter() - start
+    finally:
+        set_provider(None)
+
+    # Six requests spaced 25ms apart.
+    assert client.models.calls == 6
+    assert client.models.max_in_flight == 1
+    assert elapsed >= 5 * 0.025
@@ -0,0 +1,73 @@
+"""
+Tests for incremental match event ingestion.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from ingest import _iter_json_document, stream_match_events
+from main import INPUT_DATA, createStoryPack
+
+
+@pytest.fixture
+def match_data():
+    with open(INPUT_DATA) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_incremental_parse_matches_json_load(match_data, chunk_size):
+    with open(INPUT_DATA) as f:
+        records = list(_iter_json_document(f, chunk_size))
+    assert records[0] == ("matchInfo", match_data["matchInfo"])
+    assert [value for _, value in records[1:]] == match_data["messages"][0]["message"]
+
+
+def test_messages_are_parsed_lazily(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_text(
+        '{"matchInfo": {"id": "m"}, "messages": [{"message": '
+        '[{"type": "goal", "minute": 10}, {"type": "miss", "minute": 1e3}, oops]}]}'
+    )
+    match_info, messages = stream_match_events(str(path))
+    assert match_info == {"id": "m"}
+    assert next(messages) == {"type": "goal", "minute": 10}
+    assert next(messages) == {"type": "miss", "minute": 1000.0}
+    with pytest.raises(json.JSONDecodeError):
+        next(messages)
+
+
+def test_ndjson_with_match_info_after_messages(tmp_path):
+    path = tmp_path / "events.ndjson"
+    path.write_text(
+        '{"type": "goal", "minute": "5"}\n\n'
+        '{"matchInfo": {"id": "m"}}\n'
+        '{"type": "miss", "minute": "7"}\n'
+    )
+    match_info, messages = stream_match_events(str(path))
+    assert match_info == {"id": "m"}
+    assert [m["type"] for m in messages] == ["goal", "miss"]
+
+
+def test_missing_match_info_raises(tmp_path):
+    path = tmp_path / "events.ndjson"
+    path.write_text('{"type": "goal"}\n')
+    with pytest.raises(ValueError):
+        stream_match_events(str(path))
+
+
+def test_streamed_pack_matches_loaded_pack(match_data, tmp_path):
+    ndjson = tmp_path / "events.ndjson"
+    lines = [{"matchInfo": match_data["matchInfo"]}] + match_data["messages"][0]["message"]
+    ndjson.write_text("\n".join(json.dumps(line) for line in lines))
+
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")):
+        loaded = createStoryPack()
+        streamed = createStoryPack(stream=True)
+        from_ndjson = createStoryPack(input_path=str(ndjson))
+
+    assert streamed == loaded
+    assert from_ndjson.pages == loaded.pages
+    assert from_ndjson.source == str(ndjson)
@@ -0,0 +1,82 @@
+"""
+Tests for the pipeline instrumentation layer.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from generate import generate_captions
+from instrument import Recorder, count, counting, current, recording, span, timed_iter
+from llm import ClientProvider
+from main import createStoryPack
+from reference import ReferenceData
+
+
+def test_hooks_are_inert_without_a_recorder():
+    items = [1, 2, 3]
+    assert current() is None
+    assert timed_iter("score", items) is items
+    with span("load"):
+        count("llm_calls")
+    assert current() is None
+
+
+def test_nested_spans_are_exclusive():
+    with recording() as recorder:
+        with span("select"):
+            time.sleep(0.01)
+            with span("score"):
+                time.sleep(0.03)
+        assert list(timed_iter("load", iter(range(3)))) == [0, 1, 2]
+
+    assert 0.01 <= recorder.seconds["select"] < 0.03
+    assert recorder.seconds["score"] >= 0.03
+    assert recorder.calls["load"] == 4  # three items and the final StopIteration
+    assert list(recorder.timings()) == ["load", "score", "select"]
+
+
+def test_counters_reach_the_recorder_from_caption_threads(fake_client):
+    refs = ReferenceData(squads=[], assets=[])
+    provider = ClientProvider(client=fake_client())
+    msgs = [{"type": "goal", "comment": f"Goal {n}"} for n in range(4)]
+    with recording() as recorder:
+        generate_captions(msgs, refs, max_workers=4, provider=provider)
+
+    assert set(recorder.counters) == {"llm_calls", "llm_seconds"}
+    assert recorder.counters["llm_calls"] == 8
+    assert recorder.calls["asset_pick"] == 5  # one per request, one for the local pass
+    assert "asset_pick" in recorder.report()
+
+
+def test_counting_scopes_counters_to_its_block(fake_client):
+    refs = ReferenceData(squads=[], assets=[])
+    provider = ClientProvider(client=fake_client())
+    msgs = [{"type": "goal", "comment": f"Goal {n}"} for n in range(2)]
+
+    def caption_pack(results):
+        with counting() as counters:
+            generate_captions(msgs, refs, max_workers=2, provider=provider)
+        results.append(counters.get("llm_calls"))
+
+    results = []
+    threads = [threading.Thread(target=caption_pack, args=(results,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Each pack sees its own four requests, not the other packs'.
+    assert results == [4, 4, 4, 4]
+    assert provider.stats()["llm_calls"] == 16
+
+
+def test_create_story_pack_attaches_stage_timings():
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")):
+        plain = createStoryPack()
+        with recording(Recorder()):
+            profiled = createStoryPack()
+
+    assert "timings" not in plain.metrics
+    assert list(profiled.metrics["timings"]) == ["load", "dedup", "score", "select", "caption", "build"]
+    assert profiled.pages == plain.pages
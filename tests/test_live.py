@@ -0,0 +1,130 @@
+"""
+Tests for live (incremental) story pack updates.
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from cache import CaptionCache
+from live import FileTail, LiveStory, watch
+from ranking import select_top_events
+
+
+@pytest.fixture
+def weights_data():
+    return {
+        "event_weights": {"goal": 5, "shot_on_target": 3, "chance": 2, "card_yellow": 1},
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 3,
+    }
+
+
+@pytest.fixture
+def match_info():
+    return {"id": "m", "description": "A vs B", "date": "2025-11-09Z"}
+
+
+@pytest.fixture
+def mock_caption():
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")) as mock_gen:
+        yield mock_gen
+
+
+def _msg(i, msg_type, minute):
+    return {"id": str(i), "type": msg_type, "minute": str(minute), "comment": f"{msg_type} {i}."}
+
+
+def test_incremental_selection_matches_batch_selection(weights_data, match_info):
+    messages = [
+        _msg(i, t, m)
+        for i, (t, m) in enumerate(
+            [("miss", 5), ("goal", 10), ("yellow card", 20), ("miss", 30),
+             ("attempt saved", 40), ("goal", 80), ("miss", 30), ("corner", 90)]
+        )
+    ]
+    story = LiveStory(match_info, weights_data, "feed.ndjson")
+    for i in range(0, len(messages), 3):
+        story.add(messages[i : i + 3])
+        expected = select_top_events(messages[: i + 3], weights_data)
+        assert [msg for _, msg in story.selection()] == expected
+
+
+def test_only_new_entrants_are_captioned(weights_data, match_info, mock_caption):
+    story = LiveStory(match_info, weights_data, "feed.ndjson")
+    story.add([_msg(1, "goal", 10), _msg(2, "miss", 20), _msg(5, "yellow card", 30)])
+    assert story.build().metrics["captioned"] == 3
+
+    assert story.add([_msg(1, "goal", 10), _msg(3, "corner", 25)]) == 0
+    assert story.add([_msg(4, "goal", 60)]) == 1
+    pack = story.build()
+    assert pack.metrics["captioned"] == 1
+    assert mock_caption.call_count == 4
+    assert [p.minute for p in pack.pages[1:]] == [10, 20, 60]
+
+
+def test_watch_tails_ndjson_and_rewrites_output(tmp_path, weights_data, match_info, mock_caption):
+    feed = tmp_path / "feed.ndjson"
+    out = tmp_path / "out" / "story.json"
+    feed.write_text(json.dumps({"matchInfo": match_info}) + "\n" + json.dumps(_msg(1, "goal", 10)) + "\n")
+
+    tail = FileTail(str(feed))
+    assert [m["id"] for m in tail.poll()] == ["1"]
+    assert tail.poll() == []
+
+    story = watch(str(feed), str(out), weights_data, interval=0, max_polls=1)
+    assert len(json.loads(out.read_text())["pages"]) == 2
+
+    with open(feed, "a") as f:
+        f.write(json.dumps(_msg(2, "goal", 50)) + "\n" + '{"id": "3", "type"')
+    assert [m["id"] for m in tail.poll()] == ["2"]
+
+    story = watch(str(feed), str(out), weights_data, interval=0, max_polls=1)
+    assert len(json.loads(out.read_text())["pages"]) == 3
+    assert list(out.parent.iterdir()) == [out]
+
+
+def test_watch_prunes_the_cache_on_first_rebuild_only(tmp_path, weights_data, match_info, mock_caption):
+    feed = tmp_path / "feed.ndjson"
+    feed.write_text(json.dumps({"matchInfo": match_info}) + "\n" + json.dumps(_msg(1, "goal", 10)) + "\n")
+    cache = CaptionCache(directory=str(tmp_path / "cache"))
+    stale = tmp_path / "cache" / "ab" / "stale.json"
+    stale.parent.mkdir(parents=True)
+    stale.write_text('{"text": "old"}')
+    os.utime(stale, (0, 0))
+
+    watch(str(feed), str(tmp_path / "story.json"), weights_data, interval=0, max_polls=1, cache=cache)
+    assert not stale.exists()
+
+    # A later rebuild within the prune interval leaves the cache alone.
+    stale.write_text('{"text": "old"}')
+    os.utime(stale, (0, 0))
+    with feed.open("a") as f:
+        f.write(json.dumps(_msg(2, "goal", 20)) + "\n")
+    watch(str(feed), str(tmp_path / "story.json"), weights_data, interval=0, max_polls=1, cache=cache)
+    assert stale.exists()
+
+
+def test_seen_keys_are_bounded(weights_data, match_info):
+    story = LiveStory(match_info, weights_data, "feed.json")
+    with patch("live.DEFAULT_WINDOW", 4):
+        story.add([_msg(i, "miss", i) for i in range(10)])
+    assert list(story._seen) == ["6", "7", "8", "9"]
+    assert LiveStory(match_info, weights_data, "feed.ndjson", skip_seen=False)._seen is None
+
+
+def test_tail_skips_malformed_lines(tmp_path, match_info, capsys):
+    feed = tmp_path / "feed.ndjson"
+    feed.write_text(
+        json.dumps({"matchInfo": match_info}) + "\n{not json\n" + json.dumps(_msg(1, "goal", 10)) + "\n"
+    )
+    tail = FileTail(str(feed))
+    assert [m["id"] for m in tail.poll()] == ["1"]
+    assert "Skipping malformed line" in capsys.readouterr().out
+
+    with feed.open("a") as f:
+        f.write(json.dumps(_msg(2, "miss", 20)) + "\n")
+    assert [m["id"] for m in tail.poll()] == ["2"]
@@ -0,0 +1,113 @@
+"""
+Tests for the shared LLM client provider.
+"""
+
+import pytest
+
+from generate import generate_caption, generate_captions
+from llm import ClientProvider, get_provider, set_provider
+from reference import ReferenceData
+
+
+class FlakyModels:
+    """Fails with the given errors, in order, before answering."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return type("Response", (), {"text": "ok"})()
+
+
+class StatusError(Exception):
+    def __init__(self, code):
+        super().__init__(f"status {code}")
+        self.code = code
+
+
+def flaky_client(*errors):
+    return type("Client", (), {"models": FlakyModels(errors)})()
+
+
+@pytest.fixture
+def refs():
+    return ReferenceData(squads=[], assets=[])
+
+
+def test_client_is_created_once_and_shared(refs, fake_client):
+    created = []
+
+    def factory():
+        created.append(fake_client())
+        return created[-1]
+
+    provider = ClientProvider(factory=factory)
+    msgs = [{"type": "goal", "comment": f"Goal {n}"} for n in range(3)]
+    generate_caption(msgs[0], refs, provider=provider)
+    generate_captions(msgs, refs, max_workers=3, provider=provider)
+
+    assert len(created) == 1
+    assert created[0].models.calls == 8
+    assert provider.stats()["llm_calls"] == 8
+    assert len(provider.latencies) == 8
+
+
+def test_no_client_is_created_when_cache_answers_everything(refs, tmp_path):
+    from cache import CaptionCache
+
+    provider = ClientProvider(factory=lambda: pytest.fail("client created"))
+    cache = CaptionCache(str(tmp_path))
+    msg = {"type": "goal", "comment": "Goal"}
+    warm = ClientProvider(client=flaky_client())
+    first = generate_caption(msg, refs, cache=cache, provider=warm)
+
+    assert generate_caption(msg, refs, cache=cache, provider=provider) == first
+    assert provider.calls == 0
+
+
+def test_transient_errors_are_retried_and_counted():
+    provider = ClientProvider(
+        client=flaky_client(StatusError(503), ConnectionError()), backoff=0
+    )
+    assert provider.generate("model", "x", "system") == "ok"
+    assert provider.stats() == {"llm_calls": 3, "llm_retries": 2, "llm_seconds": 0.0}
+    assert len(provider.latencies) == 1
+
+
+def test_permanent_errors_are_raised_without_retry():
+    client = flaky_client(StatusError(400))
+    provider = ClientProvider(client=client, backoff=0)
+    with pytest.raises(StatusError):
+        provider.generate("model", "x", "system")
+    assert client.models.calls == 1
+
+
+def test_retries_give_up_after_max_retries():
+    errors = [StatusError(429)] * 3
+    provider = ClientProvider(client=flaky_client(*errors), max_retries=2, backoff=0)
+    with pytest.raises(StatusError):
+        provider.generate("model", "x", "system")
+    assert provider.retries == 2
+
+
+def test_set_provider_replaces_process_default(fake_client):
+    injected = ClientProvider(client=fake_client())
+    set_provider(injected)
+    try:
+        assert get_provider() is injected
+    finally:
+        set_provider(None)
+    assert get_provider() is not injected
+
+
+def test_latency_window_is_bounded_but_total_is_kept():
+    provider = ClientProvider(client=flaky_client(), latency_window=2)
+    for _ in range(5):
+        provider.generate("model", "x", "system")
+    assert len(provider.latencies) == 2
+    assert provider.seconds >= sum(provider.latencies)
+    assert provider.stats()["llm_calls"] == 5
@@ -196,3 +196,27 @@ def test_negative_invalid_model_fails_validation():
             pages=[], # Fails min_length=1
             created_at="2025-11-10T20:00:00Z"
         )
+
+
+def test_pack_from_built_pages_matches_validated_pack():
+    """
+    Test Positive: The trusted construction path builds the same pack as the
+    constructor and still validates the pack's own fields.
+    """
+    from pydantic import ValidationError
+    from models import CoverPage, HighlightPage
+
+    pages = [
+        CoverPage(type="cover", headline="A vs B", image="assets/cover.jpg"),
+        HighlightPage(type="highlight", minute=10, headline="10' GOAL!", caption="Goal."),
+    ]
+    fields = {"pack_id": "123", "title": "A vs B", "created_at": "2025-11-10T20:00:00Z"}
+
+    trusted = StoryPack.from_built_pages(pages, **fields)
+    assert trusted.model_dump() == StoryPack(pages=pages, **fields).model_dump()
+
+    with pytest.raises(ValidationError):
+        StoryPack.from_built_pages(pages, **dict(fields, title=""))
+    # Dicts are not trusted and are validated in full.
+    with pytest.raises(ValidationError):
+        StoryPack.from_built_pages([{"type": "highlight", "minute": 200}], **fields)
@@ -0,0 +1,61 @@
+"""
+Tests for the offline BM25 asset matcher.
+"""
+
+import pytest
+
+from generate import generate_caption, generate_captions
+from matcher import AssetMatcher, event_query, tokenize
+from reference import ReferenceData, get_reference_data
+
+
+@pytest.fixture
+def refs():
+    return get_reference_data()
+
+
+@pytest.fixture
+def matcher(refs):
+    return AssetMatcher.from_reference(refs)
+
+
+def test_tokenize_strips_possessives_and_keeps_scorelines():
+    assert tokenize("Celtic's Daizen Maeda scores to make it 3-0") == [
+        "celtic", "daizen", "maeda", "scores", "make", "3-0"
+    ]
+
+
+def test_goal_matches_scorer_celebration(refs, matcher):
+    msg = {
+        "type": "goal",
+        "comment": "Goal! Celtic 2, Kilmarnock 0. Kieran Tierney (Celtic) left footed shot. "
+                   "Assisted by Liam Scales.",
+        "playerRef1": next(
+            pid for pid in refs.players if refs.player_name(pid) == "Kieran Tierney"
+        ),
+    }
+    assert "2-0" in event_query(msg, refs)
+    assert matcher.match_event(msg, refs) == "assets/21522328.jpg"
+
+
+def test_weak_matches_return_none(refs, matcher):
+    msg = {"type": "yellow card", "comment": "Greg Kiltie (Kilmarnock) is shown the yellow card."}
+    assert matcher.match_event(msg, refs) is None
+
+
+def test_local_matcher_skips_llm_asset_request(fake_client):
+    refs = ReferenceData(
+        squads=[], assets=[{"filename": "1.jpg", "description": "X: Kenny scores a header"}]
+    )
+    matcher = AssetMatcher(refs.assets, min_score=0.1)
+    hit = {"type": "goal", "comment": "Kenny header"}
+    miss = {"type": "corner", "comment": "Corner, Celtic."}
+
+    client = fake_client()
+    assert generate_caption(hit, refs, client, matcher=matcher)[0] == "assets/1.jpg"
+    assert client.models.calls == 1
+
+    client = fake_client()
+    results = generate_captions([hit, miss], refs, client, matcher=matcher)
+    assert [asset for asset, _ in results] == ["assets/1.jpg", "assets/fake.jpg"]
+    assert client.models.calls == 3
@@ -0,0 +1,141 @@
+"""
+Tests for story pack serialization and atomic output.
+"""
+
+import gzip
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+import main
+from models import CoverPage, HighlightPage, StoryPack
+from output import (
+    read_sharded_pack,
+    serialize_pack,
+    shard_path,
+    write_pack,
+    write_sharded_pack,
+)
+
+
+@pytest.fixture
+def story():
+    return StoryPack(
+        pack_id="p",
+        title="A vs B — Ü",
+        pages=[CoverPage(type="cover", headline="A vs B", image="assets/placeholder.png")],
+        created_at="2025-11-09T00:00:00+00:00",
+    )
+
+
+def test_serialize_matches_model_dump(story):
+    expected = story.model_dump(exclude_none=True)
+    assert json.loads(serialize_pack(story)) == expected
+    compact = serialize_pack(story, compact=True)
+    assert json.loads(compact) == expected
+    assert b"\n" not in compact
+
+
+def test_write_pack_plain_and_gzip(tmp_path, story):
+    path = write_pack(str(tmp_path / "story.json"), story)
+    assert json.loads(open(path, "rb").read()) == story.model_dump(exclude_none=True)
+
+    gz_path = write_pack(str(tmp_path / "story.json"), story, compact=True, use_gzip=True)
+    assert gz_path == str(tmp_path / "story.json.gz")
+    with gzip.open(gz_path) as f:
+        assert json.load(f) == story.model_dump(exclude_none=True)
+    assert sorted(os.listdir(tmp_path)) == ["story.json", "story.json.gz"]
+
+
+def test_main_strict_writes_only_the_requested_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("data", "schema", "assets", "weights.example.json"):
+        os.symlink(os.path.join(os.path.dirname(main.__file__), name), name)
+
+    argv = ["main.py", "--strict", "--no-cache", "-o", "packs/story.json"]
+    with patch("sys.argv", argv), patch(
+        "main.generate_caption", return_value=("a.jpg", "caption")
+    ):
+        main.main()
+
+    assert not os.path.exists("out")
+    assert os.listdir("packs") == ["story.json"]
+    with open("packs/story.json") as f:
+        assert json.load(f)["pages"][0]["type"] == "cover"
+
+
+def _big_story(pages):
+    return StoryPack(
+        pack_id="p",
+        title="A vs B",
+        pages=[CoverPage(type="cover", headline="A vs B", image="assets/placeholder.png")]
+        + [
+            HighlightPage(
+                type="highlight", minute=i, headline=f"Goal {i}", caption="Caption.",
+                image="assets/placeholder.png",
+            )
+            for i in range(1, pages)
+        ],
+        created_at="2025-11-09T00:00:00+00:00",
+        metrics={"events_total": pages},
+    )
+
+
+def test_sharded_pack_round_trip(tmp_path):
+    story = _big_story(11)
+    manifest_path = str(tmp_path / "story.json")
+    written = write_sharded_pack(manifest_path, story, shard_size=4)
+    assert written == [shard_path(manifest_path, n) for n in range(3)] + [manifest_path]
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    assert manifest["page_count"] == 11
+    assert manifest["cover"]["type"] == "cover"
+    assert "pages" not in manifest
+    assert [entry["headline"] for entry in manifest["index"]][:2] == ["A vs B", "Goal 1"]
+    assert [shard["count"] for shard in manifest["shards"]] == [4, 4, 3]
+
+    rebuilt = read_sharded_pack(manifest_path)
+    assert rebuilt.model_dump() == story.model_dump()
+
+
+def test_sharded_pack_removes_stale_shards(tmp_path):
+    manifest_path = str(tmp_path / "story.json")
+    write_sharded_pack(manifest_path, _big_story(9), shard_size=2)
+    write_sharded_pack(manifest_path, _big_story(3), shard_size=2, compact=True)
+    assert sorted(os.listdir(tmp_path)) == [
+        "story.json", "story.pages-0000.json", "story.pages-0001.json",
+    ]
+    assert len(read_sharded_pack(manifest_path).pages) == 3
+
+
+def test_read_sharded_pack_rejects_monolithic_pack(tmp_path, story):
+    path = write_pack(str(tmp_path / "story.json"), story)
+    with pytest.raises(ValueError):
+        read_sharded_pack(path)
+
+
+def test_main_shard_size_writes_manifest_and_shards(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("data", "schema", "assets", "weights.example.json"):
+        os.symlink(os.path.join(os.path.dirname(main.__file__), name), name)
+
+    argv = ["main.py", "--strict", "--no-cache", "--shard-size", "2", "-o", "packs/story.json"]
+    with patch("sys.argv", argv), patch(
+        "main.generate_caption", return_value=("a.jpg", "caption")
+    ):
+        main.main()
+
+    story = read_sharded_pack("packs/story.json")
+    assert story.pages[0].type == "cover"
+    assert len(os.listdir("packs")) == 1 + -(-len(story.pages) // 2)
+
+
+@pytest.mark.parametrize("mode", [["--batch", "matches"], ["--watch"], ["--serve"]])
+def test_shard_size_is_rejected_outside_single_runs(mode, capsys):
+    with patch("sys.argv", ["main.py", "--shard-size", "5"] + mode):
+        with pytest.raises(SystemExit):
+            main.main()
+    assert "--shard-size only applies to a single pack" in capsys.readouterr().out
@@ -0,0 +1,129 @@
+"""
+Tests for streaming top-K event selection.
+"""
+
+import random
+
+import pytest
+
+from ranking import TYPE_TO_WEIGHT_KEY_MAP, iter_scored_events, select_top_events
+
+
+@pytest.fixture
+def weights_data():
+    return {
+        "event_weights": {
+            "goal": 5,
+            "penalty_missed": 4,
+            "shot_on_target": 3,
+            "card_red": 3,
+            "card_yellow": 1,
+            "chance": 2,
+            "substitution": 0,
+        },
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 7,
+    }
+
+
+def _full_sort_selection(messages, weights_data):
+    """The original score-everything-then-sort selection, kept as a reference."""
+    scored = [(score, msg) for score, _, msg in iter_scored_events(messages, weights_data)]
+    scored.sort(key=lambda x: (x[0], int(x[1].get("minute", 0))), reverse=True)
+    top = [msg for _, msg in scored[: weights_data["max_pages"]]]
+    top.sort(key=lambda x: int(x.get("minute", 0)))
+    return top
+
+
+def test_heap_selection_matches_full_sort_including_ties(weights_data):
+    rng = random.Random(7)
+    types = list(TYPE_TO_WEIGHT_KEY_MAP) + ["corner", "offside"]
+    # Few distinct minutes so (score, minute) ties are common.
+    messages = [
+        {"id": str(i), "type": rng.choice(types), "minute": str(rng.choice([10, 80, 90]))}
+        for i in range(500)
+    ]
+    for max_pages in (0, 1, 7, 50, 600):
+        weights_data["max_pages"] = max_pages
+        expected = _full_sort_selection(messages, weights_data)
+        assert select_top_events(iter(messages), weights_data) == expected
+
+
+def test_selection_consumes_a_generator(weights_data):
+    weights_data["max_pages"] = 2
+    messages = (
+        {"type": t, "minute": m}
+        for t, m in [("goal", "10"), ("corner", "50"), ("goal", "89"), ("miss", "90")]
+    )
+    selected = select_top_events(messages, weights_data)
+    assert [(m["type"], m["minute"]) for m in selected] == [("goal", "10"), ("goal", "89")]
+
+
+def test_vectorized_selection_matches_heap_selection(weights_data):
+    pytest.importorskip("numpy")
+    from ranking import EventColumns, select_top_events_vectorized
+
+    rng = random.Random(11)
+    types = list(TYPE_TO_WEIGHT_KEY_MAP) + ["corner", "offside", ""]
+    messages = [
+        {"id": str(i), "type": rng.choice(types), "minute": str(rng.choice([10, 75, 76, 90]))}
+        for i in range(500)
+    ]
+    del messages[3]["type"]
+    columns = EventColumns(messages)
+    for max_pages in (0, 1, 7, 50, 600):
+        weights_data["max_pages"] = max_pages
+        expected = select_top_events(messages, weights_data)
+        assert select_top_events_vectorized(messages, weights_data) == expected
+        assert select_top_events_vectorized(columns, weights_data) == expected
+
+    assert select_top_events_vectorized([], weights_data) == []
+
+
+def _legacy_headline(msg_type, minute, comment, event_weights):
+    """The per-call highlight classification and headline chain, kept as a reference."""
+    positive = {key for key, val in event_weights.items() if val > 0}
+    highlight_types = {t for t, k in TYPE_TO_WEIGHT_KEY_MAP.items() if k in positive}
+    highlight_types |= positive
+    if msg_type not in highlight_types:
+        return False, f"{minute}' Match {msg_type.capitalize()}"
+    fragment = comment.split(".")[0]
+    if msg_type in ["goal", "penalty goal"]:
+        return True, f"{minute}' GOAL! -- {fragment}"
+    elif msg_type in ["yellow card", "red card"]:
+        return True, f"{minute}' {msg_type.upper()} -- {fragment}"
+    elif msg_type in ["attempt saved", "attempt blocked", "post", "miss"]:
+        return True, f"{minute}' CHANCE! -- {fragment}"
+    elif msg_type == "penalty won":
+        return True, f"{minute}' PENALTY! -- {fragment}"
+    elif msg_type == "penalty lost":
+        return True, f"{minute}' PENALTY CONCEDED! -- {fragment}"
+    return True, f"{minute}' {msg_type.upper()} -- {fragment}"
+
+
+def test_profile_rules_match_legacy_classification(weights_data):
+    from ranking import RankingProfile
+
+    rng = random.Random(2)
+    types = list(TYPE_TO_WEIGHT_KEY_MAP) + ["corner", "offside", "start"]
+    for _ in range(20):
+        weights = dict(weights_data)
+        weights["event_weights"] = {
+            key: rng.choice([0, 0, 1, 3]) for key in list(weights_data["event_weights"]) + ["corner"]
+        }
+        profile = RankingProfile(weights)
+        for msg_type in types:
+            rule = profile.rule(msg_type)
+            expected = _legacy_headline(msg_type, 12, "Text. More", weights["event_weights"])
+            assert (rule.is_highlight, rule.headline(12, "Text")) == expected
+            assert rule.is_goal == (msg_type in ("goal", "penalty goal"))
+
+
+def test_profiles_are_compiled_once_per_configuration(weights_data):
+    from ranking import compile_profile
+
+    profile = compile_profile(weights_data)
+    assert compile_profile(dict(weights_data)) is profile
+    assert compile_profile(profile) is profile
+    assert compile_profile(dict(weights_data, max_pages=3)) is not profile
@@ -0,0 +1,59 @@
+"""
+Tests for the shared reference data layer used by caption generation.
+"""
+
+import pytest
+
+from generate import describe_event
+from reference import ReferenceData, get_reference_data, load_reference_data
+
+
+@pytest.fixture
+def refs():
+    """Provides a tiny in-memory squad/asset set."""
+    squads = [
+        {
+            "contestantId": "team-a",
+            "contestantName": "Team A FC",
+            "person": [{"id": "p1", "firstName": "Alan", "lastName": "Able"}],
+        },
+        {
+            "contestantId": "team-b",
+            "contestantName": "Team B FC",
+            "person": [{"id": "p2", "firstName": "Bob", "lastName": "Baker"}],
+        },
+    ]
+    assets = [{"filename": "1.jpg", "description": "Alan Able celebrates"}]
+    return ReferenceData(squads=squads, assets=assets)
+
+
+def test_indexes_players_and_teams(refs):
+    assert refs.player_name("p2") == "Bob Baker"
+    assert refs.player_team["p2"] == "team-b"
+    assert refs.team_name("team-a") == "Team A FC"
+    assert refs.player_name("missing") is None
+    assert refs.team_name("") is None
+
+
+def test_describe_event_resolves_refs_by_id(refs):
+    msg = {
+        "type": "goal",
+        "comment": "Goal!",
+        "time": "10:00",
+        "playerRef1": "p2",
+        "teamRef1": "team-b",
+        "playerRef2": "p1",
+    }
+    assert describe_event(msg, refs) == (
+        "goal\ncomment: Goal!\ntime: 10:00\n"
+        "player-1: Bob Baker\nteam-1: Team B FC\n"
+        "player-2: Alan Able\n"
+    )
+
+
+def test_reference_files_are_parsed_once():
+    get_reference_data.cache_clear()
+    first = get_reference_data()
+    assert get_reference_data() is first
+    assert len(first.teams) == 2
+    assert first.assets == load_reference_data().assets
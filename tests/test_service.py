@@ -0,0 +1,149 @@
+"""
+Tests for the story service, run in-process against the offline stub model.
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from cache import CaptionCache
+from benchmarks.service_load import connector, fetch_stats, run_load
+from benchmarks.synthetic import generate_match
+from llm import ClientProvider, StubClient, set_provider
+from main import buildStoryPack, loadWeights
+from service import StoryService, make_server, percentile
+
+
+@pytest.fixture
+def stub_llm():
+    set_provider(ClientProvider(client=StubClient()))
+    yield
+    set_provider(None)
+
+
+@pytest.fixture
+def service(stub_llm):
+    return StoryService(loadWeights(), strict=True)
+
+
+def _serve(service, **kwargs):
+    server = make_server(service, port=0, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def connect(service):
+    server = _serve(service)
+    yield connector("http://%s:%d" % server.server_address[:2])
+    server.shutdown()
+    server.server_close()
+
+
+def _post(connect, body):
+    conn = connect()
+    try:
+        conn.request("POST", "/packs?source=test.json", body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_pack_matches_direct_build(connect, service):
+    document = generate_match(300, seed=1)
+    status, pack = _post(connect, json.dumps(document).encode())
+
+    assert status == 200
+    direct = buildStoryPack(
+        document["matchInfo"],
+        document["messages"][0]["message"],
+        service.profile,
+        source="test.json",
+    )
+    assert pack == json.loads(direct.model_dump_json(exclude_none=True))
+
+
+@pytest.mark.parametrize("body", [b"not json", b'{"matchInfo": {}}', b"[]"])
+def test_bad_payload_is_rejected(connect, body):
+    status, error = _post(connect, body)
+    assert status == 400
+    assert error["error"] == "BadRequest"
+
+
+def test_concurrent_load_reports_latency(connect):
+    bodies = [json.dumps(generate_match(200, seed=2, match_index=n)).encode() for n in range(3)]
+    summary = run_load(connect, bodies, requests=24, concurrency=6)
+
+    assert summary["requests"] == 24 and summary["errors"] == 0
+    assert 0 < summary["p50_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+    stats = fetch_stats(connect)
+    assert stats["requests"] == 24 and stats["in_flight"] == 0
+    assert stats["p50_ms"] <= stats["p99_ms"]
+
+
+def test_unix_socket(service, tmp_path):
+    path = str(tmp_path / "story.sock")
+    server = _serve(service, socket_path=path)
+    try:
+        status, pack = _post(
+            connector(socket_path=path), json.dumps(generate_match(50)).encode()
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert status == 200
+    assert pack["pages"][0]["type"] == "cover"
+
+
+def test_percentile():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+
+def test_concurrent_packs_report_their_own_llm_calls(fake_client, tmp_path):
+    set_provider(ClientProvider(client=fake_client(latency=0.02)))
+    try:
+        service = StoryService(loadWeights(), cache=CaptionCache(directory=str(tmp_path)))
+        documents = [generate_match(200, seed=n) for n in range(4)]
+        packs = [None] * len(documents)
+
+        def build(i):
+            packs[i] = service.build(documents[i])
+
+        threads = [threading.Thread(target=build, args=(i,)) for i in range(len(documents))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        set_provider(None)
+
+    # Two requests per selected event (asset and caption), none from other packs.
+    for pack in packs:
+        highlights = len(pack.pages) - 1
+        assert pack.metrics["llm_calls"] == pack.metrics["cache_misses"] == 2 * highlights
+        assert pack.metrics["cache_hits"] == 0
+
+
+def test_service_prunes_the_cache_periodically(stub_llm, tmp_path):
+    cache = CaptionCache(directory=str(tmp_path), max_age=60)
+    stale = tmp_path / "ab" / "stale.json"
+    stale.parent.mkdir()
+    stale.write_text('{"text": "old"}')
+    os.utime(stale, (time.time() - 3600,) * 2)
+
+    service = StoryService(loadWeights(), cache=cache, prune_interval=3600)
+    service.build(generate_match(50, seed=1))
+    assert not stale.exists()
+
+    # Within the interval, later packs do not walk the cache again.
+    stale.write_text('{"text": "old"}')
+    os.utime(stale, (time.time() - 3600,) * 2)
+    service.build(generate_match(50, seed=2))
+    assert stale.exists()
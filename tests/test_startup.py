@@ -0,0 +1,59 @@
+"""
+Import-time budget for the CLI entry point.
+
+Heavy dependencies (jsonschema, the genai SDK, dotenv) must only load on the
+code paths that need them, so plain and --lenient runs start quickly.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 400
+LAZY_MODULES = ("jsonschema", "google.genai", "dotenv")
+
+
+def _import_times(module):
+    """Returns {module name: cumulative microseconds} from `-X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.fixture(scope="module")
+def main_import_times():
+    return _import_times("main")
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_heavy_modules_are_not_imported_eagerly(main_import_times, module):
+    assert module not in main_import_times
+
+
+def test_main_imports_within_budget(main_import_times):
+    assert main_import_times["main"] / 1000 < IMPORT_BUDGET_MS
+
+
+def test_stub_provider_calls_do_not_import_the_sdk():
+    code = (
+        "import sys\n"
+        "from llm import ClientProvider, StubClient\n"
+        "provider = ClientProvider(client=StubClient())\n"
+        "assert provider.generate('m', 'comment: Goal!', 'system', json_output=True) == 'Goal!'\n"
+        "assert not [m for m in ('google.genai', 'dotenv') if m in sys.modules]\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
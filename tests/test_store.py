@@ -0,0 +1,93 @@
+"""
+Tests for the compiled event store.
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from benchmarks.synthetic import generate_match, write_match
+from events import to_event
+from main import createStoryPack, loadMatchEvents
+from store import EventStore, StoredEvents
+
+
+@pytest.fixture
+def match_file(tmp_path):
+    return write_match(str(tmp_path / "match.json"), generate_match(400, seed=3))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EventStore(str(tmp_path / "store"))
+
+
+def test_stored_events_match_parsed_events(match_file, store):
+    match_info, messages = loadMatchEvents(match_file)
+    assert store.get(match_file) is None
+
+    stored_info, stored = loadMatchEvents(match_file, store=store)
+    assert isinstance(stored, StoredEvents)
+    assert stored_info == match_info
+    assert list(stored) == [to_event(msg) for msg in messages]
+
+    # The second load reads the compiled copy.
+    cached_info, cached = store.get(match_file)
+    assert cached_info == match_info
+    assert list(cached) == list(stored)
+    assert cached[-1] == to_event(messages[-1])
+
+
+def test_pack_from_store_matches_pack_from_json(match_file, store):
+    with patch("main.generate_caption", lambda *args, **kwargs: ("assets/a.jpg", "Caption.")):
+        plain = createStoryPack(input_path=match_file)
+        compiled = createStoryPack(input_path=match_file, event_store=store)
+        reused = createStoryPack(input_path=match_file, event_store=store)
+    assert plain.model_dump() == compiled.model_dump() == reused.model_dump()
+
+
+def test_changed_source_is_recompiled(match_file, store):
+    loadMatchEvents(match_file, store=store)
+
+    # A new mtime with the same content keeps the compiled copy.
+    stat = os.stat(match_file)
+    os.utime(match_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert store.get(match_file) is not None
+
+    write_match(match_file, generate_match(50, seed=4))
+    assert store.get(match_file) is None
+    _, events = loadMatchEvents(match_file, store=store)
+    assert len(events) == 50
+    assert len(store.get(match_file)[1]) == 50
+
+
+def test_unrepresentable_messages_are_not_stored(tmp_path, store):
+    path = str(tmp_path / "ints.json")
+    match = generate_match(5)
+    match["messages"][0]["message"][0]["id"] = 12345
+    with open(path, "w") as f:
+        json.dump(match, f)
+
+    _, messages = loadMatchEvents(path, store=store)
+    assert isinstance(messages, list) and messages[0]["id"] == 12345
+    assert store.get(path) is None
+
+
+def test_store_drops_duplicates_like_json(tmp_path, store):
+    match = generate_match(300, seed=5)
+    events = match["messages"][0]["message"]
+    resent = [dict(msg, id=msg["id"] + "r") for msg in events[::4]]
+    reworded = [dict(msg, id=msg["id"] + "w", comment="Reworded.") for msg in events[1::5]]
+    events.extend(resent + reworded)
+    path = write_match(str(tmp_path / "dupes.json"), match)
+
+    with patch("main.generate_caption", lambda *args, **kwargs: ("assets/a.jpg", "Caption.")):
+        plain = createStoryPack(input_path=path)
+        compiled = createStoryPack(input_path=path, event_store=store)
+    assert plain.model_dump() == compiled.model_dump()
+    assert plain.metrics["duplicates_dropped"] == len(resent)
+    assert plain.metrics["near_duplicates_dropped"] == len(reworded)
@@ -0,0 +1,92 @@
+"""
+Tests for the weights sweep.
+"""
+
+import random
+
+import pytest
+
+import sweep
+from ranking import TYPE_TO_WEIGHT_KEY_MAP, select_top_events
+from sweep import build_report, config_label, expand_configs, grid_axes, run_sweep
+
+
+@pytest.fixture
+def base():
+    return {
+        "event_weights": {"goal": 5, "chance": 2, "card_yellow": 1},
+        "late_minute_bonus_after": 75,
+        "late_minute_bonus": 1,
+        "max_pages": 4,
+    }
+
+
+@pytest.fixture
+def messages():
+    rng = random.Random(3)
+    types = list(TYPE_TO_WEIGHT_KEY_MAP) + ["corner"]
+    return [
+        {"id": f"m{i}", "type": rng.choice(types), "minute": str(rng.randint(0, 95))}
+        for i in range(120)
+    ]
+
+
+SPEC = {
+    "event_weights": {"goal": [3, 8], "chance": [1, 4], "card_yellow": 0},
+    "late_minute_bonus": [0, 2, 5],
+    "max_pages": 6,
+}
+
+
+def test_grid_expands_every_combination_over_the_base(base):
+    configs = expand_configs(SPEC, base)
+    assert len(configs) == 12
+    assert all(c["max_pages"] == 6 and c["event_weights"]["card_yellow"] == 0 for c in configs)
+    assert all(c["late_minute_bonus_after"] == 75 for c in configs)
+    labels = [config_label(c, grid_axes(SPEC)) for c in configs]
+    assert labels[0] == {"event_weights.goal": 3, "event_weights.chance": 1, "late_minute_bonus": 0}
+    assert len({tuple(label.values()) for label in labels}) == 12
+    assert base["event_weights"]["goal"] == 5
+
+
+def test_samples_are_a_repeatable_subset_of_the_grid(base):
+    grid = expand_configs(SPEC, base)
+    sampled = expand_configs(SPEC, base, samples=5, seed=1)
+    assert len(sampled) == 5
+    assert all(c in grid for c in sampled)
+    assert sampled == expand_configs(SPEC, base, samples=5, seed=1)
+
+
+@pytest.mark.parametrize("numpy_index", [True, False])
+def test_trials_select_what_select_top_events_would(base, messages, monkeypatch, numpy_index):
+    if numpy_index:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(sweep, "build_index", lambda msgs: msgs)
+    configs = expand_configs(SPEC, base)
+    trials = run_sweep(messages, configs, [{}] * len(configs), jobs=1)
+
+    for config, trial in zip(configs, trials):
+        assert [messages[i] for i in trial.selected] == select_top_events(messages, config)
+
+
+def test_report_groups_identical_selections(base, messages):
+    configs = [base, base, dict(base, max_pages=2)]
+    trials = run_sweep(messages, configs, [{}] * 3, jobs=1)
+    report = build_report(messages, trials[1:], trials[0], 0.1)
+
+    assert report["results"][0]["overlap_with_baseline"] == 1.0
+    assert report["results"][1]["overlap_with_baseline"] == 0.5
+    assert len(report["selections"]) == 2
+    assert report["selection_overlap"] == [{"a": 0, "b": 1, "jaccard": 0.5}]
+    assert report["baseline"][0].startswith("m")
+
+
+def test_report_limits_the_overlap_table(base, messages):
+    configs = [dict(base, max_pages=n) for n in (1, 2, 3, 3)]
+    trials = run_sweep(messages, configs, [{}] * 4, jobs=1)
+    report = build_report(messages, trials, trials[0], 0.1, overlap_limit=2)
+
+    assert [r["selection"] for r in report["results"]] == [0, 1, 2, 2]
+    # Selection 2 has the most trials; ties keep the earlier selection.
+    assert [(o["a"], o["b"]) for o in report["selection_overlap"]] == [(0, 2)]
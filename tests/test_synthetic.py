@@ -0,0 +1,50 @@
+"""
+Tests for the synthetic match generator used by the benchmarks.
+"""
+
+from unittest.mock import patch
+
+from benchmarks.synthetic import generate_files, generate_match
+from main import createStoryPack, loadMatchEvents
+from reference import get_reference_data
+from validation import validate_pack
+
+REQUIRED = ("minute", "period", "second", "teamRef1", "type", "playerRef1", "comment")
+
+
+def test_generation_is_seeded():
+    assert generate_match(50, seed=1) == generate_match(50, seed=1)
+    assert generate_match(50, seed=1) != generate_match(50, seed=2)
+    assert generate_match(50, seed=1, match_index=1) != generate_match(50, seed=1)
+
+
+def test_messages_follow_the_events_schema():
+    refs = get_reference_data()
+    messages = generate_match(500)["messages"][0]["message"]
+    assert len(messages) == 500
+    for msg in messages:
+        assert all(msg.get(field) for field in REQUIRED)
+        assert 0 <= int(msg["minute"]) <= 120
+        assert int(msg["period"]) in (1, 2)
+        assert 0 <= int(msg["second"]) <= 59
+        assert refs.player_name(msg["playerRef1"]) is not None
+        assert refs.team_name(msg["teamRef1"]) is not None
+    minutes = [int(msg["minute"]) for msg in messages]
+    assert minutes == sorted(minutes, reverse=True)
+
+
+def test_json_and_ndjson_files_load_the_same_events(tmp_path):
+    (json_path,) = generate_files(str(tmp_path), 40)
+    (ndjson_path,) = generate_files(str(tmp_path), 40, ndjson=True)
+    json_info, json_messages = loadMatchEvents(json_path)
+    ndjson_info, ndjson_messages = loadMatchEvents(ndjson_path)
+    assert json_info == ndjson_info
+    assert list(json_messages) == list(ndjson_messages)
+
+
+def test_generated_match_builds_a_valid_pack(tmp_path):
+    (path,) = generate_files(str(tmp_path), 300)
+    with patch("main.generate_caption", return_value=("assets/placeholder.png", "Caption.")):
+        story = createStoryPack(input_path=path)
+    validate_pack(story)
+    assert len(story.pages) == 8
@@ -0,0 +1,46 @@
+"""
+Tests for cached JSON Schema validation of story packs.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from main import createStoryPack
+from jsonschema import ValidationError
+
+from validation import get_validator, validate_pack
+
+
+@pytest.fixture
+def story():
+    with patch("main.generate_caption", return_value=("a.jpg", "caption")):
+        return createStoryPack()
+
+
+def test_validator_is_compiled_once():
+    assert get_validator() is get_validator()
+    assert get_validator(trusted=True) is not get_validator()
+
+
+def test_generated_pack_passes_full_and_trusted_validation(story):
+    assert story.created_at == "2025-11-09T00:00:00+00:00"
+    validate_pack(story)
+    validate_pack(story, trusted=True)
+
+
+@pytest.mark.parametrize("created_at", ["2025-11-09 00:00:00", "2025-11-09T00:00:00", "soon"])
+def test_created_at_must_be_rfc3339(story, created_at):
+    story_pack = story.model_dump(exclude_none=True)
+    story_pack["created_at"] = created_at
+    for trusted in (False, True):
+        with pytest.raises(ValidationError):
+            validate_pack(story_pack, trusted=trusted)
+
+
+def test_trusted_validation_skips_model_guaranteed_checks(story):
+    story_pack = story.model_dump(exclude_none=True)
+    story_pack["pages"] = []
+    with pytest.raises(ValidationError):
+        validate_pack(story_pack)
+    validate_pack(story_pack, trusted=True)
@@ -0,0 +1,25 @@
+"""
+Tests for the shared process pool helper.
+"""
+
+import pytest
+
+from workers import run_in_pool
+
+_state = {}
+
+
+def _init(offset):
+    _state["offset"] = offset
+
+
+def _add(item):
+    return item + _state["offset"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_in_pool_initializes_each_process_and_keeps_order(jobs):
+    _state.clear()
+    assert run_in_pool(_add, range(10), _init, (100,), jobs=jobs, chunksize=3) == list(range(100, 110))
+    # Only the in-process run initializes this process.
+    assert ("offset" in _state) == (jobs == 1)
@@ -0,0 +1,86 @@
+"""
+JSON Schema validation of story packs.
+
+The schema is loaded and its validator compiled once per process, with a
+format checker so `created_at` is held to RFC 3339 date-time. For packs built
+through `models.StoryPack` a reduced schema can be used that only keeps the
+checks pydantic does not already enforce.
+
+jsonschema is only imported when a validator is first requested, so importing
+this module is cheap for runs that never validate.
+"""
+
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Union
+
+from models import StoryPack
+
+SCHEMA_DEFINITION = "schema/story.schema.json"
+
+# Top-level properties whose schema constraints are not already guaranteed by
+# the StoryPack model (pydantic only checks that created_at is a string).
+UNGUARANTEED_PROPERTIES = ("created_at",)
+
+
+def _is_date_time(value: Any) -> bool:
+    # jsonschema only checks date-time when an optional RFC 3339 package is
+    # installed; this keeps the check dependency-free.
+    if not isinstance(value, str):
+        return True
+    parsed = datetime.fromisoformat(value)
+    return value[10:11] in ("T", "t") and parsed.tzinfo is not None
+
+
+@lru_cache(maxsize=None)
+def load_schema(path: str = SCHEMA_DEFINITION) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def get_validator(path: str = SCHEMA_DEFINITION, trusted: bool = False):
+    """
+    Returns the process-wide Draft202012Validator for the schema at `path`.
+
+    With `trusted`, the validator only covers UNGUARANTEED_PROPERTIES and is
+    meant for packs that were produced by the StoryPack model.
+    """
+    from jsonschema import Draft202012Validator, FormatChecker
+
+    schema = load_schema(path)
+    if trusted:
+        schema = {
+            "$schema": schema.get("$schema"),
+            "type": "object",
+            "required": [p for p in schema["required"] if p in UNGUARANTEED_PROPERTIES],
+            "properties": {
+                p: schema["properties"][p] for p in UNGUARANTEED_PROPERTIES
+            },
+        }
+    format_checker = FormatChecker(formats=())
+    format_checker.checks("date-time", raises=ValueError)(_is_date_time)
+
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema, format_checker=format_checker)
+
+
+def validate_pack(
+    story_pack: Union[StoryPack, Dict[str, Any]],
+    path: str = SCHEMA_DEFINITION,
+    trusted: bool = False,
+) -> None:
+    """
+    Validates a pack (a StoryPack or its `model_dump(exclude_none=True)` dict).
+
+    `trusted` skips the checks StoryPack already enforces, so only use it for
+    packs that were built through the model.
+
+    Raises:
+        jsonschema.ValidationError: If the pack does not match the schema.
+    """
+    if isinstance(story_pack, StoryPack):
+        story_pack = story_pack.model_dump(exclude_none=True)
+    get_validator(path, trusted).validate(story_pack)
+
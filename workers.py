@@ -0,0 +1,36 @@
+"""
+Process pool shared by the batch, sweep and evaluation modes.
+
+Each mode keeps its per-process state in a module-level dict filled by an
+initializer, which runs once in every worker (or once in this process), so
+weights, indexes and reference data are set up once per worker rather than
+once per item.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def run_in_pool(
+    fn: Callable[[Any], T],
+    items: Iterable[Any],
+    initializer: Callable[..., None],
+    initargs: Sequence[Any] = (),
+    jobs: Optional[int] = None,
+    chunksize: int = 1,
+) -> List[T]:
+    """
+    Returns `fn(item)` for every item, in order, spread over `jobs` worker
+    processes (all CPUs by default; 1 runs in-process). `initializer` is
+    called with `initargs` once per process before its first item.
+    """
+    if jobs == 1:
+        initializer(*initargs)
+        return [fn(item) for item in items]
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=initializer, initargs=tuple(initargs)
+    ) as pool:
+        return list(pool.map(fn, items, chunksize=chunksize))